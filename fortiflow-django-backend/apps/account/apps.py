@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AccountConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.account'
+
+    def ready(self):
+        from core.cache import track_model_writes
+        from core.identity import track_identity_changes
+        track_model_writes(self.get_model('CustomUser'))
+        track_identity_changes()
@@ -153,8 +153,8 @@ class CustomUserCreationForm(UserCreationForm):
 
     def save(self, commit=True):
         user = super().save(commit=False)
-        if hasattr(self.request.user, 'tenant'):
-            user.tenant = self.request.user.tenant
+        if self.request.user.is_authenticated:
+            user.tenant_id = self.request.tenant_id
             
         if commit:
             user.save()
@@ -18,3 +18,15 @@ class CustomUser(AbstractUser):
     class Meta:
         db_table = "account_user"
 
+
+class CacheVersion(models.Model):
+    """
+    Tokens de generación de `core.cache` y versiones de fila de
+    `core.fragments`. Viven en la base y no en la caché para que todos los
+    procesos, web y `runworker`, vean los mismos.
+    """
+    key = models.CharField(max_length=255, primary_key=True)
+    value = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
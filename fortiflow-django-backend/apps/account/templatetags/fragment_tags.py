@@ -0,0 +1,60 @@
+from django import template
+
+from core.fragments import cached_rows
+
+register = template.Library()
+
+
+class RowCacheNode(template.Node):
+    def __init__(self, var_name, sequence, dependencies, nodelist):
+        self.var_name = var_name
+        self.sequence = sequence
+        self.dependencies = dependencies
+        self.nodelist = nodelist
+
+    def render(self, context):
+        items = list(self.sequence.resolve(context, ignore_failures=True) or ())
+        request = context.get('request')
+        user = getattr(request, 'user', None)
+        if user is not None and not user.is_authenticated:
+            user = None
+
+        rows = []
+        with context.push():
+            for item in items:
+                context[self.var_name] = item
+                rows.append((item, [dependency.resolve(context) for dependency in self.dependencies]))
+
+        def render(item):
+            with context.push(**{self.var_name: item}):
+                return self.nodelist.render(context)
+
+        scope = (self.origin.name if self.origin else None, self.token.lineno if self.token else None)
+        return cached_rows(rows, render, scope, user)
+
+
+@register.tag
+def rowcache(parser, token):
+    """
+    Como `{% for %}`, pero reutiliza el HTML cacheado de cada fila mientras
+    el objeto (y sus dependencias) no cambien. Ver core/fragments.py.
+
+    Usage:
+        {% load fragment_tags %}
+        {% rowcache obligation in obligations depends obligation.debtor %}
+            <tr>...</tr>
+        {% endrowcache %}
+
+    El contenido solo puede usar la variable de la fila y las dependencias
+    declaradas (instancias con versión de fila o valores simples); no
+    `forloop` ni datos del usuario.
+    """
+    bits = token.split_contents()
+    if len(bits) < 4 or bits[2] != 'in' or (len(bits) > 4 and bits[4] != 'depends'):
+        raise template.TemplateSyntaxError(
+            "Uso: {% rowcache item in items [depends expr ...] %}"
+        )
+    nodelist = parser.parse(('endrowcache',))
+    parser.delete_first_token()
+    dependencies = [parser.compile_filter(bit) for bit in bits[5:]]
+    return RowCacheNode(bits[1], parser.compile_filter(bits[3]), dependencies, nodelist)
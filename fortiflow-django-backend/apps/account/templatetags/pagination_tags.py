@@ -1,5 +1,6 @@
 from django import template
 from django.core.paginator import Page
+from core.pagination import KeysetPage
 
 register = template.Library()
 
@@ -12,7 +13,17 @@ def smart_pagination(page_obj, target_id="#content", pages_around=2):
         {% load pagination_tags %}
         {% smart_pagination page_obj "#tabla-usuarios" %}
         {% smart_pagination page_obj "#products-list" 3 %}
+
+    Con paginación keyset (`KeysetPage`) solo se muestran anterior/siguiente.
     """
+    if isinstance(page_obj, KeysetPage):
+        return {
+            'show_pagination': True,
+            'keyset': True,
+            'page_obj': page_obj,
+            'target_id': target_id,
+        }
+
     if not isinstance(page_obj, Page):
         return {'show_pagination': False}
     
@@ -38,4 +49,5 @@ def smart_pagination(page_obj, target_id="#content", pages_around=2):
         'show_last': page_range_end < paginator.num_pages,
         'show_first_ellipsis': page_range_start > 2,
         'show_last_ellipsis': page_range_end < paginator.num_pages - 1,
+        'count_is_approximate': getattr(paginator, 'count_is_approximate', False),
     }
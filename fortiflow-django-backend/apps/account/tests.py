@@ -1,3 +1,116 @@
-from django.test import TestCase
+from django.contrib.auth.models import AnonymousUser, Group
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
 
-# Create your tests here.
+from apps.account.models import CustomUser, Tenant
+from core.identity import get_identity, identity_key
+from core.middleware import IdentityMiddleware
+
+
+class IdentityCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="Tenant A")
+        cls.group = Group.objects.create(name="Supervisor")
+        cls.user = CustomUser.objects.create_user(username="agente", password="x", tenant=cls.tenant)
+        cls.user.groups.add(cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_identity_reads_no_rows(self):
+        get_identity(self.user.pk)
+        with self.assertNumQueries(0):
+            identity = get_identity(self.user.pk)
+        self.assertEqual(identity.roles, {"Supervisor"})
+        self.assertEqual(identity.tenant.name, "Tenant A")
+
+    def assertForgotten(self, change):
+        get_identity(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertIsNone(cache.get(identity_key(self.user.pk)))
+        return get_identity(self.user.pk)
+
+    def test_user_save_forgets_identity(self):
+        def change():
+            self.user.tenant = Tenant.objects.create(name="Tenant B")
+            self.user.save()
+        self.assertEqual(self.assertForgotten(change).tenant.name, "Tenant B")
+
+    def test_membership_change_forgets_identity(self):
+        other = Group.objects.create(name="Agente")
+        identity = self.assertForgotten(lambda: self.user.groups.add(other))
+        self.assertEqual(identity.roles, {"Supervisor", "Agente"})
+
+    def test_reverse_membership_change_forgets_identity(self):
+        identity = self.assertForgotten(lambda: self.group.user_set.remove(self.user))
+        self.assertEqual(identity.roles, frozenset())
+
+    def test_group_rename_and_delete_forget_identity(self):
+        def rename():
+            self.group.name = "Coordinador"
+            self.group.save()
+        self.assertEqual(self.assertForgotten(rename).roles, {"Coordinador"})
+        self.assertEqual(self.assertForgotten(self.group.delete).roles, frozenset())
+
+    def test_tenant_save_forgets_identity(self):
+        def rename():
+            self.tenant.name = "Tenant renombrado"
+            self.tenant.save()
+        self.assertEqual(self.assertForgotten(rename).tenant.name, "Tenant renombrado")
+
+    def test_rolled_back_change_keeps_identity(self):
+        get_identity(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.user.groups.clear()
+        self.assertTrue(callbacks)
+        self.assertIsNotNone(cache.get(identity_key(self.user.pk)))
+
+
+class IdentityMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="Tenant A")
+        cls.group = Group.objects.create(name="Agente")
+        cls.user = CustomUser.objects.create_user(username="agente", password="x", tenant=cls.tenant)
+        cls.user.groups.add(cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.middleware = IdentityMiddleware(lambda request: HttpResponse())
+
+    def process(self):
+        # Como AuthenticationMiddleware: un usuario recién leído, sin roles.
+        request = RequestFactory().get('/')
+        request.user = CustomUser.objects.get(pk=self.user.pk)
+        self.middleware(request)
+        return request
+
+    def test_roles_and_tenant_resolve_without_queries(self):
+        self.process()
+        request = RequestFactory().get('/')
+        request.user = CustomUser.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.middleware(request)
+            self.assertEqual(request.roles, {"Agente"})
+            self.assertEqual(request.tenant_id, self.tenant.pk)
+            self.assertEqual(request.user.tenant.name, "Tenant A")
+
+    def test_group_change_is_picked_up(self):
+        self.assertEqual(self.process().roles, {"Agente"})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(Group.objects.create(name="Supervisor"))
+        self.assertEqual(self.process().roles, {"Agente", "Supervisor"})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.remove(self.group)
+        self.assertEqual(self.process().roles, {"Supervisor"})
+
+    def test_anonymous_user_has_no_roles(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        with self.assertNumQueries(0):
+            self.middleware(request)
+        self.assertEqual(request.roles, frozenset())
+        self.assertIsNone(request.tenant_id)
@@ -5,6 +5,7 @@ from apps.account.views import (
     UserCreateView,
     UserEditView,
     UserDeleteView,
+    UserAutocompleteView,
 )
 from django.contrib.auth.views import LogoutView
 
@@ -13,6 +14,7 @@ urlpatterns = [
     path("login/", CustomLoginView.as_view(), name="custom-login"),
     path("logout/", LogoutView.as_view(next_page="custom-login"), name="logout"),
     path("users/", UserListView.as_view(), name="user-list"),
+    path("users/autocomplete/", UserAutocompleteView.as_view(), name="user-autocomplete"),
     path("create/", UserCreateView.as_view(), name="user-create"),
     path("edit/<int:pk>/", UserEditView.as_view(), name="user-edit"),
     path("delete/<int:pk>/", UserDeleteView.as_view(), name="user-delete"),
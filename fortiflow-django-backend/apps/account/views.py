@@ -8,6 +8,8 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import HttpResponse
 from django.urls import reverse_lazy
 from core.mixins import SmartPaginationMixin
+from core.permissions import TENANT_ADMIN_ROLES
+from core.views import AutocompleteView
 from apps.account.forms import CustomLoginForm, CustomUserCreationForm, CustomUserEditForm
 from apps.account.models import CustomUser
 
@@ -56,14 +58,16 @@ class UserListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
     model = CustomUser
     context_object_name = "users"
     paginate_by = 10
+    count_cache_per_user = True
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        # La tabla lista los grupos de cada usuario.
+        queryset = super().get_queryset().prefetch_related('groups')
         user = self.request.user
         if user.is_superuser:
             return queryset
-        if user.groups.filter(name__in=['Admin', 'Supervisor']).exists() and hasattr(user, 'tenant'):
-            return queryset.filter(tenant=user.tenant)
+        if not self.request.roles.isdisjoint(TENANT_ADMIN_ROLES):
+            return queryset.filter(tenant_id=self.request.tenant_id)
         return queryset.filter(pk=user.pk)
 
     def get_template_names(self):
@@ -103,4 +107,16 @@ class UserDeleteView(LoginRequiredMixin, View):
     def dispatch(self, request, *args, **kwargs):
         if request.method.lower() != 'delete':
             return HttpResponseNotAllowed(['DELETE'])
-        return super().dispatch(request, *args, **kwargs)
\ No newline at end of file
+        return super().dispatch(request, *args, **kwargs)
+
+
+class UserAutocompleteView(AutocompleteView):
+    """Usuarios del tenant por prefijo de username (índice `_like` del campo único)."""
+
+    def get_queryset(self, query):
+        users = CustomUser.objects.only('username').order_by('username')
+        if not self.request.user.is_superuser:
+            users = users.filter(tenant_id=self.request.tenant_id)
+        if query:
+            users = users.filter(username__startswith=query)
+        return users
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ClientConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.client'
+
+    def ready(self):
+        from core.cache import track_model_writes
+        from core.fragments import track_row_versions
+        track_model_writes(self.get_model('Client'), self.get_model('Contract'))
+        track_row_versions(self.get_model('Client'), self.get_model('Contract'))
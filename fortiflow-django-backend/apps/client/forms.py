@@ -40,8 +40,8 @@ class CreateClientForm(forms.ModelForm):
 
     def clean_name(self):
         name = self.cleaned_data['name']
-        tenant = self.request.user.tenant if hasattr(self.request.user, 'tenant') else None
-        if tenant and Client.objects.filter(name=name, tenant=tenant).exclude(pk=self.instance.pk).exists():
+        tenant_id = self.request.tenant_id
+        if tenant_id and Client.objects.filter(name=name, tenant_id=tenant_id).exclude(pk=self.instance.pk).exists():
             raise forms.ValidationError("Ya existe un cliente con este nombre en su organización.")
             
         return name
@@ -54,7 +54,7 @@ class CreateClientForm(forms.ModelForm):
     
     def save(self, commit=True):
         client = super().save(commit=False)
-        client.tenant = self.request.user.tenant
+        client.tenant_id = self.request.tenant_id
 
         logo = self.cleaned_data.get('logo')
         
@@ -1,11 +1,28 @@
 from django.db import models
 from apps.account.models import Tenant
+from core.managers import SoftDeleteManager, SoftDeleteMixin
 
 
-class Client(models.Model):
+class Client(SoftDeleteMixin, models.Model):
     name = models.CharField(max_length=255)
     logo = models.ImageField(upload_to="client_logo/", null=True, blank=True)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="clients")
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
+
+    soft_delete_dependents = (
+        ('client.Contract', 'client'),
+        ('portfolio.Portfolio', 'contract__client'),
+    )
+    purge_plan = (
+        ('portfolio.PortfolioStats', 'portfolio__contract__client'),
+        ('portfolio.Obligation', 'portfolio__contract__client'),
+        ('portfolio.ObligationImport', 'portfolio__contract__client'),
+        ('portfolio.Portfolio', 'contract__client'),
+        ('client.Contract', 'client'),
+    )
 
     class Meta:
         unique_together = ('name', 'tenant')
@@ -15,10 +32,24 @@ class Client(models.Model):
         return self.name
 
 
-class Contract(models.Model):
+class Contract(SoftDeleteMixin, models.Model):
     client = models.ForeignKey(Client, on_delete=models.CASCADE)
     start_date = models.DateField()
     end_date = models.DateField(null=True, blank=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
+
+    soft_delete_dependents = (
+        ('portfolio.Portfolio', 'contract'),
+    )
+    purge_plan = (
+        ('portfolio.PortfolioStats', 'portfolio__contract'),
+        ('portfolio.Obligation', 'portfolio__contract'),
+        ('portfolio.ObligationImport', 'portfolio__contract'),
+        ('portfolio.Portfolio', 'contract'),
+    )
 
     def __str__(self):
         return f"{self.client.name} - {self.start_date} - {self.end_date}"
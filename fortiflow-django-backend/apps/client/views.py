@@ -5,6 +5,7 @@ from django.views.generic.edit import View
 from django.http import HttpResponse
 from django.urls import reverse_lazy
 from core.mixins import SmartPaginationMixin
+from core.permissions import TENANT_ADMIN_ROLES
 from apps.client.models import Client, Contract
 from apps.client.forms import CreateClientForm, CreateContractForm
 
@@ -12,14 +13,15 @@ class ClientListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
     model = Client
     context_object_name = "clients"
     paginate_by = 10
+    count_cache_per_user = True
 
     def get_queryset(self):
         queryset = super().get_queryset()
         user = self.request.user
         if user.is_superuser:
             return queryset
-        if user.groups.filter(name__in=['Admin', 'Supervisor']).exists() and hasattr(user, 'tenant'):
-            return queryset.filter(tenant=user.tenant)
+        if not self.request.roles.isdisjoint(TENANT_ADMIN_ROLES):
+            return queryset.filter(tenant_id=self.request.tenant_id)
         return queryset.filter(pk=user.pk)
 
     def get_template_names(self):
@@ -83,7 +85,8 @@ class ClientDeleteView(LoginRequiredMixin, View):
                 os.remove(client.logo.path)
             except:
                 pass
-            client.delete()
+            # Se oculta ya; contratos, portafolios y obligaciones se purgan por lotes.
+            client.soft_delete(user=request.user)
             return HttpResponse(status=204, headers={'HX-Trigger': 'clientDeleted'})
         except Client.DoesNotExist:
             return HttpResponse(status=404)
@@ -160,7 +163,7 @@ class ContractDeleteView(LoginRequiredMixin, View):
     def delete(self, request, pk, *args, **kwargs):
         try:
             contract = Contract.objects.get(pk=pk)
-            contract.delete()
+            contract.soft_delete(user=request.user)
             return HttpResponse(status=204, headers={'HX-Trigger': 'contractDeleted'})
         except Contract.DoesNotExist:
             return HttpResponse(status=404)
@@ -1,9 +1,31 @@
 from django.shortcuts import render
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Sum
 from django.urls import reverse_lazy
+from apps.portfolio.models import PortfolioStats
 
 class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = "dashboard/index.html"
     login_url = reverse_lazy("custom-login")
     redirect_field_name = "next"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        stats = PortfolioStats.objects.all()
+        if not self.request.user.is_superuser:
+            stats = stats.filter(portfolio__tenant_id=self.request.user.tenant_id)
+        summary = stats.aggregate(
+            obligations=Sum('obligations_count', default=0),
+            debtors=Sum('debtors_count', default=0),
+            amount=Sum('amount_total', default=0),
+            balance=Sum('balance_total', default=0),
+            overdue_amount=Sum('overdue_amount', default=0),
+            overdue_balance=Sum('overdue_balance', default=0),
+        )
+        summary['delinquency_percentage'] = (
+            round((summary['overdue_amount'] / summary['amount']) * 100, 2)
+            if summary['amount'] else 0
+        )
+        context['summary'] = summary
+        return context
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.jobs'
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+        # Registra las tareas declaradas en el tasks.py de cada app.
+        autodiscover_modules('tasks')
@@ -0,0 +1,53 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.jobs.registry import get_task
+from apps.jobs.scheduler import get_schedule
+from apps.jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta los jobs en segundo plano (importaciones, purgas, recálculos) y encola "
+        "las tareas periódicas de JOBS_SCHEDULE. Se pueden levantar varios workers a la vez; "
+        "SIGTERM o Ctrl+C lo detienen después de terminar los jobs en curso."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=None,
+            help="Jobs simultáneos. Por defecto JOBS_WORKER_CONCURRENCY.",
+        )
+        parser.add_argument(
+            '--processes', action='store_true',
+            help="Ejecutar los jobs en un pool de procesos en lugar de hilos.",
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Segundos entre consultas a la cola.")
+        parser.add_argument('--burst', action='store_true', help="Terminar cuando la cola quede vacía.")
+        parser.add_argument('--no-scheduler', action='store_true', help="No encolar las tareas periódicas.")
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency'] or getattr(settings, 'JOBS_WORKER_CONCURRENCY', 4)
+        if concurrency < 1:
+            raise CommandError("--concurrency debe ser al menos 1.")
+        if not options['no_scheduler']:
+            try:
+                for entry in get_schedule():
+                    get_task(entry['task'])
+            except (KeyError, LookupError) as exc:
+                raise CommandError(f"JOBS_SCHEDULE no es válido: {exc}")
+
+        worker = Worker(
+            concurrency=concurrency,
+            processes=options['processes'],
+            poll_interval=options['poll_interval'],
+            burst=options['burst'],
+            schedule=not options['no_scheduler'],
+        )
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        self.stdout.write(f"Worker {worker.name} con {concurrency} {'procesos' if options['processes'] else 'hilos'}.")
+        worker.run()
+        self.stdout.write(self.style.SUCCESS("Worker detenido."))
@@ -0,0 +1,77 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.account.models import CustomUser, Tenant
+from core.managers import TenantQuerySet
+
+
+class Job(models.Model):
+    """
+    Tarea en segundo plano. `enqueue` (apps/jobs/queue.py) la crea en la
+    transacción de quien la pide y `manage.py runworker` la ejecuta.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_RUNNING, 'En proceso'),
+        (STATUS_SUCCEEDED, 'Finalizada'),
+        (STATUS_FAILED, 'Fallida'),
+    )
+
+    task = models.CharField(max_length=100)
+    label = models.CharField(max_length=255, blank=True)
+    args = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    priority = models.IntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # {'done', 'total', 'message'}, según lo informe la tarea con report_progress.
+    progress = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    last_error = models.TextField(blank=True)
+    # Evita encolar dos veces la misma ejecución programada.
+    unique_key = models.CharField(max_length=255, null=True, blank=True, unique=True)
+    worker = models.CharField(max_length=255, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, null=True, blank=True, db_index=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = TenantQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Cola de runworker: solo las pendientes, en el orden en que se toman.
+            models.Index(
+                F('priority').desc(), F('run_at'), F('id'),
+                condition=Q(status='pending'), name='job_pending',
+            ),
+            models.Index(fields=['heartbeat_at'], condition=Q(status='running'), name='job_running'),
+            models.Index(fields=['tenant', '-id'], name='job_tenant_recent'),
+            models.Index(fields=['finished_at'], name='job_finished'),
+        ]
+
+    def __str__(self):
+        return f"{self.label or self.task} ({self.get_status_display()})"
+
+    @property
+    def is_done(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+    @property
+    def progress_percentage(self):
+        if self.status == self.STATUS_SUCCEEDED:
+            return 100
+        done, total = self.progress.get('done'), self.progress.get('total')
+        if not done or not total:
+            return 0
+        return min(int(done * 100 / total), 99)
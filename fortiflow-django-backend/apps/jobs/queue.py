@@ -0,0 +1,157 @@
+"""
+Cola de jobs sobre la tabla `jobs_job`, sin broker externo.
+
+- `enqueue` inserta el job en la transacción de quien lo pide: si esa
+  transacción se revierte el job no existe, y ningún worker lo ve antes del
+  commit.
+- `claim_jobs` toma los pendientes con `SELECT ... FOR UPDATE SKIP LOCKED`,
+  de modo que varios workers consultando a la vez nunca reciben el mismo job
+  ni se esperan entre sí, y los marca `running` en la misma transacción.
+- `run_job` ejecuta la tarea y guarda el resultado o el error. Un fallo se
+  reintenta con espera exponencial (`Task.backoff`) hasta `max_attempts`.
+- `requeue_stale` devuelve a la cola los jobs de un worker que dejó de
+  latir durante `JOBS_STALE_SECONDS` (proceso muerto, máquina reiniciada).
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.jobs.models import Job
+from apps.jobs.registry import get_task, set_current_job
+
+logger = logging.getLogger(__name__)
+
+STALE_ERROR = "El worker dejó de responder mientras ejecutaba el job."
+
+
+def stale_seconds():
+    return getattr(settings, 'JOBS_STALE_SECONDS', 300)
+
+
+def enqueue(name, args=(), kwargs=None, run_at=None, priority=0, label='', user=None, tenant_id=None):
+    """
+    Encola la tarea `name` con `args` y `kwargs` (serializables como JSON).
+    Si no se indica `tenant_id` se usa el de `user`, para que el job lo vean
+    los usuarios de ese tenant.
+    """
+    task = get_task(name)
+    if user is not None and not user.is_authenticated:
+        user = None
+    if tenant_id is None and user is not None:
+        tenant_id = user.tenant_id
+    return Job.objects.create(
+        task=name,
+        label=label,
+        args=list(args),
+        kwargs=kwargs or {},
+        run_at=run_at or timezone.now(),
+        priority=priority,
+        max_attempts=task.max_attempts,
+        created_by_id=user.pk if user is not None else None,
+        tenant_id=tenant_id,
+    )
+
+
+def claim_jobs(worker, limit, now=None):
+    """Marca como `running` para `worker` hasta `limit` jobs vencidos. Devuelve sus ids."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects
+            .filter(status=Job.STATUS_PENDING, run_at__lte=now)
+            .order_by('-priority', 'run_at', 'id')
+            .select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)[:limit]
+        )
+        if ids:
+            Job.objects.filter(pk__in=ids).update(
+                status=Job.STATUS_RUNNING,
+                worker=worker,
+                attempts=F('attempts') + 1,
+                started_at=now,
+                heartbeat_at=now,
+            )
+    return ids
+
+
+def heartbeat(job_ids, now=None):
+    if job_ids:
+        Job.objects.filter(pk__in=job_ids, status=Job.STATUS_RUNNING).update(heartbeat_at=now or timezone.now())
+
+
+def _json_result(result):
+    try:
+        json.dumps(result, cls=DjangoJSONEncoder)
+    except (TypeError, ValueError):
+        return repr(result)
+    return result
+
+
+def _finish(job, result):
+    Job.objects.filter(pk=job.pk, status=Job.STATUS_RUNNING).update(
+        status=Job.STATUS_SUCCEEDED,
+        result=_json_result(result),
+        finished_at=timezone.now(),
+        heartbeat_at=None,
+    )
+
+
+def _fail(job, error, retry_delay=None):
+    now = timezone.now()
+    running = Job.objects.filter(pk=job.pk, status=Job.STATUS_RUNNING)
+    if retry_delay is not None and job.attempts < job.max_attempts:
+        running.update(
+            status=Job.STATUS_PENDING,
+            run_at=now + timedelta(seconds=retry_delay),
+            last_error=error,
+            worker='',
+            heartbeat_at=None,
+        )
+    else:
+        running.update(status=Job.STATUS_FAILED, last_error=error, finished_at=now, heartbeat_at=None)
+
+
+def run_job(job_id):
+    """Ejecuta el job `job_id`, ya tomado con `claim_jobs`, y registra cómo terminó."""
+    job = Job.objects.get(pk=job_id)
+    try:
+        task = get_task(job.task)
+    except LookupError as exc:
+        _fail(job, str(exc))
+        return
+    set_current_job(job.pk)
+    try:
+        result = task.func(*job.args, **job.kwargs)
+    except Exception:
+        logger.exception("Falló el job %s (%s), intento %s de %s", job.pk, job.task, job.attempts, job.max_attempts)
+        _fail(job, traceback.format_exc(), retry_delay=task.retry_delay(job.attempts))
+    else:
+        _finish(job, result)
+    finally:
+        set_current_job(None)
+
+
+def requeue_stale(now=None):
+    """Libera los jobs `running` sin latido reciente. Devuelve cuántos."""
+    now = now or timezone.now()
+    stale = Job.objects.filter(
+        status=Job.STATUS_RUNNING,
+        heartbeat_at__lt=now - timedelta(seconds=stale_seconds()),
+    )
+    with transaction.atomic():
+        requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+            status=Job.STATUS_PENDING, run_at=now, last_error=STALE_ERROR, worker='', heartbeat_at=None,
+        )
+        failed = stale.update(
+            status=Job.STATUS_FAILED, last_error=STALE_ERROR, finished_at=now, heartbeat_at=None,
+        )
+    if requeued or failed:
+        logger.warning("Jobs sin latido: %s reencolados, %s fallidos", requeued, failed)
+    return requeued + failed
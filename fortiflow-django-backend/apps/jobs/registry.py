@@ -0,0 +1,70 @@
+"""
+Registro de las tareas que puede ejecutar `manage.py runworker`.
+
+Cada app declara las suyas en `tasks.py` con el decorador `task`; el módulo
+se importa al iniciar Django (`JobsConfig.ready`). Los argumentos de una
+tarea se guardan como JSON, así que deben ser valores simples (ids, fechas
+en ISO, etiquetas de modelo), nunca instancias.
+"""
+import threading
+
+from django.utils import timezone
+
+_tasks = {}
+_current = threading.local()
+
+
+class Task:
+    def __init__(self, name, func, max_attempts, backoff):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+        # Segundos antes del primer reintento; se duplica en cada uno.
+        self.backoff = backoff
+
+    def retry_delay(self, attempts):
+        return self.backoff * 2 ** max(attempts - 1, 0)
+
+
+def task(name, max_attempts=3, backoff=30):
+    """Registra la función decorada como la tarea `name`."""
+    def decorator(func):
+        _tasks[name] = Task(name, func, max_attempts, backoff)
+        return func
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise LookupError(f"No hay ninguna tarea registrada con el nombre '{name}'.")
+
+
+def registered_tasks():
+    return sorted(_tasks)
+
+
+def current_job_id():
+    """Id del `Job` que se está ejecutando en este hilo, o None."""
+    return getattr(_current, 'job_id', None)
+
+
+def set_current_job(job_id):
+    _current.job_id = job_id
+
+
+def report_progress(done=None, total=None, message=''):
+    """
+    Guarda el avance del job en curso; fuera de runworker no hace nada.
+    Admite la firma (hechos, total) de los callbacks `progress` del proyecto.
+    """
+    from apps.jobs.models import Job
+
+    job_id = current_job_id()
+    if job_id is None:
+        return
+    Job.objects.filter(pk=job_id).update(
+        progress={'done': done, 'total': total, 'message': message},
+        heartbeat_at=timezone.now(),
+    )
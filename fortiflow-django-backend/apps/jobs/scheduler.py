@@ -0,0 +1,61 @@
+"""
+Ejecuciones periódicas declaradas en `JOBS_SCHEDULE`.
+
+Cada entrada es un dict con `task` y una de:
+- `at`: 'HH:MM', una vez al día a esa hora local (TIME_ZONE);
+- `every`: cada tantos segundos;
+y opcionalmente `args`, `kwargs`, `priority` y `label`.
+
+Los workers con el planificador activo llaman a `enqueue_due` cada
+`JOBS_SCHEDULER_INTERVAL` segundos. Cada ocurrencia se encola con
+`unique_key` 'schedule:<tarea>:<ocurrencia>' e `INSERT ... ON CONFLICT DO
+NOTHING`, así que aunque haya varios workers se ejecuta una sola vez. Se
+encola la última ocurrencia vencida: si no había workers a la hora indicada,
+la tarea corre en cuanto arranque uno.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.jobs.models import Job
+from apps.jobs.registry import get_task
+
+
+def get_schedule():
+    return getattr(settings, 'JOBS_SCHEDULE', [])
+
+
+def last_occurrence(entry, now):
+    """Última ocurrencia de `entry` anterior o igual a `now`."""
+    if 'every' in entry:
+        every = int(entry['every'])
+        return datetime.fromtimestamp(int(now.timestamp()) // every * every, tz=dt_timezone.utc)
+    hour, minute = (int(part) for part in entry['at'].split(':'))
+    local = timezone.localtime(now)
+    occurrence = local.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if occurrence > local:
+        occurrence -= timedelta(days=1)
+    return occurrence
+
+
+def enqueue_due(now=None, schedule=None):
+    """Encola las ocurrencias vencidas de `schedule` que aún no estén en la tabla."""
+    now = now or timezone.now()
+    schedule = get_schedule() if schedule is None else schedule
+    jobs = []
+    for entry in schedule:
+        task = get_task(entry['task'])
+        occurrence = last_occurrence(entry, now)
+        jobs.append(Job(
+            task=task.name,
+            label=entry.get('label', ''),
+            args=list(entry.get('args', ())),
+            kwargs=entry.get('kwargs', {}),
+            priority=entry.get('priority', 0),
+            run_at=occurrence,
+            max_attempts=task.max_attempts,
+            unique_key=f"schedule:{task.name}:{occurrence.isoformat()}",
+        ))
+    if jobs:
+        Job.objects.bulk_create(jobs, ignore_conflicts=True)
@@ -0,0 +1,69 @@
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+
+from apps.jobs.models import Job
+from apps.jobs.registry import report_progress, task
+
+
+@task('core.purge', max_attempts=5, backoff=60)
+def purge_deleted(label, pk):
+    """Purga por lotes el objeto `pk` del modelo `label` marcado con `soft_delete()`."""
+    from core.purge import purge
+
+    def progress(state):
+        report_progress(sum(state['deleted'].values()), message=state['step'])
+
+    return purge(apps.get_model(label), pk, progress=progress)
+
+
+@task('core.prune_row_versions')
+def prune_row_versions():
+    """
+    Borra por lotes las versiones de fila (core.fragments) que no cambian
+    desde hace más de `FRAGMENT_CACHE_TIMEOUT`: ya no queda fragmento que
+    dependa de ellas, y la próxima lectura crea una nueva.
+    """
+    from core.fragments import ROW_VERSION_PREFIX, fragment_timeout
+    from core.purge import delete_batch
+
+    CacheVersion = apps.get_model('account', 'CacheVersion')
+    timeout = fragment_timeout()
+    if timeout is None:
+        # Los fragmentos no expiran: cualquier versión puede seguir en uso.
+        return 0
+    stale = CacheVersion.objects.filter(
+        key__startswith=ROW_VERSION_PREFIX,
+        value__lt=time.time_ns() - timeout * 10**9,
+    )
+    batch_size = getattr(settings, 'PURGE_BATCH_SIZE', 5000)
+    deleted = 0
+    while True:
+        count = delete_batch(stale, batch_size)
+        deleted += count
+        if count < batch_size:
+            return deleted
+        report_progress(deleted)
+
+
+@task('jobs.prune')
+def prune_jobs(days=None):
+    """Borra por lotes los jobs terminados hace más de `JOBS_RETENTION_DAYS` días."""
+    from core.purge import delete_batch
+
+    days = days if days is not None else getattr(settings, 'JOBS_RETENTION_DAYS', 30)
+    finished = Job.objects.filter(
+        status__in=(Job.STATUS_SUCCEEDED, Job.STATUS_FAILED),
+        finished_at__lt=timezone.now() - timedelta(days=days),
+    )
+    batch_size = getattr(settings, 'PURGE_BATCH_SIZE', 5000)
+    deleted = 0
+    while True:
+        count = delete_batch(finished, batch_size)
+        deleted += count
+        if count < batch_size:
+            return deleted
+        report_progress(deleted)
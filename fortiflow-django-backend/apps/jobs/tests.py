@@ -0,0 +1,161 @@
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.account.models import CustomUser, Tenant
+from apps.jobs import scheduler
+from apps.jobs.models import Job
+from apps.jobs.queue import claim_jobs, enqueue, requeue_stale, run_job
+from apps.jobs.registry import report_progress, task
+from apps.portfolio.tests import seed_portfolios
+
+# Un runworker aparte, contra la base de pruebas.
+WORKER_SCRIPT = """
+import sys
+import django
+from django.conf import settings
+settings.DATABASES['default']['NAME'] = sys.argv[1]
+django.setup()
+from django.core.management import call_command
+call_command('runworker', burst=True, no_scheduler=True, concurrency=1, poll_interval=0.1)
+"""
+
+
+@task('tests.add')
+def add(a, b=0):
+    report_progress(1, 1, 'sumando')
+    return a + b
+
+
+@task('tests.fail', max_attempts=2, backoff=10)
+def fail():
+    raise ValueError("fallo de prueba")
+
+
+class JobQueueTests(TestCase):
+    def run_pending(self):
+        for job_id in claim_jobs('tests', 10):
+            run_job(job_id)
+
+    def test_runs_job_and_records_result_and_progress(self):
+        job = enqueue('tests.add', [1], {'b': 2})
+        self.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertEqual(job.result, 3)
+        self.assertEqual(job.progress, {'done': 1, 'total': 1, 'message': 'sumando'})
+        self.assertEqual(job.attempts, 1)
+
+    def test_retries_with_backoff_until_max_attempts(self):
+        job = enqueue('tests.fail')
+        self.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_PENDING)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+        self.assertIn("fallo de prueba", job.last_error)
+
+        # Antes de que venza la espera nadie lo toma.
+        self.assertEqual(claim_jobs('tests', 10), [])
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_claims_by_priority_and_only_once(self):
+        low = enqueue('tests.add', [1])
+        high = enqueue('tests.add', [2], priority=10)
+        self.assertEqual(claim_jobs('a', 1), [high.pk])
+        self.assertEqual(claim_jobs('b', 5), [low.pk])
+        self.assertEqual(claim_jobs('c', 5), [])
+
+    def test_requeues_jobs_without_heartbeat(self):
+        job = enqueue('tests.add', [1])
+        claim_jobs('tests', 1)
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_PENDING)
+        self.assertEqual(job.worker, '')
+
+    def test_unknown_task_cannot_be_enqueued(self):
+        with self.assertRaises(LookupError):
+            enqueue('tests.missing')
+
+
+class JobSchedulerTests(TestCase):
+    def test_daily_occurrence_is_enqueued_once(self):
+        schedule = [{'task': 'tests.add', 'at': '00:05', 'args': [1]}]
+        now = timezone.now()
+        scheduler.enqueue_due(now, schedule)
+        scheduler.enqueue_due(now + timedelta(minutes=1), schedule)
+        job = Job.objects.get()
+        self.assertTrue(job.unique_key.startswith('schedule:tests.add:'))
+        self.assertLessEqual(job.run_at, now)
+        self.assertGreater(job.run_at, now - timedelta(days=1))
+
+    def test_interval_occurrence(self):
+        now = datetime(2025, 6, 1, 10, 59, 30, tzinfo=dt_timezone.utc)
+        occurrence = scheduler.last_occurrence({'task': 'tests.add', 'every': 3600}, now)
+        self.assertEqual(occurrence, datetime(2025, 6, 1, 10, 0, tzinfo=dt_timezone.utc))
+
+
+class JobStatusViewTests(TestCase):
+    def setUp(self):
+        self.tenant, other = Tenant.objects.create(name="Tenant"), Tenant.objects.create(name="Otro")
+        self.user = CustomUser.objects.create_user(username='jobs', password='x', tenant=self.tenant)
+        self.other_job = enqueue('tests.add', [1], tenant_id=other.pk)
+        self.client.force_login(self.user)
+
+    def test_polls_until_done(self):
+        job = enqueue('tests.add', [1], user=self.user)
+        self.assertEqual(job.tenant_id, self.tenant.pk)
+        response = self.client.get(reverse('job-status', args=[job.pk]), HTTP_HX_REQUEST='true')
+        self.assertContains(response, 'hx-trigger="every 2s"')
+
+        claim_jobs('tests', 10)
+        run_job(job.pk)
+        response = self.client.get(reverse('job-status', args=[job.pk]), HTTP_HX_REQUEST='true')
+        self.assertNotContains(response, 'hx-trigger')
+        self.assertEqual(response['HX-Trigger'], 'reload-table')
+
+    def test_other_tenant_jobs_are_hidden(self):
+        response = self.client.get(reverse('job-status', args=[self.other_job.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Requiere PostgreSQL")
+class WorkerInvalidationTests(TransactionTestCase):
+    def setUp(self):
+        tenants, self.portfolios, _ = seed_portfolios(portfolios=1, debtors=5, obligations_per_debtor=2)
+        self.client.force_login(CustomUser.objects.create_user('worker', tenant=tenants[0]))
+
+    def get(self, etag=None):
+        headers = {'HX-Request': 'true'}
+        if etag:
+            headers['If-None-Match'] = etag
+        return self.client.get(reverse('obligation-list', args=[self.portfolios[0].pk]), headers=headers)
+
+    def test_job_in_other_process_invalidates_list(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(etag).status_code, 304)
+
+        job = enqueue('portfolio.refresh_days_delinquency', ['2100-01-01'])
+        subprocess.run(
+            [sys.executable, '-c', WORKER_SCRIPT, connection.settings_dict['NAME']],
+            cwd=settings.BASE_DIR, check=True, timeout=120,
+        )
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertGreater(job.result, 0)
+
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
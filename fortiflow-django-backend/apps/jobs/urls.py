@@ -0,0 +1,7 @@
+from django.urls import path
+from apps.jobs.views import JobListView, JobStatusView
+
+urlpatterns = [
+    path("", JobListView.as_view(), name="job-list"),
+    path("<int:pk>/status/", JobStatusView.as_view(), name="job-status"),
+]
@@ -0,0 +1,36 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.views.generic import DetailView, ListView
+
+from apps.jobs.models import Job
+from core.mixins import SmartPaginationMixin
+
+
+class JobListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
+    model = Job
+    context_object_name = 'jobs'
+    paginate_by = 10
+    pagination_mode = 'keyset'
+    keyset_ordering = '-id'
+
+    def get_queryset(self):
+        return Job.objects.for_user(self.request.user).select_related('created_by').order_by('-id')
+
+    def get_template_names(self):
+        if self.request.headers.get("HX-Request"):
+            return ["jobs/partials/job_list.html"]
+        return ["jobs/show.html"]
+
+
+class JobStatusView(LoginRequiredMixin, DetailView):
+    """Estado de un job; el parcial se vuelve a pedir cada 2 s hasta que termina."""
+    context_object_name = 'job'
+    template_name = "jobs/partials/job_status.html"
+
+    def get_queryset(self):
+        return Job.objects.for_user(self.request.user)
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        if self.object.is_done:
+            response['HX-Trigger'] = 'reload-table'
+        return response
@@ -0,0 +1,109 @@
+"""
+Bucle de `manage.py runworker`.
+
+El hilo principal toma jobs (`claim_jobs`) solo cuando hay lugar libre en el
+pool, marca el latido de los que están en curso, encola las ejecuciones
+programadas y reencola los jobs de workers caídos. Los jobs corren en un
+pool de hilos o, con `processes=True`, de procesos (para tareas que usan la
+CPU en Python); cada proceso del pool inicializa Django por su cuenta.
+"""
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import django
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.jobs import queue, scheduler
+
+logger = logging.getLogger(__name__)
+
+
+def execute(job_id):
+    """Corre en el hilo o proceso del pool, con sus propias conexiones."""
+    close_old_connections()
+    try:
+        queue.run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Worker:
+    def __init__(self, concurrency=4, processes=False, poll_interval=1.0, burst=False, schedule=True):
+        self.concurrency = concurrency
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.schedule = schedule
+        self.name = worker_name()
+        self.running = {}
+        self.stopping = False
+        self._maintenance_at = 0
+
+    def stop(self, *args):
+        self.stopping = True
+
+    def executor(self):
+        if self.processes:
+            return ProcessPoolExecutor(
+                self.concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        return ThreadPoolExecutor(self.concurrency, thread_name_prefix='job')
+
+    def maintenance(self, now):
+        interval = getattr(settings, 'JOBS_SCHEDULER_INTERVAL', 30)
+        if time.monotonic() - self._maintenance_at < interval:
+            return
+        self._maintenance_at = time.monotonic()
+        if self.schedule:
+            scheduler.enqueue_due(now)
+        queue.requeue_stale(now)
+
+    def collect(self):
+        for future in [future for future in self.running if future.done()]:
+            job_id = self.running.pop(future)
+            exc = future.exception()
+            if exc is not None:
+                # run_job registra los errores de la tarea; esto es el pool.
+                logger.error("El pool no pudo ejecutar el job %s: %r", job_id, exc)
+
+    def run(self):
+        logger.info("Worker %s iniciado (%s %s)", self.name, self.concurrency, 'procesos' if self.processes else 'hilos')
+        with self.executor() as pool:
+            while not self.stopping:
+                close_old_connections()
+                now = timezone.now()
+                self.maintenance(now)
+                self.collect()
+                queue.heartbeat(list(self.running.values()), now)
+
+                free = self.concurrency - len(self.running)
+                claimed = queue.claim_jobs(self.name, free, now) if free > 0 else []
+                for job_id in claimed:
+                    self.running[pool.submit(execute, job_id)] = job_id
+
+                if self.burst and not claimed and not self.running:
+                    break
+                if not claimed:
+                    if self.running:
+                        wait(list(self.running), timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    else:
+                        time.sleep(self.poll_interval)
+
+            # Al detenerse se dejan terminar los jobs en curso.
+            while self.running:
+                wait(list(self.running), timeout=self.poll_interval)
+                self.collect()
+                queue.heartbeat(list(self.running.values()))
+        logger.info("Worker %s detenido", self.name)
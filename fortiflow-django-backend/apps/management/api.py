@@ -0,0 +1,100 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import status, viewsets
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.management.ingest import advance_assignments, ingest_records
+from apps.management.models import Assignment, Management, Program
+from apps.management.queue import balance_due_expression
+from apps.management.serializers import AssignmentSerializer, ManagementBatchSerializer, ManagementSerializer
+from core.api import BulkWriteMixin, IndexedFilterMixin, TenantScopedViewSetMixin
+from core.cache import bump_generation
+from core.events import table_changed
+from core.pagination import KeysetPagination
+
+
+class AssignmentViewSet(TenantScopedViewSetMixin, IndexedFilterMixin, BulkWriteMixin, viewsets.ModelViewSet):
+    queryset = (
+        Assignment.objects.select_related('program', 'agent', 'debtor')
+        .only(
+            'priority', 'next_management', 'balance_due', 'created_at', 'tenant_id',
+            'program__id', 'program__title', 'agent__id', 'agent__username', 'debtor__id', 'debtor__name',
+        )
+        .order_by('-id')
+    )
+    serializer_class = AssignmentSerializer
+    pagination_class = KeysetPagination
+    filter_fields = {
+        'program': 'program_id',
+        'agent': 'agent_id',
+        'debtor': 'debtor_id',
+    }
+
+    def after_bulk_write(self, objects, created):
+        super().after_bulk_write(objects, created)
+        # Lo que hace la señal set_assignment_balance, en un solo UPDATE.
+        Assignment.objects.filter(pk__in=[obj.pk for obj in objects]).update(
+            balance_due=balance_due_expression()
+        )
+
+
+class ManagementViewSet(TenantScopedViewSetMixin, IndexedFilterMixin, BulkWriteMixin, viewsets.ModelViewSet):
+    """
+    Gestiones. Para resultados del marcador, con deduplicación por
+    `idempotency_key` y búsqueda de la asignación, usar ManagementBatchAPIView.
+    """
+    queryset = (
+        Management.objects
+        .only(
+            'assignment_id', 'action', 'type_contact', 'effect', 'contact', 'phone',
+            'date_enagement', 'commitment', 'observation', 'next_management', 'tenant_id',
+        )
+        .order_by('-id')
+    )
+    serializer_class = ManagementSerializer
+    pagination_class = KeysetPagination
+    filter_fields = {
+        'assignment': 'assignment_id',
+        'date_from': 'date_enagement__gte',
+        'date_to': 'date_enagement__lte',
+        'next_management': 'next_management',
+    }
+
+    def after_bulk_write(self, objects, created):
+        super().after_bulk_write(objects, created)
+        if created:
+            # Lo que hace la señal advance_assignment_queue.
+            advance_assignments(objects)
+            tenant_ids = {obj.tenant_id for obj in objects}
+            bump_generation(Assignment, tenant_ids=tenant_ids)
+            table_changed(Assignment, *tenant_ids)
+
+
+class ManagementBatchAPIView(APIView):
+    """
+    Registra un lote de resultados de llamadas como gestiones.
+
+    Cuerpo: {"program": id opcional, "records": [{...}, ...]}. Responde el
+    resumen del lote con los errores por registro (índice desde 0); los
+    registros válidos se guardan aunque otros fallen.
+    """
+
+    def post(self, request):
+        serializer = ManagementBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        assignments = Assignment.objects.for_user(request.user)
+        program_id = serializer.validated_data.get('program')
+        if program_id:
+            program = get_object_or_404(Program, pk=program_id)
+            assignments = assignments.filter(program=program)
+
+        result = ingest_records(enumerate(serializer.validated_data['records']), assignments)
+        return Response(
+            {
+                'received': result['received'],
+                'created': result['created'],
+                'duplicates': result['duplicates'],
+                'errors': [{'index': index, 'error': message} for index, message in result['errors']],
+            },
+            status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK,
+        )
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class ManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.management'
+
+    def ready(self):
+        from apps.management import signals  # noqa: F401
+        from core.cache import track_model_writes
+        Management = self.get_model('Management')
+        # Las gestiones se borran casi siempre en cascada desde su asignación
+        # o programa; sin receptor propio ese borrado sigue siendo un DELETE.
+        track_model_writes(self.get_model('Program'), self.get_model('Assignment'), dependents=(Management,))
+        track_model_writes(Management, deletes=False)
+        from core.events import track_table_events
+        track_table_events(self.get_model('Assignment'))
+        track_table_events(Management, deletes=False)
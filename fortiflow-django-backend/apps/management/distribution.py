@@ -0,0 +1,176 @@
+"""
+Reparto masivo de deudores entre los agentes de un programa.
+
+Los deudores se toman de las obligaciones de una o varias carteras y se
+reparten en memoria (solo ids y saldos); las asignaciones se insertan con
+`bulk_create` por lotes. Al rebalancear, el trabajo de un agente se mueve a
+los demás con un UPDATE por agente destino.
+"""
+import heapq
+from decimal import Decimal
+from itertools import cycle
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.management.models import Assignment
+from apps.portfolio.models import Obligation
+from core.cache import bump_generation
+from core.events import table_changed
+
+STRATEGY_ROUND_ROBIN = 'round_robin'
+STRATEGY_BALANCE = 'balance'
+STRATEGY_COUNT = 'count'
+
+STRATEGY_CHOICES = [
+    (STRATEGY_ROUND_ROBIN, 'Rotativo (uno a uno)'),
+    (STRATEGY_BALANCE, 'Equilibrar saldo total'),
+    (STRATEGY_COUNT, 'Equilibrar cantidad de deudores'),
+]
+
+BATCH_SIZE = 2000
+
+
+def candidate_debtors(program, portfolios, portfolio_type=None, min_days_delinquency=None):
+    """
+    (debtor_id, saldo) de los deudores con obligaciones en `portfolios` que
+    aún no están asignados en el programa, de mayor a menor saldo.
+    """
+    obligations = Obligation.objects.filter(portfolio__in=portfolios)
+    if portfolio_type:
+        obligations = obligations.filter(portfolio_type=portfolio_type)
+    if min_days_delinquency is not None:
+        obligations = obligations.filter(days_delinquency__gte=min_days_delinquency)
+    return (
+        obligations
+        .exclude(Exists(Assignment.objects.filter(program=program, debtor_id=OuterRef('debtor_id'))))
+        .order_by()
+        .values('debtor_id')
+        .annotate(total=Sum('balance'))
+        .order_by('-total', 'debtor_id')
+        .values_list('debtor_id', 'total')
+    )
+
+
+def agent_loads(program, agent_ids):
+    """{agent_id: (asignaciones, saldo)} actuales de los agentes en el programa."""
+    loads = {agent_id: (0, Decimal(0)) for agent_id in agent_ids}
+    rows = (
+        Assignment.objects
+        .filter(program=program, agent_id__in=agent_ids)
+        .order_by()
+        .values('agent_id')
+        .annotate(count=Count('pk'), balance=Coalesce(Sum('balance_due'), Value(Decimal(0))))
+    )
+    for row in rows:
+        loads[row['agent_id']] = (row['count'], row['balance'])
+    return loads
+
+
+def distribute(items, agent_ids, strategy, loads=None):
+    """
+    Reparte `items` (pares (id, saldo)) entre `agent_ids` y devuelve
+    {agent_id: [id, ...]}.
+
+    - rotativo: uno a cada agente en orden, sin mirar la carga;
+    - cantidad: siempre al agente con menos asignaciones;
+    - saldo: de mayor a menor saldo, siempre al agente con menos saldo
+      acumulado (reparto voraz: la diferencia entre agentes no supera el
+      mayor saldo individual).
+
+    `loads` ({agent_id: (cantidad, saldo)}) es la carga de partida.
+    """
+    if not agent_ids:
+        raise ValueError("Debe indicar al menos un agente.")
+    groups = {agent_id: [] for agent_id in agent_ids}
+    if strategy == STRATEGY_ROUND_ROBIN:
+        for (item_id, _), agent_id in zip(items, cycle(agent_ids)):
+            groups[agent_id].append(item_id)
+        return groups
+    if strategy not in (STRATEGY_BALANCE, STRATEGY_COUNT):
+        raise ValueError(f"Estrategia desconocida: {strategy}")
+
+    loads = loads or {}
+    by_balance = strategy == STRATEGY_BALANCE
+    heap = []
+    for position, agent_id in enumerate(agent_ids):
+        count, balance = loads.get(agent_id, (0, Decimal(0)))
+        # La otra medida desempata: con saldos iguales (o en cero) el saldo
+        # no debe mandar todo al primer agente.
+        heap.append(((balance, count) if by_balance else (count, balance), position, agent_id))
+    heapq.heapify(heap)
+    if by_balance:
+        items = sorted(items, key=lambda item: item[1] or 0, reverse=True)
+    for item_id, balance in items:
+        (first, second), position, agent_id = heap[0]
+        groups[agent_id].append(item_id)
+        if by_balance:
+            key = (first + (balance or 0), second + 1)
+        else:
+            key = (first + 1, second + (balance or 0))
+        heapq.heapreplace(heap, (key, position, agent_id))
+    return groups
+
+
+def bulk_assign(program, agents, portfolios, strategy=STRATEGY_ROUND_ROBIN,
+                portfolio_type=None, min_days_delinquency=None, batch_size=BATCH_SIZE):
+    """
+    Asigna al programa los deudores de `portfolios` que aún no tiene,
+    repartidos entre `agents` según `strategy`. Devuelve {agent_id: creadas}.
+    """
+    agent_ids = [getattr(agent, 'pk', agent) for agent in agents]
+    items = list(candidate_debtors(program, portfolios, portfolio_type, min_days_delinquency))
+    loads = agent_loads(program, agent_ids) if strategy != STRATEGY_ROUND_ROBIN else None
+    groups = distribute(items, agent_ids, strategy, loads)
+    balances = dict(items)
+    tenant_id = Assignment(program=program).resolve_tenant_id()
+
+    with transaction.atomic():
+        Assignment.objects.bulk_create(
+            (
+                Assignment(
+                    program=program, agent_id=agent_id, debtor_id=debtor_id,
+                    tenant_id=tenant_id, balance_due=balances[debtor_id] or 0,
+                )
+                for agent_id, debtor_ids in groups.items()
+                for debtor_id in debtor_ids
+            ),
+            batch_size=batch_size,
+        )
+        # `balance_due` de la cola es el saldo del deudor en todo el tenant,
+        # no solo en las carteras elegidas.
+        from apps.management.queue import refresh_balances
+        refresh_balances(program_ids=[program.pk])
+    bump_generation(Assignment, tenant_ids=[tenant_id])
+    table_changed(Assignment, tenant_id)
+    return {agent_id: len(debtor_ids) for agent_id, debtor_ids in groups.items()}
+
+
+def rebalance(program, from_agent, agents, strategy=STRATEGY_BALANCE, batch_size=BATCH_SIZE):
+    """
+    Mueve las asignaciones de `from_agent` en el programa a `agents` (p. ej.
+    cuando el agente deja la campaña) y libera sus arriendos en la cola.
+    Devuelve {agent_id: movidas}.
+    """
+    from_id = getattr(from_agent, 'pk', from_agent)
+    agent_ids = [getattr(agent, 'pk', agent) for agent in agents if getattr(agent, 'pk', agent) != from_id]
+    items = list(
+        Assignment.objects
+        .filter(program=program, agent_id=from_id)
+        .order_by('-balance_due', 'pk')
+        .values_list('pk', 'balance_due')
+    )
+    loads = agent_loads(program, agent_ids) if strategy != STRATEGY_ROUND_ROBIN else None
+    groups = distribute(items, agent_ids, strategy, loads)
+
+    with transaction.atomic():
+        for agent_id, assignment_ids in groups.items():
+            for start in range(0, len(assignment_ids), batch_size):
+                Assignment.objects.filter(
+                    pk__in=assignment_ids[start:start + batch_size], agent_id=from_id,
+                ).update(agent_id=agent_id, leased_by=None, lease_expires_at=None)
+    tenant_id = Assignment(program=program).resolve_tenant_id()
+    bump_generation(Assignment, tenant_ids=[tenant_id])
+    table_changed(Assignment, tenant_id)
+    return {agent_id: len(assignment_ids) for agent_id, assignment_ids in groups.items()}
@@ -2,7 +2,9 @@
 from django import forms
 from .models import Program, Assignment, Management
 from apps.account.models import CustomUser
-from apps.portfolio.models import Debtor
+from apps.portfolio.models import Debtor, Portfolio, PortfolioType
+from .distribution import STRATEGY_BALANCE, STRATEGY_CHOICES
+from core.widgets import AutocompleteSelect
 
 
 class ManagementForm(forms.ModelForm):
@@ -62,9 +64,9 @@ class ProgramForm(forms.ModelForm):
     supervisor = forms.ModelChoiceField(
         label='Supervisor',
         queryset=None,
-        widget=forms.Select(attrs={
-            'class': 'select select-bordered w-full',
-        }),
+        widget=AutocompleteSelect('user-autocomplete', attrs={
+            'class': 'input input-bordered w-full',
+        }, placeholder='Usuario'),
         error_messages={
             'required': 'El supervisor es obligatorio.',
         }
@@ -102,25 +104,48 @@ class ProgramForm(forms.ModelForm):
         self.request = kwargs.pop('request', None)
         super().__init__(*args, **kwargs)
         from apps.account.models import CustomUser
-        self.fields['supervisor'].queryset = CustomUser.objects.all()
+        users = CustomUser.objects.all()
+        if self.request is not None and not self.request.user.is_superuser:
+            users = users.filter(tenant_id=self.request.user.tenant_id)
+        self.fields['supervisor'].queryset = users
 
 class AssignmentForm(forms.ModelForm):
     class Meta:
         model = Assignment
         fields = ['program', 'agent', 'debtor']
+        widgets = {
+            'program': AutocompleteSelect('program-autocomplete', placeholder='Programa'),
+            'agent': AutocompleteSelect('user-autocomplete', placeholder='Usuario'),
+            'debtor': AutocompleteSelect('debtor-autocomplete', placeholder='Nombre o identificación'),
+        }
 
     def __init__(self, *args, **kwargs):
         program = kwargs.pop('program', None)
+        self.request = kwargs.pop('request', None)
         super().__init__(*args, **kwargs)
+        # Los querysets solo validan lo elegido en los buscadores: se acotan
+        # al tenant del programa, o al del usuario si el programa es libre.
+        user = self.request.user if self.request is not None else None
+        programs = Program.objects.all()
+        agents = CustomUser.objects.all()
+        debtors = Debtor.objects.all()
+        if program:
+            tenant_id = Assignment(program=program).resolve_tenant_id()
+            agents = agents.filter(tenant_id=tenant_id)
+            debtors = debtors.for_tenant(tenant_id)
+        elif user is not None and not user.is_superuser:
+            programs = programs.filter(supervisor__tenant_id=user.tenant_id)
+            agents = agents.filter(tenant_id=user.tenant_id)
+            debtors = debtors.for_tenant(user.tenant_id)
         if program:
             self.fields['program'].queryset = Program.objects.filter(pk=program.pk)
             self.fields['program'].initial = program.pk
             self.fields['program'].required = False
             self.fields['program'].widget = forms.HiddenInput()
         else:
-            self.fields['program'].queryset = Program.objects.all()
-        self.fields['agent'].queryset = CustomUser.objects.all()
-        self.fields['debtor'].queryset = Debtor.objects.all()
+            self.fields['program'].queryset = programs
+        self.fields['agent'].queryset = agents
+        self.fields['debtor'].queryset = debtors
         for name, field in self.fields.items():
             if isinstance(field.widget, forms.Select):
                 field.widget.attrs['class'] = 'select select-bordered w-full'
@@ -136,3 +161,80 @@ class AssignmentForm(forms.ModelForm):
             instance.save()
             self.save_m2m()
         return instance
+
+
+class BulkAssignmentForm(forms.Form):
+    portfolios = forms.ModelMultipleChoiceField(
+        label='Carteras',
+        queryset=Portfolio.objects.none(),
+        widget=forms.SelectMultiple(attrs={'class': 'select select-bordered w-full h-32'}),
+        error_messages={'required': 'Seleccione al menos una cartera.'},
+    )
+    portfolio_type = forms.ChoiceField(
+        label='Tipo de cartera',
+        required=False,
+        choices=[('', 'Todos')] + PortfolioType.choices,
+        widget=forms.Select(attrs={'class': 'select select-bordered w-full'}),
+    )
+    min_days_delinquency = forms.IntegerField(
+        label='Días de mora mínimos',
+        required=False,
+        min_value=0,
+        widget=forms.NumberInput(attrs={'class': 'input input-bordered w-full'}),
+    )
+    agents = forms.ModelMultipleChoiceField(
+        label='Agentes',
+        queryset=CustomUser.objects.none(),
+        widget=forms.SelectMultiple(attrs={'class': 'select select-bordered w-full h-32'}),
+        error_messages={'required': 'Seleccione al menos un agente.'},
+    )
+    strategy = forms.ChoiceField(
+        label='Reparto',
+        choices=STRATEGY_CHOICES,
+        widget=forms.Select(attrs={'class': 'select select-bordered w-full'}),
+    )
+
+    def __init__(self, *args, **kwargs):
+        self.program = kwargs.pop('program')
+        super().__init__(*args, **kwargs)
+        tenant_id = Assignment(program=self.program).resolve_tenant_id()
+        self.fields['portfolios'].queryset = Portfolio.objects.for_tenant(tenant_id).order_by('name')
+        self.fields['agents'].queryset = CustomUser.objects.filter(tenant_id=tenant_id).order_by('username')
+
+
+class AssignmentRebalanceForm(forms.Form):
+    from_agent = forms.ModelChoiceField(
+        label='Agente que sale',
+        queryset=CustomUser.objects.none(),
+        widget=forms.Select(attrs={'class': 'select select-bordered w-full'}),
+        error_messages={'required': 'Seleccione el agente.'},
+    )
+    agents = forms.ModelMultipleChoiceField(
+        label='Repartir entre',
+        queryset=CustomUser.objects.none(),
+        widget=forms.SelectMultiple(attrs={'class': 'select select-bordered w-full h-32'}),
+        error_messages={'required': 'Seleccione al menos un agente.'},
+    )
+    strategy = forms.ChoiceField(
+        label='Reparto',
+        choices=STRATEGY_CHOICES,
+        initial=STRATEGY_BALANCE,
+        widget=forms.Select(attrs={'class': 'select select-bordered w-full'}),
+    )
+
+    def __init__(self, *args, **kwargs):
+        self.program = kwargs.pop('program')
+        super().__init__(*args, **kwargs)
+        tenant_id = Assignment(program=self.program).resolve_tenant_id()
+        self.fields['from_agent'].queryset = CustomUser.objects.filter(
+            assignments__program=self.program
+        ).distinct().order_by('username')
+        self.fields['agents'].queryset = CustomUser.objects.filter(tenant_id=tenant_id).order_by('username')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        from_agent = cleaned_data.get('from_agent')
+        agents = cleaned_data.get('agents')
+        if from_agent and agents is not None and not agents.exclude(pk=from_agent.pk).exists():
+            raise forms.ValidationError('Seleccione al menos un agente distinto del que sale.')
+        return cleaned_data
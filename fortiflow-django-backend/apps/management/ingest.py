@@ -0,0 +1,239 @@
+"""
+Registro masivo de gestiones a partir de los resultados de llamadas del
+marcador (API por lotes y comando `ingest_managements`).
+
+Los registros se procesan por bloques: se validan fila a fila, se resuelve su
+asignación con unas pocas consultas por bloque y se insertan con
+un solo INSERT por lote. Las filas cuya `idempotency_key` ya existe en el
+tenant (en la base o antes en el mismo lote) se cuentan como duplicadas y no
+se insertan, así un lote reintentado no duplica el historial.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models.constants import OnConflict
+
+from apps.account.models import CustomUser
+from apps.management.models import Assignment, Management
+from apps.management.serializers import ManagementRecordSerializer
+from apps.portfolio.import_validation import normalize_identification
+from core.cache import bump_generation
+from core.events import table_changed
+
+CHUNK_SIZE = 1000
+
+MANAGEMENT_FIELDS = (
+    'action', 'type_contact', 'effect', 'contact', 'phone', 'date_enagement',
+    'commitment', 'observation', 'next_management',
+)
+
+
+def error_message(errors):
+    """Aplana los errores de un serializer en un texto de una línea."""
+    parts = []
+    for field, messages in errors.items():
+        if isinstance(messages, dict):
+            messages = [error_message(messages)]
+        text = '; '.join(str(message) for message in messages)
+        parts.append(text if field == 'non_field_errors' else f"{field}: {text}")
+    return ' | '.join(parts)
+
+
+def ingest_records(records, assignments=None, chunk_size=CHUNK_SIZE):
+    """
+    Registra gestiones desde `records`, un iterable de (número de fila, dict).
+    `assignments` limita las asignaciones a las que se puede escribir (p. ej.
+    las del tenant del usuario o las de un programa).
+
+    Devuelve {'received', 'created', 'duplicates', 'errors': [(fila, mensaje)]}.
+    """
+    if assignments is None:
+        assignments = Assignment.objects.live()
+    result = {'received': 0, 'created': 0, 'duplicates': 0, 'errors': []}
+    seen_keys, tenant_ids = set(), set()
+    chunk = []
+    for item in records:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            _ingest_chunk(chunk, assignments, seen_keys, tenant_ids, result)
+            chunk = []
+    if chunk:
+        _ingest_chunk(chunk, assignments, seen_keys, tenant_ids, result)
+    if result['created']:
+        bump_generation(Management, Assignment, tenant_ids=tenant_ids)
+        table_changed(Management, *tenant_ids)
+        table_changed(Assignment, *tenant_ids)
+    return result
+
+
+def _validate(chunk):
+    valid, errors = [], []
+    for row_number, values in chunk:
+        if not isinstance(values, dict):
+            errors.append((row_number, "El registro no es un objeto JSON válido."))
+            continue
+        serializer = ManagementRecordSerializer(data=values)
+        if serializer.is_valid():
+            valid.append((row_number, serializer.validated_data))
+        else:
+            errors.append((row_number, error_message(serializer.errors)))
+    return valid, errors
+
+
+def _match_key(data, agent_id):
+    """Criterio con el que se busca la asignación de un registro."""
+    if data.get('assignment'):
+        return ('assignment', data['assignment'])
+    if agent_id and data.get('debtor'):
+        return ('debtor', agent_id, data['debtor'])
+    if agent_id and data.get('identification'):
+        return ('identification', agent_id, normalize_identification(data['identification']))
+    return ('phone', agent_id, str(data['phone']))
+
+
+def _resolve(valid, assignments):
+    """
+    Asigna a cada registro válido su (assignment_id, tenant_id). Devuelve los
+    registros resueltos [(fila, datos, assignment_id, tenant_id)] y los errores.
+    """
+    usernames = {data['agent_username'] for _, data in valid if data.get('agent_username')}
+    agent_ids = dict(CustomUser.objects.filter(username__in=usernames).values_list('username', 'pk'))
+
+    keys, errors = [], []
+    for row_number, data in valid:
+        agent_id = data.get('agent')
+        if not agent_id and data.get('agent_username'):
+            agent_id = agent_ids.get(data['agent_username'])
+            if agent_id is None:
+                errors.append((row_number, f"agent_username: no existe el usuario {data['agent_username']}."))
+                continue
+        keys.append((row_number, data, _match_key(data, agent_id)))
+
+    wanted = defaultdict(set)
+    for _, _, key in keys:
+        wanted[key[0]].add(key[1:])
+
+    matches = defaultdict(list)
+    if wanted['assignment']:
+        ids = [key[0] for key in wanted['assignment']]
+        for pk, tenant_id in assignments.filter(pk__in=ids).values_list('pk', 'tenant_id'):
+            matches[('assignment', pk)].append((pk, tenant_id))
+    lookups = (
+        ('debtor', 'debtor_id'),
+        ('identification', 'debtor__identification_normalized'),
+        ('phone', 'debtor__number_phone'),
+    )
+    for kind, field in lookups:
+        if not wanted[kind]:
+            continue
+        agents = {agent for agent, _ in wanted[kind]}
+        queryset = assignments.filter(**{f'{field}__in': {value for _, value in wanted[kind]}})
+        if None not in agents:
+            queryset = queryset.filter(agent_id__in=agents)
+        for pk, tenant_id, agent, value in queryset.values_list('pk', 'tenant_id', 'agent_id', field):
+            value = str(value) if kind == 'phone' else value
+            matches[(kind, agent, value)].append((pk, tenant_id))
+            if kind == 'phone':
+                matches[(kind, None, value)].append((pk, tenant_id))
+
+    resolved = []
+    for row_number, data, key in keys:
+        found = matches.get(key, [])
+        if not found:
+            errors.append((row_number, "No se encontró la asignación del registro."))
+        elif len(found) > 1:
+            errors.append((row_number, "Varias asignaciones coinciden; indique la asignación o el agente y el deudor."))
+        else:
+            resolved.append((row_number, data, *found[0]))
+    return resolved, errors
+
+
+def _ingest_chunk(chunk, assignments, seen_keys, tenant_ids, result):
+    result['received'] += len(chunk)
+    valid, errors = _validate(chunk)
+    resolved, resolve_errors = _resolve(valid, assignments)
+    errors.extend(resolve_errors)
+
+    keys = {
+        (tenant_id, data['idempotency_key'], data['date_enagement'])
+        for _, data, _, tenant_id in resolved if data.get('idempotency_key')
+    }
+    if keys:
+        existing = Management.objects.filter(
+            tenant_id__in={tenant_id for tenant_id, _, _ in keys},
+            idempotency_key__in={key for _, key, _ in keys},
+            date_enagement__in={day for _, _, day in keys},
+        ).values_list('tenant_id', 'idempotency_key', 'date_enagement')
+        seen_keys.update(key for key in existing if key in keys)
+
+    managements = []
+    for row_number, data, assignment_id, tenant_id in resolved:
+        if data.get('idempotency_key'):
+            key = (tenant_id, data['idempotency_key'], data['date_enagement'])
+            if key in seen_keys:
+                result['duplicates'] += 1
+                continue
+            seen_keys.add(key)
+        managements.append(Management(
+            assignment_id=assignment_id, tenant_id=tenant_id,
+            idempotency_key=data.get('idempotency_key'),
+            **{field: data[field] for field in MANAGEMENT_FIELDS},
+        ))
+
+    if managements:
+        with transaction.atomic():
+            inserted = insert_new(managements)
+            advance_assignments(inserted)
+        # Un reintento concurrente pudo insertar antes alguna de las claves.
+        result['created'] += len(inserted)
+        result['duplicates'] += len(managements) - len(inserted)
+        tenant_ids.update(management.tenant_id for management in inserted)
+
+    result['errors'].extend(sorted(errors))
+
+
+def insert_new(managements):
+    """
+    Inserta `managements` con ON CONFLICT DO NOTHING y devuelve las gestiones
+    realmente insertadas. Es el INSERT de `bulk_create(ignore_conflicts=True)`
+    con RETURNING, que Postgres solo devuelve para las filas insertadas; así
+    las que chocan con la clave de idempotencia no se cuentan ni avanzan su
+    asignación.
+    """
+    returning = [Management._meta.pk] + [
+        Management._meta.get_field(name) for name in ('assignment', 'tenant', 'date_enagement', 'next_management')
+    ]
+    fields = [field for field in Management._meta.concrete_fields if field is not Management._meta.pk]
+    batch_size = connection.ops.bulk_batch_size(fields, managements)
+    inserted = []
+    for start in range(0, len(managements), batch_size):
+        rows = Management.objects._insert(
+            managements[start:start + batch_size], fields=fields,
+            returning_fields=returning, on_conflict=OnConflict.IGNORE,
+        )
+        inserted.extend(
+            Management(pk=pk, assignment_id=assignment_id, tenant_id=tenant_id,
+                       date_enagement=date_enagement, next_management=next_management)
+            for pk, assignment_id, tenant_id, date_enagement, next_management in rows
+        )
+    return inserted
+
+
+def advance_assignments(managements):
+    """
+    Igual que al registrar una gestión desde el formulario (signals.py): cada
+    asignación toma la próxima gestión de su gestión más reciente y sale de la
+    cola. Un UPDATE por fecha de próxima gestión.
+    """
+    latest = {}
+    for management in managements:
+        current = latest.get(management.assignment_id)
+        if current is None or management.date_enagement >= current.date_enagement:
+            latest[management.assignment_id] = management
+    by_next_management = defaultdict(list)
+    for assignment_id, management in latest.items():
+        by_next_management[management.next_management].append(assignment_id)
+    for next_management, assignment_ids in by_next_management.items():
+        Assignment.objects.filter(pk__in=assignment_ids).update(
+            next_management=next_management, leased_by=None, lease_expires_at=None,
+        )
@@ -0,0 +1,78 @@
+import csv
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.account.models import CustomUser
+from apps.management.ingest import CHUNK_SIZE, ingest_records
+from apps.management.models import Assignment
+
+
+def read_records(path):
+    """(número de fila, dict) de un CSV (fila 2 en adelante) o NDJSON (una línea por registro)."""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        if extension in ('.ndjson', '.jsonl'):
+            for line_number, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError:
+                    yield line_number, None
+        elif extension == '.csv':
+            sample = handle.read(4096)
+            handle.seek(0)
+            delimiter = ';' if sample.count(';') > sample.count(',') else ','
+            reader = csv.DictReader(handle, delimiter=delimiter)
+            for row_number, row in enumerate(reader, start=2):
+                yield row_number, {
+                    key.strip(): value for key, value in row.items()
+                    if key and value not in (None, '')
+                }
+        else:
+            raise CommandError("Formato no soportado. Use un archivo .csv, .ndjson o .jsonl.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Registra gestiones desde un archivo de resultados de llamadas del marcador "
+        "(CSV o NDJSON). Las filas con idempotency_key ya registrada se omiten, así "
+        "que el mismo archivo puede volver a procesarse sin duplicar gestiones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--program', type=int, help="Limitar las asignaciones a este programa.")
+        parser.add_argument('--user', help="Usuario cuyo tenant limita las asignaciones.")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--errors', help="Ruta del CSV donde escribir las filas con error.")
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['path']):
+            raise CommandError(f"No existe el archivo {options['path']}.")
+        assignments = Assignment.objects.live()
+        if options['user']:
+            try:
+                user = CustomUser.objects.get(username=options['user'])
+            except CustomUser.DoesNotExist:
+                raise CommandError(f"No existe el usuario {options['user']}.")
+            assignments = assignments.for_user(user)
+        if options['program']:
+            assignments = assignments.filter(program_id=options['program'])
+
+        result = ingest_records(read_records(options['path']), assignments, options['chunk_size'])
+
+        if options['errors'] and result['errors']:
+            with open(options['errors'], 'w', newline='', encoding='utf-8') as handle:
+                writer = csv.writer(handle)
+                writer.writerow(['fila', 'error'])
+                writer.writerows(result['errors'])
+        else:
+            for row_number, message in result['errors'][:20]:
+                self.stderr.write(f"Fila {row_number}: {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['received']} registros: {result['created']} gestiones creadas, "
+            f"{result['duplicates']} duplicadas, {len(result['errors'])} con error."
+        ))
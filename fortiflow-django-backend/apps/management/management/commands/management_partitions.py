@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.management import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Mantiene las particiones mensuales de las gestiones: crea las de los próximos "
+        "meses y, con --retain-months, separa las más antiguas (a un esquema de archivo "
+        "o eliminándolas), incluida la de archivo cuando todo su rango queda fuera. Programar a diario, p. ej. en cron: "
+        "15 0 * * * python manage.py management_partitions --retain-months 24 --archive-schema archive"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3)
+        parser.add_argument(
+            '--retain-months', type=int,
+            help="Meses a conservar, contando el actual. Sin este valor no se separa nada.",
+        )
+        parser.add_argument('--archive-schema', help="Esquema al que mover las particiones separadas.")
+        parser.add_argument('--drop', action='store_true', help="Eliminar las particiones separadas.")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            raise CommandError("management_management no es una tabla particionada (requiere Postgres).")
+        if options['drop'] and options['archive_schema']:
+            raise CommandError("Use --drop o --archive-schema, no ambos.")
+
+        today = timezone.localdate()
+        current = partitions.month_start(today)
+        existing = set(partitions.list_partitions())
+        missing = [
+            month for month in (partitions.add_months(current, n) for n in range(options['months_ahead'] + 1))
+            if month not in existing
+        ]
+        old = []
+        if options['retain_months']:
+            cutoff = partitions.add_months(current, 1 - options['retain_months'])
+            old = [partitions.partition_name(month) for month in partitions.partitions_before(cutoff)]
+            if partitions.archive_before(cutoff):
+                old.insert(0, partitions.ARCHIVE_PARTITION)
+
+        if options['dry_run']:
+            for month in missing:
+                self.stdout.write(f"Crear {partitions.partition_name(month)}")
+            for name in old:
+                self.stdout.write(f"Separar {name}")
+            return
+
+        created = partitions.ensure_partitions(options['months_ahead'], today=today)
+        for name in created:
+            self.stdout.write(f"Creada {name}")
+        for name in old:
+            partitions.detach_table(name, options['archive_schema'], options['drop'])
+            self.stdout.write(f"Separada {name}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(created)} particiones creadas, {len(old)} separadas."
+        ))
@@ -0,0 +1,91 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:06
+
+import logging
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+logger = logging.getLogger(__name__)
+
+
+def move_assignments_to_tenant_debtors(Debtor, Assignment):
+    """
+    Las asignaciones de un tenant distinto al de su deudor pasan a la copia
+    del deudor en su tenant (la que creó portfolio 0008, o una nueva), para
+    que el deudor no quede oculto para ese tenant.
+    """
+    fields = [field.attname for field in Debtor._meta.concrete_fields if field.attname not in ('id', 'tenant_id')]
+    pairs = (
+        Assignment.objects.filter(tenant_id__isnull=False, debtor__tenant_id__isnull=False)
+        .exclude(debtor__tenant_id=F('tenant_id'))
+        .values_list('debtor_id', 'tenant_id').distinct()
+    )
+    for debtor_id, tenant_id in list(pairs):
+        debtor = Debtor.objects.get(pk=debtor_id)
+        values = {field: getattr(debtor, field) for field in fields}
+        copy = Debtor.objects.filter(tenant_id=tenant_id, **values).order_by('pk').first()
+        if copy is None:
+            copy = Debtor.objects.create(tenant_id=tenant_id, **values)
+        Assignment.objects.filter(debtor_id=debtor_id, tenant_id=tenant_id).update(debtor_id=copy.pk)
+        logger.warning(
+            "Asignaciones del tenant %s movidas del deudor %s a su copia %s.", tenant_id, debtor_id, copy.pk,
+        )
+
+
+def backfill_tenant(apps, schema_editor):
+    Program = apps.get_model('management', 'Program')
+    Assignment = apps.get_model('management', 'Assignment')
+    Management = apps.get_model('management', 'Management')
+    Debtor = apps.get_model('portfolio', 'Debtor')
+    Assignment.objects.update(tenant_id=Subquery(
+        Program.objects.filter(pk=OuterRef('program_id')).values('supervisor__tenant_id')[:1]
+    ))
+    Management.objects.update(tenant_id=Subquery(
+        Assignment.objects.filter(pk=OuterRef('assignment_id')).values('tenant_id')[:1]
+    ))
+    Debtor.objects.filter(tenant__isnull=True).update(tenant_id=Subquery(
+        Assignment.objects.filter(debtor_id=OuterRef('pk')).order_by('pk').values('tenant_id')[:1]
+    ))
+    move_assignments_to_tenant_debtors(Debtor, Assignment)
+    if schema_editor.connection.vendor == 'postgresql':
+        # Los UPDATE dejan comprobaciones de FK diferidas; con ellas pendientes
+        # Postgres no deja crear los índices en la misma transacción.
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_alter_customuser_table'),
+        ('management', '0002_rename_deptor_assignment_debtor'),
+        ('portfolio', '0008_denormalized_tenant'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='tenant',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, help_text='Copia de program.supervisor.tenant para filtrar sin joins.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='account.tenant'),
+        ),
+        migrations.AddField(
+            model_name='management',
+            name='tenant',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, help_text='Copia de assignment.tenant para filtrar sin joins.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='managements', to='account.tenant'),
+        ),
+        migrations.RunPython(backfill_tenant, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['tenant', 'agent'], name='assignment_tenant_agent'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['tenant', 'program'], name='assignment_tenant_program'),
+        ),
+        migrations.AddIndex(
+            model_name='management',
+            index=models.Index(fields=['tenant', '-date_enagement'], name='management_tenant_date'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:08
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('account', '0005_alter_customuser_table'),
+        ('management', '0003_denormalized_tenant'),
+        ('portfolio', '0008_denormalized_tenant'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='assignment',
+            index=models.Index(fields=['program', 'agent'], name='assignment_program_agent'),
+        ),
+        AddIndexConcurrently(
+            model_name='management',
+            index=models.Index(fields=['assignment', '-id'], name='management_assignment_recent'),
+        ),
+        AddIndexConcurrently(
+            model_name='management',
+            index=models.Index(fields=['next_management'], name='management_next'),
+        ),
+    ]
@@ -0,0 +1,138 @@
+from datetime import date
+
+from django.db import migrations
+from django.utils import timezone
+
+TABLE = 'management_management'
+OLD_TABLE = 'management_management_unpartitioned'
+MONTHS_AHEAD = 3
+# Meses con partición propia hacia atrás. Lo anterior va a una sola partición
+# de archivo: una fecha antigua o errónea no crea cientos de particiones.
+MONTHS_BACK = 24
+
+
+def _add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _indexes(cursor, table):
+    """(nombre, definición) de los índices de `table` que no son la clave primaria."""
+    cursor.execute(
+        "SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x "
+        "JOIN pg_class i ON i.oid = x.indexrelid "
+        "WHERE x.indrelid = %s::regclass AND NOT x.indisprimary",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _foreign_keys(cursor, table):
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def partition_management(apps, schema_editor):
+    """
+    Convierte management_management en una tabla particionada por mes de
+    `date_enagement`. La clave primaria pasa a ser (id, date_enagement), como
+    exige Postgres; para el ORM `id` sigue siendo la clave primaria.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        indexes = _indexes(cursor, TABLE)
+        foreign_keys = _foreign_keys(cursor, TABLE)
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{OLD_TABLE}"')
+        cursor.execute(f'ALTER TABLE "{OLD_TABLE}" RENAME CONSTRAINT "{TABLE}_pkey" TO "{OLD_TABLE}_pkey"')
+        for name, _ in indexes:
+            cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name[:50]}_unpart"')
+        for name, _ in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{OLD_TABLE}" RENAME CONSTRAINT "{name}" TO "{name[:50]}_unpart"')
+        # Libera el nombre de la secuencia de `id` (identity o serial).
+        cursor.execute(f'ALTER TABLE "{OLD_TABLE}" ALTER COLUMN id DROP IDENTITY IF EXISTS')
+        cursor.execute(f'ALTER TABLE "{OLD_TABLE}" ALTER COLUMN id DROP DEFAULT')
+        cursor.execute(f'DROP SEQUENCE IF EXISTS "{TABLE}_id_seq"')
+
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{OLD_TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (date_enagement)'
+        )
+        # Las tablas particionadas no admiten identity antes de Postgres 17.
+        cursor.execute(f'CREATE SEQUENCE "{TABLE}_id_seq" OWNED BY "{TABLE}".id')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval(\'"{TABLE}_id_seq"\')')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id, date_enagement)')
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+        # Las definiciones se leyeron antes de renombrar: apuntan a la tabla nueva.
+        for _, definition in indexes:
+            cursor.execute(definition)
+
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+        today = timezone.localdate()
+        current = today.replace(day=1)
+        cursor.execute(f'SELECT min(date_enagement) FROM "{OLD_TABLE}"')
+        first = cursor.fetchone()[0] or today
+        month = max(first.replace(day=1), _add_months(current, -MONTHS_BACK))
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}_archive" PARTITION OF "{TABLE}" FOR VALUES FROM (MINVALUE) TO (%s)',
+            [month],
+        )
+        last = _add_months(current, MONTHS_AHEAD)
+        while month <= last:
+            end = _add_months(month, 1)
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}_p{month:%Y%m}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+                [month, end],
+            )
+            month = end
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{OLD_TABLE}"')
+        cursor.execute(f'DROP TABLE "{OLD_TABLE}"')
+        cursor.execute(
+            f'SELECT setval(\'"{TABLE}_id_seq"\', coalesce((SELECT max(id) FROM "{TABLE}"), 0) + 1, false)'
+        )
+
+
+def unpartition_management(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        indexes = _indexes(cursor, TABLE)
+        foreign_keys = _foreign_keys(cursor, TABLE)
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{OLD_TABLE}"')
+        cursor.execute(f'ALTER TABLE "{OLD_TABLE}" RENAME CONSTRAINT "{TABLE}_pkey" TO "{OLD_TABLE}_pkey"')
+        for name, _ in indexes:
+            cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name[:50]}_unpart"')
+
+        cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{OLD_TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id DROP DEFAULT')
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{OLD_TABLE}"')
+        cursor.execute(f'DROP TABLE "{OLD_TABLE}" CASCADE')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id)')
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+        for _, definition in indexes:
+            cursor.execute(definition.replace(' ON ONLY ', ' ON ', 1))
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('\"{TABLE}\"', 'id'), "
+            f"coalesce((SELECT max(id) FROM \"{TABLE}\"), 0) + 1, false)"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0004_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_management, unpartition_management),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_queue_fields(apps, schema_editor):
+    Assignment = apps.get_model('management', 'Assignment')
+    Management = apps.get_model('management', 'Management')
+    Obligation = apps.get_model('portfolio', 'Obligation')
+    latest = Management.objects.filter(assignment_id=OuterRef('pk')).order_by('-id').values('next_management')[:1]
+    balances = (
+        Obligation.objects
+        .filter(debtor_id=OuterRef('debtor_id'), tenant_id=OuterRef('tenant_id'), balance__gt=0)
+        .order_by()
+        .values('debtor_id')
+        .annotate(total=Sum('balance'))
+        .values('total')
+    )
+    Assignment.objects.update(
+        next_management=Subquery(latest),
+        balance_due=Coalesce(Subquery(balances), Value(0), output_field=DecimalField(max_digits=16, decimal_places=2)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_alter_customuser_table'),
+        ('management', '0005_partition_management'),
+        ('portfolio', '0009_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='balance_due',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Saldo pendiente del deudor en el tenant, para ordenar la cola.', max_digits=16),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='leased_by',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='next_management',
+            field=models.DateField(blank=True, help_text='Próxima gestión de la última gestión registrada. Vacío: nunca gestionada.', null=True),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='priority',
+            field=models.IntegerField(default=0, help_text='Mayor prioridad se atiende primero en la cola de trabajo.'),
+        ),
+        migrations.RunPython(backfill_queue_fields, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(models.F('program'), models.F('agent'), models.OrderBy(models.F('priority'), descending=True), models.OrderBy(models.F('next_management'), nulls_first=True), models.OrderBy(models.F('balance_due'), descending=True), name='assignment_work_queue'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_alter_customuser_table'),
+        ('management', '0006_assignment_work_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='management',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, help_text='Clave del registro de origen (p. ej. la llamada del marcador) para no duplicar reintentos.', max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='management',
+            constraint=models.UniqueConstraint(fields=('idempotency_key', 'date_enagement'), name='management_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0007_management_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='program',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0006_cacheversion'),
+        ('management', '0008_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='management',
+            name='management_idempotency_key',
+        ),
+        migrations.AddConstraint(
+            model_name='management',
+            constraint=models.UniqueConstraint(fields=('tenant', 'idempotency_key', 'date_enagement'), name='management_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:37
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # El índice se crea con CONCURRENTLY para no bloquear management_program.
+    atomic = False
+
+    dependencies = [
+        ('management', '0009_tenant_idempotency_key'),
+        ('portfolio', '0007_debtor_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='program',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), name='program_title_trgm'),
+        ),
+    ]
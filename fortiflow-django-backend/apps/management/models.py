@@ -1,9 +1,13 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
-from apps.account.models import CustomUser
+from django.db.models import F
+from django.db.models.functions import Upper
+from apps.account.models import CustomUser, Tenant
 from apps.portfolio.models import Debtor
+from core.managers import SoftDeleteManager, SoftDeleteMixin, TenantDerivedMixin, TenantQuerySet
 
 
-class Program(models.Model):
+class Program(SoftDeleteMixin, models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
@@ -11,22 +15,79 @@ class Program(models.Model):
     calls_initiated = models.BooleanField(default=False)
     is_finished = models.BooleanField(default=False)
     is_paused = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
+
+    purge_plan = (
+        ('management.Management', 'assignment__program'),
+        ('management.Assignment', 'program'),
+    )
+
+    class Meta:
+        indexes = [
+            # Búsqueda del autocompletado (`title` en mayúsculas, como los
+            # índices trigram de Debtor).
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='program_title_trgm'),
+        ]
 
     def __str__(self):
         return self.title
 
 
-class Assignment(models.Model):
+class Assignment(TenantDerivedMixin, models.Model):
     program = models.ForeignKey(Program, on_delete=models.CASCADE, related_name="assignments")
     agent = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="assignments")
     debtor = models.ForeignKey(Debtor, on_delete=models.CASCADE, related_name="assignments")
     created_at = models.DateTimeField(auto_now_add=True)
+    priority = models.IntegerField(default=0, help_text="Mayor prioridad se atiende primero en la cola de trabajo.")
+    next_management = models.DateField(
+        null=True, blank=True,
+        help_text="Próxima gestión de la última gestión registrada. Vacío: nunca gestionada."
+    )
+    balance_due = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0,
+        help_text="Saldo pendiente del deudor en el tenant, para ordenar la cola."
+    )
+    leased_by = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        db_index=False, related_name="+"
+    )
+    lease_expires_at = models.DateTimeField(null=True, blank=True, editable=False)
+    tenant = models.ForeignKey(
+        Tenant, on_delete=models.CASCADE, null=True, blank=True, editable=False,
+        db_index=False, related_name="assignments",
+        help_text="Copia de program.supervisor.tenant para filtrar sin joins."
+    )
+
+    objects = TenantQuerySet.as_manager()
+
+    tenant_source = 'program__supervisor'
+    live_parents = ('program',)
+    tenant_dependents = ('managements',)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'agent'], name='assignment_tenant_agent'),
+            models.Index(fields=['tenant', 'program'], name='assignment_tenant_program'),
+            models.Index(fields=['program', 'agent'], name='assignment_program_agent'),
+            # Orden de la cola de trabajo (ver apps/management/queue.py).
+            models.Index(
+                F('program'), F('agent'), F('priority').desc(),
+                F('next_management').asc(nulls_first=True), F('balance_due').desc(),
+                name='assignment_work_queue',
+            ),
+        ]
 
     def __str__(self):
         return self.program.title
 
 
-class Management(models.Model):
+class Management(TenantDerivedMixin, models.Model):
+    # En Postgres la tabla está particionada por mes de `date_enagement`
+    # (migración 0005, ver apps/management/partitions.py). Los índices nuevos
+    # no pueden crearse con AddIndexConcurrently sobre la tabla padre.
     assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name="managements")
     action = models.CharField(max_length=255)
     type_contact = models.CharField(max_length=255)
@@ -37,6 +98,35 @@ class Management(models.Model):
     commitment = models.CharField(max_length=255)
     observation = models.TextField()
     next_management = models.DateField()
+    idempotency_key = models.CharField(
+        max_length=64, null=True, blank=True, editable=False,
+        help_text="Clave del registro de origen (p. ej. la llamada del marcador) para no duplicar reintentos."
+    )
+    tenant = models.ForeignKey(
+        Tenant, on_delete=models.CASCADE, null=True, blank=True, editable=False,
+        db_index=False, related_name="managements",
+        help_text="Copia de assignment.tenant para filtrar sin joins."
+    )
+
+    objects = TenantQuerySet.as_manager()
+
+    tenant_source = 'assignment'
+    live_parents = ('assignment__program',)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', '-date_enagement'], name='management_tenant_date'),
+            models.Index(fields=['assignment', '-id'], name='management_assignment_recent'),
+            models.Index(fields=['next_management'], name='management_next'),
+        ]
+        constraints = [
+            # La clave es única por tenant: dos marcadores pueden repetir claves.
+            # En una tabla particionada la restricción única debe incluir la
+            # columna de partición.
+            models.UniqueConstraint(
+                fields=['tenant', 'idempotency_key', 'date_enagement'], name='management_idempotency_key',
+            ),
+        ]
 
     def __str__(self):
         return self.assignment.program.title
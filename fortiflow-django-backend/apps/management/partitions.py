@@ -0,0 +1,150 @@
+"""
+Particiones mensuales de `management_management` (Postgres, RANGE sobre
+`date_enagement`). La tabla se convierte en la migración 0005; aquí están las
+operaciones de mantenimiento que usa el comando `management_partitions`.
+
+Cada mes vive en `management_management_pAAAAMM`. Lo anterior al primer mes
+con partición propia (a lo sumo dos años antes de la migración) está en
+`management_management_archive`, sin límite inferior; la retención la separa
+cuando todo su rango queda antes del corte (`archive_before`). La partición
+`management_management_default` recibe las filas fuera de rango para que un
+INSERT nunca falle; al crear el mes correspondiente esas filas se mueven.
+"""
+from datetime import date
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+TABLE = 'management_management'
+DEFAULT_PARTITION = f'{TABLE}_default'
+ARCHIVE_PARTITION = f'{TABLE}_archive'
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND c.relnamespace = 'public'::regnamespace",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """Meses con partición adjunta, ordenados (sin incluir la partición por defecto)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s AND parent.relnamespace = 'public'::regnamespace",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    prefix = f'{TABLE}_p'
+    return sorted(
+        date(int(name[len(prefix):][:4]), int(name[len(prefix):][4:]), 1)
+        for name in names
+        if name.startswith(prefix)
+    )
+
+
+def create_partition(month):
+    """
+    Crea la partición de `month`. Si la partición por defecto tiene filas de
+    ese mes, se mueven a la nueva tabla antes de adjuntarla.
+    """
+    month = month_start(month)
+    name = partition_name(month)
+    start, end = month, add_months(month, 1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+            f'WHERE date_enagement >= %s AND date_enagement < %s RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved',
+            [start, end],
+        )
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+            [start, end],
+        )
+    return name
+
+
+def ensure_partitions(months_ahead=3, today=None):
+    """Crea las particiones que falten desde el mes actual hasta `months_ahead` meses después."""
+    current = month_start(today or timezone.localdate())
+    existing = set(list_partitions())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            created.append(create_partition(month))
+    return created
+
+
+def detach_partition(month, archive_schema=None, drop=False):
+    """
+    Separa la partición de `month` de la tabla. Queda como tabla suelta, se
+    mueve a `archive_schema` o se elimina si `drop`. Es una operación de
+    catálogo: no reescribe ni borra filas una a una.
+    """
+    return detach_table(partition_name(month), archive_schema, drop)
+
+
+def detach_table(name, archive_schema=None, drop=False):
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+        if drop:
+            cursor.execute(f'DROP TABLE "{name}"')
+        elif archive_schema:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"')
+            cursor.execute(f'ALTER TABLE "{name}" SET SCHEMA "{archive_schema}"')
+    return name
+
+
+def partitions_before(month):
+    cutoff = month_start(month)
+    return [partition for partition in list_partitions() if partition < cutoff]
+
+
+def archive_bound():
+    """Límite superior (exclusivo) de la partición de archivo, o None si no está adjunta."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_get_expr(child.relpartbound, child.oid) FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s AND child.relname = %s "
+            "AND parent.relnamespace = 'public'::regnamespace",
+            [TABLE, ARCHIVE_PARTITION],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    # FOR VALUES FROM (MINVALUE) TO ('AAAA-MM-DD')
+    return date.fromisoformat(row[0].rsplit("'", 2)[-2])
+
+
+def archive_before(month):
+    """Si la partición de archivo está adjunta y todas sus filas son anteriores a `month`."""
+    bound = archive_bound()
+    return bound is not None and bound <= month_start(month)
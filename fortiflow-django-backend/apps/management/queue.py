@@ -0,0 +1,139 @@
+"""
+Cola de trabajo de agentes: cada agente pide "el siguiente deudor" de un
+programa y recibe una de sus asignaciones vencidas, arrendada por un tiempo
+para que nadie más trabaje al mismo deudor.
+
+La selección usa `SELECT ... FOR UPDATE SKIP LOCKED`: las filas que otro
+agente está tomando en ese instante se saltan en lugar de esperar, así que
+cientos de agentes consultando a la vez no se bloquean entre sí.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField, Exists, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.management.models import Assignment
+from apps.portfolio.models import Obligation
+
+# Intentos cuando el deudor elegido ya tiene otra asignación arrendada.
+MAX_ATTEMPTS = 5
+
+
+class QueueUnavailable(Exception):
+    """El programa no está repartiendo trabajo (sin iniciar, pausado o finalizado)."""
+
+
+def queue_ordering():
+    return (
+        F('priority').desc(),
+        F('next_management').asc(nulls_first=True),
+        F('balance_due').desc(),
+        'pk',
+    )
+
+
+def check_program(program):
+    if program.is_finished:
+        raise QueueUnavailable("El programa está finalizado.")
+    if program.is_paused:
+        raise QueueUnavailable("El programa está pausado.")
+    if not program.calls_initiated:
+        raise QueueUnavailable("El programa no ha iniciado llamadas.")
+
+
+def _debtor_leased_elsewhere(now):
+    return Exists(
+        Assignment.objects.live()
+        .filter(debtor_id=OuterRef('debtor_id'), lease_expires_at__gt=now)
+        .exclude(pk=OuterRef('pk'))
+    )
+
+
+def lease_next_assignment(program, agent, lease_seconds=None, now=None):
+    """
+    Arrienda al agente su siguiente asignación del programa y la devuelve, o
+    None si no tiene trabajo pendiente. Si el agente ya tiene un arriendo
+    vigente en el programa se devuelve ese mismo (consultar dos veces no
+    consume dos deudores).
+
+    Orden: prioridad, próxima gestión (las nunca gestionadas primero) y saldo.
+    """
+    check_program(program)
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    if lease_seconds is None:
+        lease_seconds = getattr(settings, 'WORK_QUEUE_LEASE_SECONDS', 600)
+    expires_at = now + timedelta(seconds=lease_seconds)
+
+    mine = Assignment.objects.live().filter(program=program, agent=agent)
+    current = mine.filter(leased_by=agent, lease_expires_at__gt=now).order_by(*queue_ordering()).first()
+    if current is not None:
+        mine.filter(pk=current.pk).update(lease_expires_at=expires_at)
+        current.lease_expires_at = expires_at
+        return current
+
+    skipped = []
+    for _ in range(MAX_ATTEMPTS):
+        with transaction.atomic():
+            assignment = (
+                mine
+                .filter(Q(next_management__isnull=True) | Q(next_management__lte=today))
+                .filter(Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now))
+                .exclude(pk__in=skipped)
+                .exclude(_debtor_leased_elsewhere(now))
+                .select_related('debtor')
+                .select_for_update(skip_locked=True, of=('self', 'debtor'))
+                .order_by(*queue_ordering())
+                .first()
+            )
+            if assignment is None:
+                return None
+            # El bloqueo del deudor serializa a quienes lo eligieron a la vez;
+            # esta consulta ve ya los arriendos confirmados por los demás.
+            leased_elsewhere = (
+                Assignment.objects.live()
+                .filter(debtor_id=assignment.debtor_id, lease_expires_at__gt=now)
+                .exclude(pk=assignment.pk)
+                .exists()
+            )
+            if leased_elsewhere:
+                skipped.append(assignment.pk)
+                continue
+            Assignment.objects.filter(pk=assignment.pk).update(leased_by=agent, lease_expires_at=expires_at)
+            assignment.leased_by = agent
+            assignment.lease_expires_at = expires_at
+            return assignment
+    return None
+
+
+def release_assignment(assignment_id, agent=None):
+    """Libera el arriendo (si `agent` se indica, solo si es suyo). Devuelve si se liberó."""
+    assignments = Assignment.objects.filter(pk=assignment_id)
+    if agent is not None:
+        assignments = assignments.filter(leased_by=agent)
+    return bool(assignments.update(leased_by=None, lease_expires_at=None))
+
+
+def balance_due_expression():
+    """Saldo pendiente del deudor de la asignación dentro de su tenant."""
+    balances = (
+        Obligation.objects.live()
+        .filter(debtor_id=OuterRef('debtor_id'), tenant_id=OuterRef('tenant_id'), balance__gt=0)
+        .order_by()
+        .values('debtor_id')
+        .annotate(total=Sum('balance'))
+        .values('total')
+    )
+    return Coalesce(Subquery(balances), Value(0), output_field=DecimalField(max_digits=16, decimal_places=2))
+
+
+def refresh_balances(program_ids=None):
+    """Recalcula `Assignment.balance_due` con un UPDATE por conjunto. Devuelve las filas cambiadas."""
+    assignments = Assignment.objects.all()
+    if program_ids is not None:
+        assignments = assignments.filter(program_id__in=program_ids)
+    expression = balance_due_expression()
+    return assignments.exclude(balance_due=expression).update(balance_due=expression)
@@ -0,0 +1,125 @@
+from rest_framework import serializers
+
+from apps.management.models import Assignment, Management
+from apps.portfolio.models import Debtor
+from core.api import ScopedRelation, TenantModelSerializer
+
+DATE_INPUT_FORMATS = ['iso-8601', '%d/%m/%Y', '%d-%m-%Y']
+
+
+class ManagementRecordSerializer(serializers.Serializer):
+    """
+    Un resultado de llamada del marcador. La asignación se identifica por
+    `assignment`, por agente + deudor (`debtor` o `identification`) o por
+    el teléfono marcado, en ese orden de preferencia.
+    """
+    idempotency_key = serializers.CharField(max_length=64, required=False, allow_blank=True)
+    assignment = serializers.IntegerField(required=False, min_value=1)
+    agent = serializers.IntegerField(required=False, min_value=1)
+    agent_username = serializers.CharField(max_length=150, required=False, allow_blank=True)
+    debtor = serializers.IntegerField(required=False, min_value=1)
+    identification = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    phone = serializers.IntegerField(min_value=0)
+    action = serializers.CharField(max_length=255)
+    type_contact = serializers.CharField(max_length=255)
+    effect = serializers.CharField(max_length=255)
+    contact = serializers.CharField(max_length=255)
+    date_enagement = serializers.DateField(input_formats=DATE_INPUT_FORMATS)
+    next_management = serializers.DateField(input_formats=DATE_INPUT_FORMATS)
+    commitment = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+    observation = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate(self, attrs):
+        if attrs.get('identification') == '':
+            attrs.pop('identification')
+        if attrs.get('agent_username') == '':
+            attrs.pop('agent_username')
+        if attrs.get('idempotency_key') == '':
+            attrs.pop('idempotency_key')
+        if attrs['next_management'] < attrs['date_enagement']:
+            raise serializers.ValidationError(
+                {'next_management': "No puede ser anterior a la fecha de gestión."}
+            )
+        return attrs
+
+
+class ManagementBatchSerializer(serializers.Serializer):
+    program = serializers.IntegerField(required=False, min_value=1)
+    records = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_records(self, records):
+        from django.conf import settings
+        limit = getattr(settings, 'MANAGEMENT_BATCH_MAX_RECORDS', 5000)
+        if len(records) > limit:
+            raise serializers.ValidationError(f"Máximo {limit} registros por lote.")
+        return records
+
+
+def visible_programs(user):
+    from apps.management.models import Program
+    if user.is_superuser:
+        return Program.objects.all()
+    return Program.objects.filter(supervisor__tenant_id=user.tenant_id)
+
+
+def visible_users(user):
+    from apps.account.models import CustomUser
+    if user.is_superuser:
+        return CustomUser.objects.all()
+    return CustomUser.objects.filter(tenant_id=user.tenant_id)
+
+
+class AssignmentSerializer(TenantModelSerializer):
+    program = serializers.IntegerField(source='program_id')
+    agent = serializers.IntegerField(source='agent_id')
+    debtor = serializers.IntegerField(source='debtor_id')
+    program_title = serializers.CharField(source='program.title', read_only=True)
+    agent_username = serializers.CharField(source='agent.username', read_only=True)
+    debtor_name = serializers.CharField(source='debtor.name', read_only=True)
+
+    scoped_relations = {
+        'program_id': ScopedRelation(visible_programs, 'supervisor__tenant_id'),
+        'agent_id': ScopedRelation(visible_users),
+        'debtor_id': ScopedRelation(lambda user: Debtor.objects.for_user(user)),
+    }
+    tenant_relation = 'program_id'
+
+    class Meta(TenantModelSerializer.Meta):
+        model = Assignment
+        fields = [
+            'id', 'program', 'program_title', 'agent', 'agent_username', 'debtor', 'debtor_name',
+            'priority', 'next_management', 'balance_due', 'created_at',
+        ]
+        read_only_fields = ['balance_due', 'created_at']
+
+
+class ManagementSerializer(TenantModelSerializer):
+    assignment = serializers.IntegerField(source='assignment_id')
+    date_enagement = serializers.DateField(input_formats=DATE_INPUT_FORMATS)
+    next_management = serializers.DateField(input_formats=DATE_INPUT_FORMATS)
+
+    scoped_relations = {
+        'assignment_id': ScopedRelation(lambda user: Assignment.objects.for_user(user)),
+    }
+    tenant_relation = 'assignment_id'
+
+    class Meta(TenantModelSerializer.Meta):
+        model = Management
+        fields = [
+            'id', 'assignment', 'action', 'type_contact', 'effect', 'contact', 'phone',
+            'date_enagement', 'commitment', 'observation', 'next_management',
+        ]
+        extra_kwargs = {
+            'commitment': {'required': False, 'allow_blank': True, 'default': ''},
+            'observation': {'required': False, 'allow_blank': True, 'default': ''},
+        }
+
+    def validate(self, attrs):
+        instance = self.instance
+        date_enagement = attrs.get('date_enagement', getattr(instance, 'date_enagement', None))
+        next_management = attrs.get('next_management', getattr(instance, 'next_management', None))
+        if date_enagement and next_management and next_management < date_enagement:
+            raise serializers.ValidationError(
+                {'next_management': "No puede ser anterior a la fecha de gestión."}
+            )
+        return super().validate(attrs)
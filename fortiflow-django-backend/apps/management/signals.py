@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.management.models import Assignment, Management
+
+
+@receiver(post_save, sender=Assignment)
+def set_assignment_balance(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        from apps.management.queue import balance_due_expression
+        Assignment.objects.filter(pk=instance.pk).update(balance_due=balance_due_expression())
+
+
+@receiver(post_save, sender=Management)
+def advance_assignment_queue(sender, instance, created, raw=False, **kwargs):
+    """Registrar una gestión reprograma la asignación y libera su arriendo en la cola."""
+    if created and not raw:
+        Assignment.objects.filter(pk=instance.assignment_id).update(
+            next_management=instance.next_management,
+            leased_by=None,
+            lease_expires_at=None,
+        )
@@ -0,0 +1,13 @@
+from apps.jobs.registry import task
+from apps.management import partitions
+from apps.management.queue import refresh_balances
+
+
+@task('management.ensure_partitions')
+def ensure_partitions(months_ahead=3):
+    if not partitions.is_partitioned():
+        return []
+    return partitions.ensure_partitions(months_ahead=months_ahead)
+
+
+task('management.refresh_balances')(refresh_balances)
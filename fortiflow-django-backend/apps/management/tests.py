@@ -1,3 +1,500 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.account.models import CustomUser
+from apps.management import partitions
+from apps.management.distribution import (
+    STRATEGY_BALANCE, STRATEGY_COUNT, STRATEGY_ROUND_ROBIN, distribute,
+)
+from apps.management.forms import AssignmentForm
+from apps.management.ingest import ingest_records, insert_new
+from apps.management.models import Assignment, Management, Program
+from apps.management.queue import QueueUnavailable, lease_next_assignment, release_assignment
+from apps.management.views import ProgramAutocompleteView
+from apps.portfolio.tests import seed_portfolios
+from core.testing import APIQueryCountMixin, QueryPlanAssertionsMixin
+
+
+@skipUnless(connection.vendor == 'postgresql', "Los planes de consulta requieren Postgres")
+class ManagementQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, _, debtors = seed_portfolios()
+        cls.today = date(2025, 6, 1)
+        cls.supervisor = CustomUser.objects.create_user('supervisor', tenant=cls.tenants[0])
+        cls.agents = [
+            CustomUser.objects.create_user(f'agente{i}', tenant=cls.tenants[0]) for i in range(5)
+        ]
+        cls.program = Program.objects.create(title="Campaña", description="", supervisor=cls.supervisor)
+        assignments = Assignment.objects.bulk_create([
+            Assignment(
+                program=cls.program, agent=cls.agents[i % len(cls.agents)], debtor=debtor,
+                tenant_id=cls.tenants[0].pk,
+            )
+            for i, debtor in enumerate(debtors)
+        ])
+        cls.assignment = assignments[0]
+        Management.objects.bulk_create([
+            Management(
+                assignment=assignment, tenant_id=assignment.tenant_id, action="Llamada",
+                type_contact="Directo", effect="Promesa", contact="Titular", phone=3000000,
+                date_enagement=cls.today - timedelta(days=n), commitment="", observation="",
+                next_management=cls.today + timedelta(days=n),
+            )
+            for assignment in assignments
+            for n in range(5)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_management_list(self):
+        queryset = Management.objects.filter(assignment_id=self.assignment.pk).order_by('-id')[:11]
+        self.assertNoSeqScan(queryset, ['management_management'])
+
+    def test_program_managements(self):
+        queryset = Management.objects.filter(assignment__program_id=self.program.pk).order_by('-id')[:11]
+        self.assertNoSeqScan(queryset, ['management_management', 'management_assignment'])
+
+    def test_agenda(self):
+        queryset = Management.objects.filter(next_management=self.today + timedelta(days=1))
+        self.assertUsesIndex(queryset, 'management_next')
+
+    def test_tenant_recent_managements(self):
+        queryset = Management.objects.for_tenant(self.tenants[0].pk).order_by('-date_enagement')[:20]
+        self.assertNoSeqScan(queryset, ['management_management'])
+
+    def test_agent_assignments(self):
+        queryset = Assignment.objects.filter(program_id=self.program.pk, agent_id=self.agents[0].pk)
+        self.assertNoSeqScan(queryset, ['management_assignment'])
+
+    def test_program_autocomplete(self):
+        request = RequestFactory().get('/')
+        request.user, request.tenant_id = self.supervisor, self.tenants[0].pk
+        supervisors = [self.supervisor, *self.agents]
+        Program.objects.bulk_create([
+            Program(title=f"Programa {i}", description="", supervisor=supervisors[i % len(supervisors)])
+            for i in range(2000)
+        ])
+        with connection.cursor() as cursor:
+            # Como haría autovacuum: las filas nuevas salen de la lista pendiente del GIN.
+            cursor.execute("SELECT gin_clean_pending_list('program_title_trgm'::regclass)")
+            cursor.execute("ANALYZE management_program")
+        queryset = ProgramAutocompleteView(request=request).get_queryset('campa')[:11]
+        self.assertUsesIndex(queryset, 'program_title_trgm')
+        self.assertNoSeqScan(queryset, ['management_program', 'account_user'])
+
+
+class ManagementAPIQueryCountTests(APIQueryCountMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, _, debtors = seed_portfolios(debtors=200)
+        cls.supervisor = CustomUser.objects.create_user('supervisor', tenant=cls.tenants[0])
+        cls.agents = [CustomUser.objects.create_user(f'agente{i}', tenant=cls.tenants[0]) for i in range(3)]
+        cls.program = Program.objects.create(title="Campaña", description="", supervisor=cls.supervisor)
+        assignments = Assignment.objects.bulk_create([
+            Assignment(
+                program=cls.program, agent=cls.agents[i % len(cls.agents)], debtor=debtor,
+                tenant_id=cls.tenants[0].pk,
+            )
+            for i, debtor in enumerate(debtors)
+        ])
+        Management.objects.bulk_create([
+            Management(
+                assignment=assignment, tenant_id=assignment.tenant_id, action="Llamada",
+                type_contact="Directo", effect="Promesa", contact="Titular", phone=3000000,
+                date_enagement=date(2025, 6, 1), commitment="", observation="",
+                next_management=date(2025, 6, 2),
+            )
+            for assignment in assignments
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.supervisor)
+
+    def test_assignment_list(self):
+        self.assertQueriesPerPage(self.client, '/api/assignments/', 1)
+
+    def test_program_assignments(self):
+        self.assertQueriesPerPage(self.client, f'/api/assignments/?program={self.program.pk}', 1)
+
+    def test_management_list(self):
+        self.assertQueriesPerPage(self.client, '/api/managements/', 1)
+
+
+class SoftDeletedProgramTests(TestCase):
+    """Las asignaciones y gestiones de un programa borrado dejan de verse antes de la purga."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, _, debtors = seed_portfolios(debtors=10)
+        cls.supervisor = CustomUser.objects.create_user('supervisor', tenant=cls.tenants[0])
+        cls.agent = CustomUser.objects.create_user('agente', tenant=cls.tenants[0])
+        cls.program = Program.objects.create(
+            title="Campaña", description="", supervisor=cls.supervisor, calls_initiated=True,
+        )
+        assignments = Assignment.objects.bulk_create([
+            Assignment(program=cls.program, agent=cls.agent, debtor=debtor, tenant_id=cls.tenants[0].pk)
+            for debtor in debtors[:5]
+        ])
+        Management.objects.bulk_create([
+            Management(
+                assignment=assignment, tenant_id=assignment.tenant_id, action="Llamada",
+                type_contact="Directo", effect="Promesa", contact="Titular", phone=3000000,
+                date_enagement=date(2025, 6, 1), commitment="", observation="",
+                next_management=date(2025, 6, 2),
+            )
+            for assignment in assignments
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_work_queue_skips_deleted_program(self):
+        self.assertIsNotNone(lease_next_assignment(self.program, self.agent))
+        release_assignment(Assignment.objects.filter(program=self.program, leased_by=self.agent).get().pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.program.soft_delete()
+        self.assertIsNone(lease_next_assignment(self.program, self.agent))
+
+    def test_api_hides_dependents(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.program.soft_delete()
+        self.assertEqual(Management.objects.filter(assignment__program=self.program).count(), 5)
+        client = APIClient()
+        client.force_authenticate(self.supervisor)
+        self.assertEqual(client.get('/api/assignments/').json()['results'], [])
+        self.assertEqual(client.get('/api/managements/').json()['results'], [])
+
+    def test_for_user_filters_without_joins(self):
+        for model in (Assignment, Management):
+            self.assertNotIn('JOIN', str(model.objects.for_user(self.supervisor).query))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.program.soft_delete()
+        self.assertNotIn('JOIN', str(Assignment.objects.for_user(self.supervisor).query))
+        # Con un programa pendiente, las gestiones se filtran por subconsulta.
+        self.assertNotIn('JOIN', str(Management.objects.for_user(self.supervisor).query))
+        self.assertFalse(Management.objects.for_user(self.supervisor).exists())
+
+
+class WorkQueueLeaseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, _, debtors = seed_portfolios(debtors=6, obligations_per_debtor=1)
+        cls.shared, cls.other = debtors[0], debtors[2]
+        supervisor = CustomUser.objects.create_user('supervisor', tenant=cls.tenants[0])
+        cls.agents = [CustomUser.objects.create_user(f'agente{i}', tenant=cls.tenants[0]) for i in range(2)]
+        cls.program = Program.objects.create(
+            title="Campaña", description="", supervisor=supervisor, calls_initiated=True,
+        )
+        # El deudor compartido va primero en la cola de ambos agentes.
+        cls.first, cls.second = [
+            Assignment.objects.create(program=cls.program, agent=agent, debtor=cls.shared, priority=10)
+            for agent in cls.agents
+        ]
+        cls.fallback = Assignment.objects.create(program=cls.program, agent=cls.agents[1], debtor=cls.other)
+        foreign_supervisor = CustomUser.objects.create_user('ajeno', tenant=cls.tenants[1])
+        cls.foreign = Program.objects.create(
+            title="Ajena", description="", supervisor=foreign_supervisor, calls_initiated=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+
+    def test_repolling_returns_the_same_lease(self):
+        lease = lease_next_assignment(self.program, self.agents[0], lease_seconds=60, now=self.now)
+        self.assertEqual(lease, self.first)
+        later = self.now + timedelta(seconds=30)
+        again = lease_next_assignment(self.program, self.agents[0], lease_seconds=60, now=later)
+        self.assertEqual(again, self.first)
+        self.assertEqual(again.lease_expires_at, later + timedelta(seconds=60))
+
+    def test_debtor_leased_by_another_agent_is_skipped(self):
+        lease_next_assignment(self.program, self.agents[0], lease_seconds=60, now=self.now)
+        lease = lease_next_assignment(self.program, self.agents[1], lease_seconds=60, now=self.now)
+        self.assertEqual(lease, self.fallback)
+
+    def test_expired_lease_is_reclaimed(self):
+        lease_next_assignment(self.program, self.agents[0], lease_seconds=60, now=self.now)
+        later = self.now + timedelta(seconds=61)
+        lease = lease_next_assignment(self.program, self.agents[1], lease_seconds=60, now=later)
+        self.assertEqual(lease, self.second)
+        # El primer agente ya no retiene al deudor: su cola queda sin trabajo.
+        self.assertIsNone(lease_next_assignment(self.program, self.agents[0], now=later))
+
+    def test_paused_or_finished_program_is_refused(self):
+        for field in ('is_paused', 'is_finished'):
+            with self.subTest(field):
+                Program.objects.filter(pk=self.program.pk).update(**{field: True})
+                self.program.refresh_from_db()
+                with self.assertRaises(QueueUnavailable):
+                    lease_next_assignment(self.program, self.agents[0])
+                self.client.force_login(self.agents[0])
+                response = self.client.post(reverse('work-queue-next', args=[self.program.pk]))
+                self.assertEqual(response.status_code, 409)
+                Program.objects.filter(pk=self.program.pk).update(**{field: False})
+        self.assertFalse(Assignment.objects.filter(leased_by__isnull=False).exists())
+
+    def test_view_leases_only_in_visible_programs(self):
+        self.client.force_login(self.agents[0])
+        response = self.client.post(reverse('work-queue-next', args=[self.program.pk]))
+        self.assertEqual(response.json()['assignment']['id'], self.first.pk)
+        response = self.client.post(reverse('work-queue-next', args=[self.foreign.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class ManagementIngestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, _, debtors = seed_portfolios(debtors=6, obligations_per_debtor=1)
+        cls.agent = CustomUser.objects.create_user('agente', tenant=cls.tenants[0])
+        program = Program.objects.create(title="Campaña", description="", supervisor=cls.agent)
+        cls.first, cls.second = [
+            Assignment.objects.create(program=program, agent=cls.agent, debtor=debtor)
+            for debtor in (debtors[0], debtors[2])
+        ]
+        cls.unassigned = debtors[4]
+        foreign_agent = CustomUser.objects.create_user('ajeno', tenant=cls.tenants[1])
+        foreign_program = Program.objects.create(title="Ajena", description="", supervisor=foreign_agent)
+        cls.foreign = Assignment.objects.create(program=foreign_program, agent=foreign_agent, debtor=debtors[1])
+
+    def record(self, **values):
+        today = timezone.localdate()
+        return {
+            'phone': 3000000, 'action': "Llamada", 'type_contact': "Directo", 'effect': "Promesa",
+            'contact': "Titular", 'date_enagement': today.isoformat(),
+            'next_management': (today + timedelta(days=3)).isoformat(), **values,
+        }
+
+    def ingest(self, records):
+        return ingest_records(enumerate(records, start=1))
+
+    def test_errors_are_reported_per_row(self):
+        result = self.ingest([
+            self.record(assignment=self.first.pk, idempotency_key='a'),
+            self.record(action=''),
+            self.record(agent_username='nadie'),
+            self.record(agent=self.agent.pk, debtor=self.unassigned.pk),
+            self.record(),
+            "no es un objeto",
+            self.record(agent_username='agente', identification=self.second.debtor.identification),
+        ])
+        self.assertEqual(result['received'], 7)
+        self.assertEqual(result['created'], 2)
+        self.assertEqual([row for row, _ in result['errors']], [2, 3, 4, 5, 6])
+        errors = dict(result['errors'])
+        self.assertTrue(errors[2].startswith('action:'))
+        self.assertIn('nadie', errors[3])
+        self.assertEqual(errors[4], "No se encontró la asignación del registro.")
+        self.assertTrue(errors[5].startswith('Varias asignaciones coinciden'))
+        self.assertEqual(
+            set(Management.objects.values_list('assignment_id', flat=True)), {self.first.pk, self.second.pk},
+        )
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.next_management, timezone.localdate() + timedelta(days=3))
+
+    def test_retried_batch_is_not_duplicated(self):
+        records = [
+            self.record(assignment=self.first.pk, idempotency_key='llamada-1'),
+            self.record(assignment=self.second.pk, idempotency_key='llamada-2'),
+            self.record(assignment=self.second.pk, idempotency_key='llamada-2'),
+        ]
+        first = self.ingest(records)
+        self.assertEqual((first['created'], first['duplicates']), (2, 1))
+        retry = self.ingest(records)
+        self.assertEqual((retry['created'], retry['duplicates']), (0, 3))
+        self.assertEqual(Management.objects.count(), 2)
+
+    def test_keys_are_scoped_by_tenant(self):
+        self.ingest([self.record(assignment=self.first.pk, idempotency_key='llamada-1')])
+        result = self.ingest([self.record(assignment=self.foreign.pk, idempotency_key='llamada-1')])
+        self.assertEqual((result['created'], result['duplicates']), (1, 0))
+        self.assertEqual(Management.objects.filter(idempotency_key='llamada-1').count(), 2)
+
+    def test_conflicting_rows_are_not_counted(self):
+        # Una clave que un reintento concurrente insertó entre la consulta y el INSERT.
+        self.ingest([self.record(assignment=self.first.pk, idempotency_key='llamada-1')])
+        fields = {field: value for field, value in self.record().items() if field != 'phone'}
+        managements = [
+            Management(assignment=assignment, tenant_id=assignment.tenant_id, phone=3000000,
+                       idempotency_key='llamada-1', **fields)
+            for assignment in (self.first, self.second)
+        ]
+        managements[1].idempotency_key = 'llamada-2'
+        inserted = insert_new(managements)
+        self.assertEqual([management.assignment_id for management in inserted], [self.second.pk])
+        self.assertEqual(Management.objects.count(), 2)
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, _, cls.debtors = seed_portfolios(portfolios=2, debtors=4, obligations_per_debtor=1)
+        cls.supervisor = CustomUser.objects.create_user('supervisor', tenant=cls.tenants[0])
+        foreign_supervisor = CustomUser.objects.create_user('ajeno', tenant=cls.tenants[1])
+        cls.programs = [
+            Program.objects.create(title=f"Campaña {i}", description="", supervisor=cls.supervisor)
+            for i in range(12)
+        ]
+        cls.foreign = Program.objects.create(title="Campaña ajena", description="", supervisor=foreign_supervisor)
+
+    def setUp(self):
+        self.client.force_login(self.supervisor)
+
+    def options(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_program_options_are_scoped_and_paginated(self):
+        first = self.options('program-autocomplete', q='campa')
+        self.assertEqual(first.count('data-autocomplete-option'), 10)
+        self.assertIn('page=2', first)
+        second = self.options('program-autocomplete', q='campa', page=2)
+        self.assertEqual(second.count('data-autocomplete-option'), 2)
+        self.assertNotIn('Ver más', second)
+        self.assertNotIn('ajena', first + second)
+
+    def test_program_query_matches_title(self):
+        self.assertIn('Campaña 11', self.options('program-autocomplete', q='PAña  11'))
+        # Con menos de tres caracteres se busca por prefijo.
+        self.assertIn('Campaña 11', self.options('program-autocomplete', q='ca'))
+        self.assertIn('Sin resultados', self.options('program-autocomplete', q='añ'))
+
+    def test_user_and_debtor_options_are_scoped(self):
+        users = self.options('user-autocomplete')
+        self.assertIn('supervisor', users)
+        self.assertNotIn('ajeno', users)
+        debtors = self.options('debtor-autocomplete', q='deudor')
+        self.assertEqual(debtors.count('data-autocomplete-option'), 2)
+        self.assertIn(f'data-value="{self.debtors[0].pk}"', debtors)
+        self.assertNotIn(f'data-value="{self.debtors[1].pk}"', debtors)
+
+    def test_widget_shows_only_visible_selection(self):
+        request = RequestFactory().get('/')
+        request.user = self.supervisor
+        program = self.programs[0]
+        form = AssignmentForm(request=request, initial={'program': program.pk})
+        self.assertIn('value="Campaña 0"', str(form['program']))
+        form = AssignmentForm(request=request, data={'program': self.foreign.pk})
+        self.assertIn('program', form.errors)
+        self.assertNotIn('ajena', str(form['program']))
+
+
+class DistributeTests(SimpleTestCase):
+    items = [(1, Decimal('100')), (2, Decimal('60')), (3, Decimal('50')), (4, Decimal('10')), (5, None)]
+
+    def test_round_robin_ignores_load(self):
+        groups = distribute(self.items, [10, 20], STRATEGY_ROUND_ROBIN, loads={10: (50, Decimal('1000'))})
+        self.assertEqual(groups, {10: [1, 3, 5], 20: [2, 4]})
+
+    def test_count_fills_the_least_loaded_agent(self):
+        groups = distribute(self.items, [10, 20, 30], STRATEGY_COUNT, loads={10: (2, Decimal(0))})
+        self.assertEqual({agent: len(ids) for agent, ids in groups.items()}, {10: 1, 20: 2, 30: 2})
+        # Sin carga previa, el empate lo resuelve el saldo acumulado.
+        self.assertEqual(distribute(self.items, [10, 20], STRATEGY_COUNT), {10: [1, 4, 5], 20: [2, 3]})
+
+    def test_balance_evens_out_totals(self):
+        # 100 + 10 frente a 60 + 50; el saldo vacío va al primero en empate.
+        groups = distribute(self.items, [10, 20], STRATEGY_BALANCE)
+        self.assertEqual(groups, {10: [1, 4, 5], 20: [2, 3]})
+        groups = distribute(self.items, [10, 20], STRATEGY_BALANCE, loads={20: (1, Decimal('200'))})
+        self.assertEqual(groups, {10: [1, 2, 3], 20: [4, 5]})
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            distribute(self.items, [], STRATEGY_COUNT)
+        with self.assertRaises(ValueError):
+            distribute(self.items, [10], 'azar')
+
+
+class AssignmentBulkViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, cls.portfolios, _ = seed_portfolios(portfolios=2, debtors=6, obligations_per_debtor=1)
+        cls.supervisor = CustomUser.objects.create_user('supervisor', tenant=cls.tenants[0])
+        cls.agents = [CustomUser.objects.create_user(f'agente{i}', tenant=cls.tenants[0]) for i in range(2)]
+        cls.program = Program.objects.create(title="Campaña", description="", supervisor=cls.supervisor)
+        foreign_supervisor = CustomUser.objects.create_user('ajeno', tenant=cls.tenants[1])
+        cls.foreign = Program.objects.create(title="Ajena", description="", supervisor=foreign_supervisor)
+
+    def setUp(self):
+        self.client.force_login(self.supervisor)
+
+    def test_bulk_assign(self):
+        response = self.client.post(reverse('assignment-bulk-create', args=[self.program.pk]), {
+            'portfolios': [self.portfolios[0].pk], 'agents': [agent.pk for agent in self.agents],
+            'strategy': STRATEGY_ROUND_ROBIN,
+        })
+        self.assertRedirects(response, reverse('assignment-list-program', args=[self.program.pk]))
+        counts = Assignment.objects.filter(program=self.program).values_list('agent_id').annotate(Count('pk'))
+        self.assertEqual(sorted(total for _, total in counts), [1, 2])
+
+    def test_foreign_program_is_not_found(self):
+        for name in ('assignment-bulk-create', 'assignment-rebalance'):
+            with self.subTest(name):
+                self.assertEqual(self.client.get(reverse(name, args=[self.program.pk])).status_code, 200)
+                response = self.client.post(reverse(name, args=[self.foreign.pk]), {
+                    'portfolios': [self.portfolios[1].pk], 'agents': [self.agents[0].pk],
+                    'strategy': STRATEGY_ROUND_ROBIN,
+                })
+                self.assertEqual(response.status_code, 404)
+        self.assertFalse(Assignment.objects.filter(program=self.foreign).exists())
+
+
+@skipUnless(connection.vendor == 'postgresql', "Las particiones requieren Postgres")
+class ManagementPartitionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, _, debtors = seed_portfolios(debtors=2)
+        supervisor = CustomUser.objects.create_user('supervisor', tenant=cls.tenants[0])
+        program = Program.objects.create(title="Campaña", description="", supervisor=supervisor)
+        cls.assignment = Assignment.objects.create(program=program, agent=supervisor, debtor=debtors[0])
+
+    def partition_of(self, day):
+        management = Management.objects.create(
+            assignment=self.assignment, action="Llamada", type_contact="Directo", effect="Promesa",
+            contact="Titular", phone=3000000, date_enagement=day, commitment="", observation="",
+            next_management=day,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT tableoid::regclass::text FROM "{partitions.TABLE}" WHERE id = %s', [management.pk],
+            )
+            return cursor.fetchone()[0]
+
+    def test_old_history_goes_to_archive(self):
+        today = timezone.localdate()
+        self.assertEqual(self.partition_of(date(1901, 1, 1)), partitions.ARCHIVE_PARTITION)
+        self.assertEqual(self.partition_of(today), partitions.partition_name(partitions.month_start(today)))
+        self.assertEqual(partitions.ensure_partitions(), [])
+
+    def test_retention_detaches_archive(self):
+        current = partitions.month_start(timezone.localdate())
+        # La base de pruebas migró sin gestiones: el archivo termina en el mes actual.
+        bound = partitions.archive_bound()
+        self.assertEqual(bound, current)
+        self.assertFalse(partitions.archive_before(partitions.add_months(bound, -1)))
+        self.assertTrue(partitions.archive_before(bound))
+
+        output = StringIO()
+        call_command('management_partitions', retain_months=24, dry_run=True, stdout=output)
+        self.assertNotIn(partitions.ARCHIVE_PARTITION, output.getvalue())
+        call_command('management_partitions', retain_months=1, dry_run=True, stdout=output)
+        self.assertIn(f"Separar {partitions.ARCHIVE_PARTITION}", output.getvalue())
+
+        call_command('management_partitions', retain_months=1, drop=True, stdout=StringIO())
+        self.assertIsNone(partitions.archive_bound())
+        self.assertEqual(partitions.list_partitions()[0], current)
@@ -1,9 +1,10 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('programs/', views.ProgramListView.as_view(), name='program-list'),
     path('programs/create/', views.ProgramCreateView.as_view(), name='program-create'),
+    path('programs/autocomplete/', views.ProgramAutocompleteView.as_view(), name='program-autocomplete'),
     path('programs/<int:pk>/edit/', views.ProgramEditView.as_view(), name='program-edit'),
     path('programs/<int:pk>/delete/', views.ProgramDeleteView.as_view(), name='program-delete'),
 
@@ -15,10 +16,21 @@ urlpatterns = [
     path('assignments/edit/<int:pk>/', views.AssignmentEditView.as_view(), name='assignment-edit'),
     path('assignments/edit/<int:pk>/<int:program_id>/', views.AssignmentEditView.as_view(), name='assignment-edit-program'),
     path('assignments/delete/<int:pk>/', views.AssignmentDeleteView.as_view(), name='assignment-delete'),
+    path('programs/<int:program_id>/assignments/bulk/', views.AssignmentBulkCreateView.as_view(), name='assignment-bulk-create'),
+    path('programs/<int:program_id>/assignments/rebalance/', views.AssignmentRebalanceView.as_view(), name='assignment-rebalance'),
+
+    # Work queue URLs
+    path('programs/<int:program_id>/queue/next/', views.WorkQueueNextView.as_view(), name='work-queue-next'),
+    path('assignments/<int:pk>/queue/release/', views.WorkQueueReleaseView.as_view(), name='work-queue-release'),
 
     # Management URLs
     path('managements/<int:assignment_id>/', views.ManagementListView.as_view(), name='management-list'),
+    path('managements/<int:assignment_id>/export/', views.ManagementExportView.as_view(), name='management-export'),
+    path('programs/<int:program_id>/managements/export/', views.ManagementExportView.as_view(), name='management-export-program'),
     path('managements/create/<int:assignment_id>/', views.ManagementCreateView.as_view(), name='management-create'),
     path('managements/edit/<int:pk>/', views.ManagementEditView.as_view(), name='management-edit'),
     path('managements/delete/<int:pk>/', views.ManagementDeleteView.as_view(), name='management-delete'),
+
+    # API
+    path('api/managements/batch/', api.ManagementBatchAPIView.as_view(), name='management-batch-api'),
 ]
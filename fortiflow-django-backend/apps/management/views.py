@@ -1,24 +1,42 @@
 # --- Management Edit View ---
+import json
 from django.urls import reverse
 from .models import Management
 from .forms import ManagementForm
-from django.views.generic import UpdateView, DeleteView, ListView, CreateView
-from django.http import HttpResponse
+from django.views.generic import UpdateView, DeleteView, ListView, CreateView, FormView
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
+from django.views import View
+from django.db.models import Value
+from django.db.models.functions import Upper
 from .models import Program, Assignment, Management
-from .forms import ProgramForm, AssignmentForm
-from core.mixins import SmartPaginationMixin
+from .forms import ProgramForm, AssignmentForm, BulkAssignmentForm, AssignmentRebalanceForm
+from apps.account.models import CustomUser
+from apps.portfolio.models import Debtor
+from core.cache import bump_generation
+from core.events import table_changed
+from core.mixins import ConditionalListMixin, SmartPaginationMixin, ExportMixin
+from core.views import AutocompleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
 
 
-class ManagementListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
+class ManagementListView(LoginRequiredMixin, ConditionalListMixin, SmartPaginationMixin, ListView):
     model = Management
     context_object_name = 'managements'
     paginate_by = 10
+    etag_models = (Assignment,)
+    keyset_ordering = '-id'
+    approximate_count_threshold = 10000
 
     def get_queryset(self):
         assignment_id = self.kwargs.get('assignment_id')
-        queryset = super().get_queryset().filter(assignment_id=assignment_id)
+        program_id = self.kwargs.get('program_id')
+        queryset = super().get_queryset().for_user(self.request.user)
+        if program_id:
+            queryset = queryset.filter(assignment__program_id=program_id)
+        else:
+            queryset = queryset.filter(assignment_id=assignment_id)
         accion = self.request.GET.get('accion', '').strip()
         contacto = self.request.GET.get('contacto', '').strip()
         telefono = self.request.GET.get('telefono', '').strip()
@@ -42,6 +60,31 @@ class ManagementListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
         context['request'] = self.request
         return context
 
+class ManagementExportView(ExportMixin, ManagementListView):
+    export_columns = (
+        ('ID', 'id'),
+        ('Asignación', 'assignment_id'),
+        ('Programa', 'assignment__program__title'),
+        ('Agente', 'assignment__agent__username'),
+        ('Identificación', 'assignment__debtor__identification'),
+        ('Deudor', 'assignment__debtor__name'),
+        ('Acción', 'action'),
+        ('Tipo contacto', 'type_contact'),
+        ('Efecto', 'effect'),
+        ('Contacto', 'contact'),
+        ('Teléfono', 'phone'),
+        ('Fecha gestión', 'date_enagement'),
+        ('Compromiso', 'commitment'),
+        ('Observación', 'observation'),
+        ('Próxima gestión', 'next_management'),
+    )
+
+    def get_export_filename(self):
+        if self.kwargs.get('program_id'):
+            return f"gestiones_programa_{self.kwargs['program_id']}"
+        return f"gestiones_asignacion_{self.kwargs.get('assignment_id')}"
+
+
 class ManagementCreateView(LoginRequiredMixin, CreateView):
     model = Management
     form_class = ManagementForm
@@ -124,6 +167,9 @@ class ManagementDeleteView(LoginRequiredMixin, DeleteView):
         self.object = self.get_object()
         assignment_id = self.object.assignment_id
         response = super().delete(request, *args, **kwargs)
+        # Management no tiene receptor de post_delete (ver ManagementConfig).
+        bump_generation(Management, tenant_ids=[self.object.tenant_id])
+        table_changed(Management, self.object.tenant_id)
         if self.request.headers.get('HX-Request') or self.request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return HttpResponse(status=204)
         return response
@@ -158,11 +204,16 @@ class ProgramEditView(LoginRequiredMixin, UpdateView):
 class ProgramDeleteView(LoginRequiredMixin, DeleteView):
     model = Program
 
-    def delete(self, request, *args, **kwargs):
-        response = super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        # Se oculta ya; asignaciones y gestiones se purgan por lotes.
+        self.object.soft_delete(user=self.request.user)
         if self.request.headers.get('HX-Request'):
             return HttpResponse(status=204, headers={'HX-Trigger': 'reload-table'})
-        return response
+        return redirect(self.get_success_url())
+
+    def delete(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return self.form_valid(None)
 
     def get_success_url(self):
         return reverse_lazy('program-list')
@@ -198,6 +249,25 @@ class ProgramListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
         # Puedes agregar más contexto si es necesario
         return context
 
+class ProgramAutocompleteView(AutocompleteView):
+    """
+    Programas del tenant por texto contenido en el título (índice
+    `program_title_trgm`); con menos de `MIN_TRIGRAM_LENGTH` caracteres, por
+    prefijo.
+    """
+
+    def get_queryset(self, query):
+        from apps.portfolio.search import MIN_TRIGRAM_LENGTH
+        programs = programs_for(self.request).only('title').order_by('-id')
+        text = ' '.join(query.split())
+        if not text:
+            return programs
+        # Las mayúsculas del texto las pone Postgres, igual que las del índice.
+        programs = programs.alias(upper_title=Upper('title'))
+        if len(text) >= MIN_TRIGRAM_LENGTH:
+            return programs.filter(upper_title__contains=Upper(Value(text)))
+        return programs.filter(upper_title__startswith=Upper(Value(text)))
+
 class ProgramCreateView(CreateView):
     model = Program
     form_class = ProgramForm
@@ -225,13 +295,16 @@ class ProgramCreateView(CreateView):
         context = super().get_context_data(**kwargs)
         return context
 
-class AssignmentListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
+class AssignmentListView(LoginRequiredMixin, ConditionalListMixin, SmartPaginationMixin, ListView):
     model = Assignment
     context_object_name = 'assignments'
     paginate_by = 10
+    count_cache_models = (Program, CustomUser, Debtor)
+    keyset_ordering = '-id'
+    approximate_count_threshold = 10000
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().for_user(self.request.user)
         program_id = self.kwargs.get('program_id', None)
         if program_id:
             queryset = queryset.filter(program_id=program_id)
@@ -277,6 +350,7 @@ class AssignmentCreateView(LoginRequiredMixin, CreateView):
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
+        kwargs['request'] = self.request
         program_id = self.kwargs.get('program_id', None)
         if program_id is not None:
             from django.shortcuts import get_object_or_404
@@ -325,6 +399,7 @@ class AssignmentEditView(LoginRequiredMixin, UpdateView):
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
+        kwargs['request'] = self.request
         program_id = self.kwargs.get('program_id', None)
         if program_id is not None:
             from django.shortcuts import get_object_or_404
@@ -370,3 +445,120 @@ class AssignmentDeleteView(LoginRequiredMixin, DeleteView):
 
     def get_success_url(self):
         return reverse_lazy('assignment-list')
+
+
+def programs_for(request):
+    """
+    Programas que ve el usuario: todos si es superusuario, los de su tenant si
+    no. El tenant se resuelve con una subconsulta sobre los usuarios (índice
+    de `tenant_id`) en lugar de un join con cada supervisor.
+    """
+    programs = Program.objects.all()
+    if request.user.is_superuser:
+        return programs
+    return programs.filter(supervisor_id__in=CustomUser.objects.filter(tenant_id=request.tenant_id).values('pk'))
+
+
+class AssignmentBulkCreateView(LoginRequiredMixin, FormView):
+    """Asigna de una vez los deudores de una o varias carteras a varios agentes del programa."""
+    form_class = BulkAssignmentForm
+    template_name = 'assignments/partials/assignment_bulk.html'
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            self.program = get_object_or_404(programs_for(request), pk=kwargs['program_id'])
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['program'] = self.program
+        return kwargs
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['program'] = self.program
+        return context
+
+    def form_valid(self, form):
+        from .distribution import bulk_assign
+        data = form.cleaned_data
+        created = bulk_assign(
+            self.program, data['agents'], data['portfolios'], data['strategy'],
+            portfolio_type=data['portfolio_type'] or None,
+            min_days_delinquency=data['min_days_delinquency'],
+        )
+        message = f"{sum(created.values())} deudores asignados a {len(created)} agentes."
+        if self.request.headers.get('HX-Request'):
+            return HttpResponse(status=204, headers={
+                'HX-Trigger': json.dumps({'assignmentsDistributed': message, 'reload-table': True}),
+            })
+        return redirect('assignment-list-program', program_id=self.program.pk)
+
+
+class AssignmentRebalanceView(AssignmentBulkCreateView):
+    """Reparte entre otros agentes las asignaciones de un agente que deja el programa."""
+    form_class = AssignmentRebalanceForm
+    template_name = 'assignments/partials/assignment_rebalance.html'
+
+    def form_valid(self, form):
+        from .distribution import rebalance
+        data = form.cleaned_data
+        moved = rebalance(self.program, data['from_agent'], data['agents'], data['strategy'])
+        message = f"{sum(moved.values())} asignaciones de {data['from_agent']} repartidas."
+        if self.request.headers.get('HX-Request'):
+            return HttpResponse(status=204, headers={
+                'HX-Trigger': json.dumps({'assignmentsDistributed': message, 'reload-table': True}),
+            })
+        return redirect('assignment-list-program', program_id=self.program.pk)
+
+
+class WorkQueueNextView(LoginRequiredMixin, View):
+    """
+    Entrega al agente su siguiente asignación del programa (POST). Con HTMX
+    redirige a sus gestiones; si no, responde JSON.
+    """
+    http_method_names = ['post']
+
+    def post(self, request, program_id):
+        from .queue import QueueUnavailable, lease_next_assignment
+        program = get_object_or_404(programs_for(request), pk=program_id)
+        try:
+            assignment = lease_next_assignment(program, request.user)
+        except QueueUnavailable as e:
+            if request.headers.get('HX-Request'):
+                return HttpResponse(status=204, headers={'HX-Trigger': json.dumps({'queue-unavailable': str(e)})})
+            return JsonResponse({'error': str(e)}, status=409)
+
+        if assignment is None:
+            if request.headers.get('HX-Request'):
+                return HttpResponse(status=204, headers={'HX-Trigger': 'queue-empty'})
+            return JsonResponse({'assignment': None})
+
+        url = reverse('management-list', args=[assignment.pk])
+        if request.headers.get('HX-Request'):
+            return HttpResponse(status=204, headers={'HX-Redirect': url})
+        return JsonResponse({
+            'assignment': {
+                'id': assignment.pk,
+                'debtor_id': assignment.debtor_id,
+                'debtor': assignment.debtor.name,
+                'identification': assignment.debtor.identification,
+                'priority': assignment.priority,
+                'next_management': assignment.next_management,
+                'balance_due': assignment.balance_due,
+                'url': url,
+            },
+            'lease_expires_at': assignment.lease_expires_at,
+        })
+
+
+class WorkQueueReleaseView(LoginRequiredMixin, View):
+    """Devuelve a la cola una asignación arrendada por el agente sin registrar gestión."""
+    http_method_names = ['post']
+
+    def post(self, request, pk):
+        from .queue import release_assignment
+        released = release_assignment(pk, agent=request.user)
+        if request.headers.get('HX-Request'):
+            return HttpResponse(status=204, headers={'HX-Trigger': 'reload-table'})
+        return JsonResponse({'released': released})
@@ -0,0 +1,14 @@
+from django.utils.functional import SimpleLazyObject
+
+from apps.notification.inbox import unread_count
+
+
+def notifications(request):
+    """
+    `unread_notifications` para el contador del menú. Se evalúa solo si la
+    plantilla lo usa y sale de la caché (ver inbox.unread_count).
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'unread_notifications': SimpleLazyObject(lambda: unread_count(user))}
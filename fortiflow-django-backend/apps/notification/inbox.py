@@ -0,0 +1,152 @@
+"""
+Bandeja de notificaciones por usuario.
+
+Las notificaciones globales no se copian a cada usuario: un usuario ha leído
+todas las globales con id menor o igual a su `NotificationWatermark`, más las
+que haya abierto una a una (fila en NotificationUser con `is_read`). Las
+dirigidas sí tienen su fila en NotificationUser.
+
+El total de no leídas se guarda por usuario en la caché `default`, compartida
+por todos los procesos. Su clave lleva una marca de las globales, también en
+esa caché: publicar o borrar una global la cambia (invalida a todos sin
+recorrerlos) y las escrituras de un usuario borran solo su entrada. Así el
+contador del menú no consulta la base con la caché caliente.
+"""
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import BooleanField, Case, Exists, Max, OuterRef, Q, Value, When
+
+from apps.notification.models import Notification, NotificationUser, NotificationWatermark
+from core.events import publish_to_users
+
+GLOBAL_MARK_KEY = 'notifications:global-mark'
+
+
+def global_mark():
+    """
+    Marca actual de las globales. Si se perdió se crea una nueva al azar (no
+    un contador), para no volver a una marca con totales viejos guardados.
+    """
+    mark = cache.get(GLOBAL_MARK_KEY)
+    if mark is None:
+        cache.add(GLOBAL_MARK_KEY, uuid4().hex, None)
+        mark = cache.get(GLOBAL_MARK_KEY)
+    return mark
+
+
+def bump_global_mark():
+    """Cambia la marca de las globales al confirmar la transacción."""
+    transaction.on_commit(lambda: cache.set(GLOBAL_MARK_KEY, uuid4().hex, None))
+
+
+def unread_count_key(user_id, mark):
+    return f"notifications:unread:{user_id}:{mark}"
+
+
+def get_watermark(user):
+    return (
+        NotificationWatermark.objects.filter(user=user)
+        .values_list('last_seen_global_id', flat=True)
+        .first()
+    ) or 0
+
+
+def notifications_for(user, watermark=None):
+    """Notificaciones visibles para `user`, anotadas con `is_read`."""
+    if watermark is None:
+        watermark = get_watermark(user)
+    rows = NotificationUser.objects.filter(notification=OuterRef('pk'), user=user)
+    return (
+        Notification.objects
+        .filter(Q(is_global=True) | Exists(rows))
+        .annotate(is_read=Case(
+            When(is_global=True, pk__lte=watermark, then=Value(True)),
+            default=Exists(rows.filter(is_read=True)),
+            output_field=BooleanField(),
+        ))
+    )
+
+
+def unread_for(user, watermark=None):
+    if watermark is None:
+        watermark = get_watermark(user)
+    read = NotificationUser.objects.filter(notification=OuterRef('pk'), user=user, is_read=True)
+    unread = NotificationUser.objects.filter(notification=OuterRef('pk'), user=user, is_read=False)
+    return Notification.objects.filter(
+        Q(~Exists(read), is_global=True, pk__gt=watermark) | Q(Exists(unread))
+    )
+
+
+def unread_count(user):
+    """Total de no leídas de `user`; con la caché caliente no consulta la base."""
+    key = unread_count_key(user.pk, global_mark())
+    count = cache.get(key)
+    if count is None:
+        count = unread_for(user).count()
+        cache.set(key, count, getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TIMEOUT', 300))
+    return count
+
+
+def forget_unread_counts(user_ids):
+    user_ids = list(user_ids)
+
+    def forget():
+        mark = global_mark()
+        cache.delete_many([unread_count_key(user_id, mark) for user_id in user_ids])
+
+    # Tras el commit: antes, otra petición podría volver a cachear el total viejo.
+    transaction.on_commit(forget)
+
+
+def notify(title, message, users=None):
+    """
+    Publica una notificación. Sin `users` es global: una sola fila, sin
+    importar cuántos usuarios haya.
+    """
+    if users is None:
+        # La señal post_save cambia la marca de las globales.
+        return Notification.objects.create(title=title, message=message, is_global=True)
+    user_ids = [getattr(user, 'pk', user) for user in users]
+    with transaction.atomic():
+        notification = Notification.objects.create(title=title, message=message)
+        NotificationUser.objects.bulk_create(
+            [NotificationUser(notification=notification, user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+    forget_unread_counts(user_ids)
+    publish_to_users(user_ids, 'notification', {'title': title})
+    return notification
+
+
+def mark_read(user, notification):
+    if notification.is_global:
+        NotificationUser.objects.update_or_create(
+            notification=notification, user=user, defaults={'is_read': True}
+        )
+    else:
+        NotificationUser.objects.filter(notification=notification, user=user).update(is_read=True)
+    forget_unread_counts([user.pk])
+
+
+def mark_all_read(user):
+    """
+    Marca todo como leído: un UPDATE para las dirigidas y mover la marca de
+    agua hasta la última global, sin crear filas por notificación.
+    """
+    last_global_id = Notification.objects.filter(is_global=True).aggregate(last=Max('pk'))['last'] or 0
+    with transaction.atomic():
+        NotificationUser.objects.filter(user=user, is_read=False).update(is_read=True)
+        NotificationWatermark.objects.bulk_create(
+            [NotificationWatermark(user=user, last_seen_global_id=last_global_id)],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['last_seen_global_id', 'updated_at'],
+        )
+    publish_to_users([user.pk], 'notification')
+    cache.set(
+        unread_count_key(user.pk, global_mark()), 0,
+        getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TIMEOUT', 300),
+    )
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_alter_customuser_table'),
+        ('notification', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationWatermark',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_watermark', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_seen_global_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['is_global', 'id'], name='notification_global'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationuser',
+            index=models.Index(fields=['user', 'is_read'], name='notification_user_unread'),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationuser',
+            constraint=models.UniqueConstraint(fields=('notification', 'user'), name='notification_user_unique'),
+        ),
+    ]
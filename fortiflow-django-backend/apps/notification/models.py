@@ -10,15 +10,41 @@ class Notification(models.Model):
 
     users = models.ManyToManyField(CustomUser, through="NotificationUser", related_name="notifications")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_global', 'id'], name='notification_global'),
+        ]
+
     def __str__(self):
         return self.title
 
 
 class NotificationUser(models.Model):
+    # Las notificaciones globales no tienen filas aquí salvo que el usuario
+    # lea una en particular; su estado de lectura sale de NotificationWatermark.
     notification = models.ForeignKey(Notification, on_delete=models.CASCADE)
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     is_read = models.BooleanField(default=False)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'user'], name='notification_user_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'is_read'], name='notification_user_unread'),
+        ]
+
     def __str__(self):
-        return self.Notification.title
+        return self.notification.title
+
 
+class NotificationWatermark(models.Model):
+    """Última notificación global vista por el usuario: las anteriores cuentan como leídas."""
+    user = models.OneToOneField(
+        CustomUser, on_delete=models.CASCADE, primary_key=True, related_name="notification_watermark"
+    )
+    last_seen_global_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user} ({self.last_seen_global_id})"
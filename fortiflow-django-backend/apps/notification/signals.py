@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.notification.inbox import bump_global_mark, forget_unread_counts
+from apps.notification.models import Notification, NotificationUser
+from core.events import publish, publish_to_users
+
+
+@receiver(post_save, sender=Notification)
+def publish_notification(sender, instance, created, raw=False, **kwargs):
+    # Una global cambia el total de todos los usuarios; las dirigidas se
+    # invalidan al crear sus filas de NotificationUser.
+    if instance.is_global and not raw:
+        bump_global_mark()
+        if created:
+            publish('all', 'notification', {'title': instance.title})
+
+
+@receiver(post_delete, sender=Notification)
+def remove_notification(sender, instance, **kwargs):
+    if instance.is_global:
+        bump_global_mark()
+
+
+@receiver(post_save, sender=NotificationUser)
+@receiver(post_delete, sender=NotificationUser)
+def forget_user_count(sender, instance, created=False, **kwargs):
+    forget_unread_counts([instance.user_id])
+    data = {'title': instance.notification.title} if created and not instance.is_read else None
+    publish_to_users([instance.user_id], 'notification', data)
@@ -1,3 +1,124 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from apps.account.models import CustomUser
+from apps.notification.context_processors import notifications
+from apps.notification.inbox import (
+    mark_all_read, mark_read, notifications_for, notify, unread_count, unread_for,
+)
+from apps.notification.models import Notification, NotificationUser, NotificationWatermark
+
+
+class NotificationBadgeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username="agente", password="x")
+
+    def setUp(self):
+        cache.clear()
+
+    def render_layout(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        return render_to_string('layouts/base.html', request=request)
+
+    def test_warm_badge_renders_without_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify("Aviso", "Para todos")
+        self.render_layout()
+        with self.assertNumQueries(0):
+            html = self.render_layout()
+        self.assertIn('<span class="badge badge-sm badge-primary">1</span>', html)
+
+    def test_global_publish_refreshes_badge(self):
+        self.assertEqual(unread_count(self.user), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            notify("Aviso", "Para todos")
+        self.assertEqual(unread_count(self.user), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            notify("Otro", "Para todos")
+        self.assertEqual(unread_count(self.user), 2)
+
+
+class NotificationInboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.other = [
+            CustomUser.objects.create_user(username=name, password="x") for name in ("agente", "otro")
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def publish_globals(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            return [notify(f"Global {i}", "Para todos") for i in range(count)]
+
+    def test_globals_are_not_copied_per_user(self):
+        self.publish_globals(3)
+        self.assertFalse(NotificationUser.objects.exists())
+        self.assertEqual(unread_count(self.user), 3)
+        self.assertEqual(unread_count(self.other), 3)
+
+    def test_watermark_marks_older_globals_as_read(self):
+        first, second, third = self.publish_globals(3)
+        NotificationWatermark.objects.create(user=self.user, last_seen_global_id=second.pk)
+        self.assertEqual(list(unread_for(self.user)), [third])
+        read = dict(notifications_for(self.user).values_list('pk', 'is_read'))
+        self.assertEqual(read, {first.pk: True, second.pk: True, third.pk: False})
+        # Sin marca de agua, el otro usuario no leyó ninguna.
+        self.assertEqual(unread_for(self.other).count(), 3)
+
+    def test_global_read_one_by_one_above_watermark(self):
+        first, second = self.publish_globals(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_read(self.user, second)
+        self.assertEqual(unread_count(self.user), 1)
+        self.assertEqual(list(unread_for(self.user)), [first])
+        self.assertEqual(unread_count(self.other), 2)
+
+    def test_targeted_notifications(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = notify("Directa", "Solo para ti", users=[self.user])
+        self.assertEqual(unread_count(self.user), 1)
+        self.assertEqual(unread_count(self.other), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_read(self.user, notification)
+        self.assertEqual(unread_count(self.user), 0)
+
+    def test_mark_all_read_is_one_update(self):
+        self.publish_globals(5)
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                notify(f"Directa {i}", "Solo para ti", users=[self.user, self.other])
+        self.assertEqual(unread_count(self.user), 8)
+        with CaptureQueriesContext(connection) as queries:
+            mark_all_read(self.user)
+        statements = [query['sql'] for query in queries if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        updates = [sql for sql in statements if sql.startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"notification_notificationuser"', updates[0])
+        self.assertFalse([sql for sql in statements if 'INSERT INTO "notification_notificationuser"' in sql])
+        self.assertEqual(len(statements), 3)  # MAX de las globales, UPDATE y la marca de agua.
+        self.assertEqual(unread_count(self.user), 0)
+        self.assertEqual(unread_count(self.other), 8)
+        last_global = Notification.objects.filter(is_global=True).latest('pk')
+        self.assertEqual(self.user.notification_watermark.last_seen_global_id, last_global.pk)
+
+    def test_new_global_after_mark_all_read(self):
+        self.publish_globals(2)
+        mark_all_read(self.user)
+        self.publish_globals(1)
+        self.assertEqual(unread_count(self.user), 1)
+
+    def test_context_processor_resolves_lazily(self):
+        self.publish_globals(2)
+        request = RequestFactory().get('/')
+        request.user = self.user
+        with self.assertNumQueries(0):
+            context = notifications(request)
+        with self.assertNumQueries(2):  # Marca de agua y total.
+            self.assertEqual(context['unread_notifications'], 2)
@@ -0,0 +1,11 @@
+from django.urls import path
+from apps.notification.views import (
+    NotificationBadgeView, NotificationListView, NotificationReadAllView, NotificationReadView,
+)
+
+urlpatterns = [
+    path("", NotificationListView.as_view(), name="notification-list"),
+    path("badge/", NotificationBadgeView.as_view(), name="notification-badge"),
+    path("read/<int:pk>/", NotificationReadView.as_view(), name="notification-read"),
+    path("read/all/", NotificationReadAllView.as_view(), name="notification-read-all"),
+]
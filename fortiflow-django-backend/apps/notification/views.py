@@ -1,3 +1,55 @@
-from django.shortcuts import render
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.views import View
+from django.views.generic import ListView
 
-# Create your views here.
+from apps.notification.inbox import mark_all_read, mark_read, notifications_for, unread_count
+from apps.notification.models import Notification
+from core.mixins import SmartPaginationMixin
+
+
+class NotificationListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
+    model = Notification
+    context_object_name = 'notifications'
+    paginate_by = 10
+    pagination_mode = 'keyset'
+    keyset_ordering = '-id'
+
+    def get_queryset(self):
+        return notifications_for(self.request.user).order_by('-id')
+
+    def get_template_names(self):
+        if self.request.headers.get("HX-Request"):
+            return ["notifications/partials/notification_list.html"]
+        return ["notifications/show.html"]
+
+
+class NotificationBadgeView(LoginRequiredMixin, View):
+    """Contador del menú, para refrescarlo con HTMX tras marcar como leídas."""
+
+    def get(self, request):
+        return render(request, "notifications/partials/badge.html", {
+            'unread_notifications': unread_count(request.user),
+        })
+
+
+class NotificationReadView(LoginRequiredMixin, View):
+    http_method_names = ['post']
+
+    def post(self, request, pk):
+        notification = get_object_or_404(notifications_for(request.user), pk=pk)
+        mark_read(request.user, notification)
+        if request.headers.get('HX-Request'):
+            return HttpResponse(status=204, headers={'HX-Trigger': 'notificationsRead, reload-table'})
+        return redirect('notification-list')
+
+
+class NotificationReadAllView(LoginRequiredMixin, View):
+    http_method_names = ['post']
+
+    def post(self, request):
+        mark_all_read(request.user)
+        if request.headers.get('HX-Request'):
+            return HttpResponse(status=204, headers={'HX-Trigger': 'notificationsRead, reload-table'})
+        return redirect('notification-list')
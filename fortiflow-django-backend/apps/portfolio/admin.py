@@ -1,6 +1,7 @@
 from django.contrib import admin
-from apps.portfolio.models import Portfolio, Debtor, Obligation
+from apps.portfolio.models import Portfolio, Debtor, Obligation, PortfolioStats
 
 admin.site.register(Portfolio)
 admin.site.register(Debtor)
 admin.site.register(Obligation)
+admin.site.register(PortfolioStats)
@@ -0,0 +1,62 @@
+from rest_framework import viewsets
+
+from apps.portfolio.import_validation import normalize_identification
+from apps.portfolio.models import Debtor, Obligation, Portfolio, PortfolioStats
+from apps.portfolio.serializers import DebtorSerializer, ObligationSerializer, PortfolioSerializer
+from core.api import BulkWriteMixin, IndexedFilterMixin, TenantScopedViewSetMixin, previous_values
+from core.pagination import KeysetPagination
+
+
+class PortfolioViewSet(TenantScopedViewSetMixin, IndexedFilterMixin, viewsets.ModelViewSet):
+    queryset = (
+        Portfolio.objects.select_related('contract__client')
+        .only(
+            'name', 'description', 'status', 'date_created', 'date_updated', 'tenant_id',
+            'contract__id', 'contract__client__id', 'contract__client__name',
+        )
+        .order_by('-id')
+    )
+    serializer_class = PortfolioSerializer
+    filter_fields = {
+        'contract': 'contract_id',
+    }
+
+
+class DebtorViewSet(TenantScopedViewSetMixin, IndexedFilterMixin, BulkWriteMixin, viewsets.ModelViewSet):
+    queryset = (
+        Debtor.objects
+        .only('name', 'identification', 'number_phone', 'address', 'email', 'tenant_id')
+        .order_by('-id')
+    )
+    serializer_class = DebtorSerializer
+    pagination_class = KeysetPagination
+    filter_fields = {
+        'identification': ('identification_normalized__startswith', normalize_identification),
+    }
+
+
+class ObligationViewSet(TenantScopedViewSetMixin, IndexedFilterMixin, BulkWriteMixin, viewsets.ModelViewSet):
+    queryset = (
+        Obligation.objects.select_related('debtor')
+        .only(
+            'portfolio_id', 'portfolio_type', 'credit', 'amount', 'date_amount', 'expiration_date',
+            'days_delinquency', 'status', 'balance', 'interest', 'fee', 'tenant_id',
+            'debtor__id', 'debtor__name',
+        )
+        .order_by('-id')
+    )
+    serializer_class = ObligationSerializer
+    pagination_class = KeysetPagination
+    filter_fields = {
+        'portfolio': 'portfolio_id',
+        'debtor': 'debtor_id',
+        'expiration_from': 'expiration_date__gte',
+        'expiration_to': 'expiration_date__lte',
+    }
+
+    def after_bulk_write(self, objects, created):
+        super().after_bulk_write(objects, created)
+        # Las señales que mantienen PortfolioStats no corren con bulk_create ni
+        # bulk_update: se recalculan los portafolios de destino y de origen.
+        portfolio_ids = {obj.portfolio_id for obj in objects} | previous_values(objects, 'portfolio_id')
+        PortfolioStats.objects.rebuild(portfolio_ids)
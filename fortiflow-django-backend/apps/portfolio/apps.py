@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class PortfolioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.portfolio'
+
+    def ready(self):
+        from apps.portfolio import signals  # noqa: F401
+        from core.cache import track_model_writes
+        from core.events import track_table_events
+        from core.fragments import track_row_versions
+        track_model_writes(*(self.get_model(name) for name in ('Portfolio', 'Debtor', 'Obligation')))
+        track_table_events(self.get_model('Portfolio'), self.get_model('Obligation'))
+        track_row_versions(*(self.get_model(name) for name in ('Portfolio', 'Debtor', 'Obligation')))
@@ -0,0 +1,93 @@
+"""
+Validación en lote de la unicidad de deudores: identificación normalizada y
+correo (sin distinguir mayúsculas) dentro de cada tenant.
+
+Un lote se compara consigo mismo en memoria y contra la base de datos con una
+consulta por bloque de `DEBTOR_VALIDATION_CHUNK_SIZE` registros, resuelta por
+los índices `debtor_unique_tenant_ident` y `debtor_tenant_email`. La
+restricción única sobre la identificación es la garantía final cuando dos
+escrituras concurrentes pasan la validación a la vez.
+"""
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from apps.portfolio.import_validation import normalize_identification
+from apps.portfolio.models import Debtor
+
+INVALID_IDENTIFICATION = "La identificación debe contener letras o números."
+DUPLICATE_IDENTIFICATION = "Ya existe un deudor con esta identificación."
+DUPLICATE_EMAIL = "Ya existe un deudor con este correo electrónico."
+REPEATED_IDENTIFICATION = "Identificación repetida en el lote (elemento {index})."
+REPEATED_EMAIL = "Correo repetido en el lote (elemento {index})."
+
+
+def _keys(record):
+    identification = record.get('identification')
+    email = record.get('email')
+    return (
+        None if identification is None else normalize_identification(identification),
+        (email or '').strip().lower() or None,
+    )
+
+
+def validate_debtor_batch(records, chunk_size=None):
+    """
+    Valida `records`, dicts con `tenant_id`, `identification` y `email` (y
+    `id` si el registro edita un deudor existente, que no choca consigo
+    mismo). Los campos ausentes o en None no se validan.
+
+    Devuelve {índice: {campo: mensaje}} con los registros que tienen errores.
+    """
+    chunk_size = chunk_size or getattr(settings, 'DEBTOR_VALIDATION_CHUNK_SIZE', 1000)
+    keys = [_keys(record) for record in records]
+    errors = {}
+
+    seen_identifications, seen_emails = {}, {}
+    for index, (record, (identification, email)) in enumerate(zip(records, keys)):
+        tenant_id = record.get('tenant_id')
+        if identification == '':
+            errors.setdefault(index, {})['identification'] = INVALID_IDENTIFICATION
+        elif identification is not None:
+            first = seen_identifications.setdefault((tenant_id, identification), index)
+            if first != index:
+                errors.setdefault(index, {})['identification'] = REPEATED_IDENTIFICATION.format(index=first)
+        if email is not None:
+            first = seen_emails.setdefault((tenant_id, email), index)
+            if first != index:
+                errors.setdefault(index, {})['email'] = REPEATED_EMAIL.format(index=first)
+
+    for start in range(0, len(records), chunk_size):
+        chunk = range(start, min(start + chunk_size, len(records)))
+        tenant_ids = {records[index].get('tenant_id') for index in chunk}
+        identifications = {keys[index][0] for index in chunk if keys[index][0]}
+        emails = {keys[index][1] for index in chunk if keys[index][1]}
+        if not identifications and not emails:
+            continue
+
+        condition = Q(identification_normalized__in=identifications) | Q(email_lower__in=emails)
+        tenant_condition = Q(tenant_id__in=tenant_ids - {None})
+        if None in tenant_ids:
+            tenant_condition |= Q(tenant_id__isnull=True)
+        taken_identifications, taken_emails = {}, {}
+        rows = (
+            Debtor.objects.annotate(email_lower=Lower('email'))
+            .filter(tenant_condition, condition)
+            .values_list('pk', 'tenant_id', 'identification_normalized', 'email_lower')
+        )
+        for pk, tenant_id, identification, email in rows:
+            taken_identifications.setdefault((tenant_id, identification), set()).add(pk)
+            taken_emails.setdefault((tenant_id, email), set()).add(pk)
+
+        for index in chunk:
+            identification, email = keys[index]
+            tenant_id = records[index].get('tenant_id')
+            own = {records[index].get('id')}
+            record_errors = errors.get(index, {})
+            if identification and 'identification' not in record_errors:
+                if taken_identifications.get((tenant_id, identification), set()) - own:
+                    errors.setdefault(index, {})['identification'] = DUPLICATE_IDENTIFICATION
+            if email and 'email' not in record_errors:
+                if taken_emails.get((tenant_id, email), set()) - own:
+                    errors.setdefault(index, {})['email'] = DUPLICATE_EMAIL
+    return errors
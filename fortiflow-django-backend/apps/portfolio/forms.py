@@ -1,7 +1,10 @@
 
+import os
 from django import forms
 from .models import Obligation
-from apps.portfolio.models import Portfolio, Debtor
+from apps.portfolio.models import Portfolio, Debtor, ObligationImport
+from apps.portfolio.debtor_validation import validate_debtor_batch
+from core.widgets import AutocompleteSelect
 
 class ObligationForm(forms.ModelForm):
 
@@ -9,15 +12,21 @@ class ObligationForm(forms.ModelForm):
         model = Obligation
         exclude = ['portfolio']
         widgets = {
+            'debtor': AutocompleteSelect('debtor-autocomplete', placeholder='Nombre o identificación'),
             'date_amount': forms.DateInput(attrs={'type': 'date', 'placeholder': 'Fecha de desembolso', 'class': 'input input-bordered w-full'}),
             'expiration_date': forms.DateInput(attrs={'type': 'date', 'placeholder': 'Fecha de vencimiento', 'class': 'input input-bordered w-full'}),
         }
 
     def __init__(self, *args, **kwargs):
         portfolio_id = kwargs.pop('portfolio_id', None)
+        self.request = kwargs.pop('request', None)
         super().__init__(*args, **kwargs)
-        # Solo mostrar deudores válidos (puedes personalizar el filtro si lo deseas)
-        self.fields['debtor'].queryset = Debtor.objects.all()
+        # Las opciones llegan por autocompletado; el queryset solo valida el
+        # deudor elegido, que debe ser del tenant del usuario.
+        debtors = Debtor.objects.all()
+        if self.request is not None:
+            debtors = debtors.for_user(self.request.user)
+        self.fields['debtor'].queryset = debtors
 
         # Add modern classes to all fields
         for name, field in self.fields.items():
@@ -32,6 +41,29 @@ class ObligationForm(forms.ModelForm):
                 field.widget.attrs['class'] = 'input input-bordered w-full'
 
 
+class ObligationImportForm(forms.ModelForm):
+    file = forms.FileField(
+        label='Archivo',
+        widget=forms.FileInput(attrs={
+            'class': 'file-input file-input-bordered w-full',
+            'accept': '.csv,.xlsx',
+        }),
+        error_messages={
+            'required': 'El archivo es obligatorio.',
+        }
+    )
+
+    class Meta:
+        model = ObligationImport
+        fields = ['file']
+
+    def clean_file(self):
+        file = self.cleaned_data['file']
+        if os.path.splitext(file.name)[1].lower() not in ('.csv', '.xlsx'):
+            raise forms.ValidationError("El archivo debe ser .csv o .xlsx.")
+        return file
+
+
 class PortfolioForm(forms.ModelForm):
     name = forms.CharField(
         label='Nombre',
@@ -78,8 +110,8 @@ class PortfolioForm(forms.ModelForm):
 
     def clean_name(self):
         name = self.cleaned_data['name']
-        tenant = self.request.user.tenant if hasattr(self.request.user, 'tenant') else None
-        if tenant and Portfolio.objects.filter(name=name, contract__client__tenant=tenant).exclude(pk=self.instance.pk).exists():
+        tenant_id = self.request.tenant_id
+        if tenant_id and Portfolio.objects.filter(name=name, contract__client__tenant_id=tenant_id).exclude(pk=self.instance.pk).exists():
             raise forms.ValidationError("Ya existe un portfolio con este nombre en su organización.")
             
         return name
@@ -157,21 +189,22 @@ class DebtorForm(forms.ModelForm):
         self.request = kwargs.pop('request', None)
         super().__init__(*args, **kwargs)
 
-    def clean_identification(self):
-        identification = self.cleaned_data['identification']
-        if Debtor.objects.filter(identification=identification).exclude(pk=self.instance.pk).exists():
-            raise forms.ValidationError("Ya existe un deudor con esta identificación.")
-        return identification
-
-    def clean_email(self):
-        email = self.cleaned_data['email']
-        if Debtor.objects.filter(email=email).exclude(pk=self.instance.pk).exists():
-            raise forms.ValidationError("Ya existe un deudor con este correo electrónico.")
-        return email
+    def clean(self):
+        cleaned_data = super().clean()
+        # Identificación y correo se comprueban juntos en una sola consulta.
+        record = {
+            'id': self.instance.pk,
+            'tenant_id': self.request.tenant_id,
+            'identification': cleaned_data.get('identification'),
+            'email': cleaned_data.get('email'),
+        }
+        for field, message in validate_debtor_batch([record]).get(0, {}).items():
+            self.add_error(field, message)
+        return cleaned_data
 
     def save(self, commit=True):
         debtor = super().save(commit=False)
-        debtor.tenant = self.request.user.tenant
+        debtor.tenant_id = self.request.tenant_id
         if commit:
             debtor.save()
         return debtor
@@ -0,0 +1,194 @@
+"""
+Validación de filas para la importación masiva de obligaciones.
+
+Este módulo no importa modelos de Django a propósito: sus funciones se
+ejecutan en procesos hijos (`ProcessPoolExecutor`) que no inicializan Django.
+"""
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+PORTFOLIO_TYPES = {
+    'ADMINISTRATIVE': 'ADMINISTRATIVE',
+    'ADMINISTRATIVE PORTFOLIO': 'ADMINISTRATIVE',
+    'ADMINISTRATIVA': 'ADMINISTRATIVE',
+    'PRELEGAL': 'PRELEGAL',
+    'PRE-LEGAL PORTFOLIO': 'PRELEGAL',
+    'PREJURIDICA': 'PRELEGAL',
+    'LEGAL': 'LEGAL',
+    'LEGAL PORTFOLIO': 'LEGAL',
+    'JURIDICA': 'LEGAL',
+}
+
+# Encabezados aceptados (en español o con el nombre del campo) -> campo.
+COLUMN_ALIASES = {
+    'identification': 'identification',
+    'identificacion': 'identification',
+    'cedula': 'identification',
+    'name': 'name',
+    'nombre': 'name',
+    'number_phone': 'number_phone',
+    'telefono': 'number_phone',
+    'address': 'address',
+    'direccion': 'address',
+    'email': 'email',
+    'correo': 'email',
+    'portfolio_type': 'portfolio_type',
+    'tipo': 'portfolio_type',
+    'credit': 'credit',
+    'credito': 'credit',
+    'amount': 'amount',
+    'monto': 'amount',
+    'date_amount': 'date_amount',
+    'fecha_desembolso': 'date_amount',
+    'expiration_date': 'expiration_date',
+    'fecha_vencimiento': 'expiration_date',
+    'days_delinquency': 'days_delinquency',
+    'dias_mora': 'days_delinquency',
+    'status': 'status',
+    'estado': 'status',
+    'balance': 'balance',
+    'saldo': 'balance',
+    'interest': 'interest',
+    'interes': 'interest',
+    'fee': 'fee',
+    'cuota': 'fee',
+}
+
+REQUIRED_COLUMNS = (
+    'identification', 'name', 'amount', 'date_amount', 'expiration_date', 'balance',
+)
+
+DEBTOR_FIELDS = ('identification', 'name', 'number_phone', 'address', 'email')
+
+OBLIGATION_FIELDS = (
+    'portfolio_type', 'credit', 'amount', 'date_amount', 'expiration_date',
+    'days_delinquency', 'status', 'balance', 'interest', 'fee',
+)
+
+MAX_DECIMAL = Decimal('99999999.99')
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d')
+
+_ACCENTS = str.maketrans('áéíóúÁÉÍÓÚñÑ', 'aeiouAEIOUnN')
+
+
+def normalize_identification(value):
+    """Identificación en mayúsculas y sin espacios, puntos ni guiones."""
+    return re.sub(r'[^0-9A-Z]', '', str(value or '').upper())
+
+
+def normalize_header(header):
+    key = str(header or '').strip().translate(_ACCENTS).lower().replace(' ', '_')
+    return COLUMN_ALIASES.get(key)
+
+
+def map_headers(headers):
+    """
+    Traduce la fila de encabezados a nombres de campo. Devuelve la lista de
+    campos (None para columnas ignoradas) y las columnas obligatorias ausentes.
+    """
+    fields = [normalize_header(header) for header in headers]
+    missing = [column for column in REQUIRED_COLUMNS if column not in fields]
+    return fields, missing
+
+
+def _text(value, max_length, required=False, label=''):
+    text = '' if value is None else str(value).strip()
+    if required and not text:
+        raise ValueError(f"{label} es obligatorio")
+    if len(text) > max_length:
+        raise ValueError(f"{label} supera {max_length} caracteres")
+    return text
+
+
+def _decimal(value, label, default=Decimal('0')):
+    if value is None or str(value).strip() == '':
+        return default
+    try:
+        number = Decimal(str(value).strip().replace(',', '')).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"{label} no es un número válido")
+    if abs(number) > MAX_DECIMAL:
+        raise ValueError(f"{label} está fuera de rango")
+    return number
+
+
+def _date(value, label):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = '' if value is None else str(value).strip()
+    if not text:
+        raise ValueError(f"{label} es obligatoria")
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text[:10], fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"{label} no es una fecha válida")
+
+
+def validate_row(values, today):
+    """
+    Valida y convierte una fila (dict campo -> valor crudo). Devuelve una
+    tupla (deudor, obligación) con valores ya tipados, o lanza ValueError.
+    """
+    debtor = {
+        'identification': _text(values.get('identification'), 100, True, 'Identificación'),
+        'name': _text(values.get('name'), 255, True, 'Nombre'),
+        'number_phone': _text(values.get('number_phone'), 20, label='Teléfono'),
+        'address': _text(values.get('address'), 255, label='Dirección'),
+        'email': _text(values.get('email'), 254, label='Correo'),
+    }
+    if not normalize_identification(debtor['identification']):
+        raise ValueError("Identificación debe contener letras o números")
+    if debtor['email'] and not EMAIL_RE.match(debtor['email']):
+        raise ValueError("Correo no es válido")
+
+    raw_type = _text(values.get('portfolio_type'), 40, label='Tipo').translate(_ACCENTS).upper()
+    portfolio_type = PORTFOLIO_TYPES.get(raw_type or 'ADMINISTRATIVE')
+    if portfolio_type is None:
+        raise ValueError("Tipo de cartera no es válido")
+
+    expiration_date = _date(values.get('expiration_date'), 'Fecha de vencimiento')
+    balance = _decimal(values.get('balance'), 'Saldo')
+    raw_days = values.get('days_delinquency')
+    if raw_days is None or str(raw_days).strip() == '':
+        days_delinquency = (today - expiration_date).days if balance > 0 and expiration_date < today else 0
+    else:
+        try:
+            days_delinquency = int(Decimal(str(raw_days).strip()))
+        except (InvalidOperation, ValueError):
+            raise ValueError("Días de mora no es un número entero")
+
+    obligation = {
+        'portfolio_type': portfolio_type,
+        'credit': _decimal(values.get('credit'), 'Crédito'),
+        'amount': _decimal(values.get('amount'), 'Monto'),
+        'date_amount': _date(values.get('date_amount'), 'Fecha de desembolso'),
+        'expiration_date': expiration_date,
+        'days_delinquency': days_delinquency,
+        'status': _text(values.get('status'), 255, label='Estado'),
+        'balance': balance,
+        'interest': _decimal(values.get('interest'), 'Interés'),
+        'fee': _decimal(values.get('fee'), 'Cuota'),
+    }
+    return debtor, obligation
+
+
+def validate_chunk(chunk, today):
+    """
+    Valida un bloque de filas [(número de fila, dict)]. Devuelve las filas
+    válidas como [(número, deudor, obligación)] y los errores [(número, mensaje)].
+    """
+    valid, errors = [], []
+    for row_number, values in chunk:
+        try:
+            debtor, obligation = validate_row(values, today)
+        except ValueError as exc:
+            errors.append((row_number, str(exc)))
+        else:
+            valid.append((row_number, debtor, obligation))
+    return valid, errors
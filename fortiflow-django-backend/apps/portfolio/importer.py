@@ -0,0 +1,245 @@
+import csv
+import multiprocessing
+import os
+import tempfile
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from apps.portfolio.import_validation import (
+    DEBTOR_FIELDS, map_headers, normalize_identification, validate_chunk,
+)
+from apps.portfolio.models import Debtor, Obligation, ObligationImport, PortfolioStats
+from core.cache import bump_generation
+from core.events import table_changed
+
+
+class ImportFileError(Exception):
+    pass
+
+
+@contextmanager
+def open_rows(path):
+    """Abre un CSV o un XLSX y entrega (encabezados, iterador de filas)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.xlsx':
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ImportFileError("Se requiere openpyxl para importar archivos XLSX.")
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        close = workbook.close
+    elif extension == '.csv':
+        handle = open(path, newline='', encoding='utf-8-sig')
+        sample = handle.read(4096)
+        handle.seek(0)
+        delimiter = ';' if sample.count(';') > sample.count(',') else ','
+        rows = csv.reader(handle, delimiter=delimiter)
+        close = handle.close
+    else:
+        raise ImportFileError("Formato no soportado. Use un archivo .csv o .xlsx.")
+
+    try:
+        headers = next(rows, None)
+        if headers is None:
+            raise ImportFileError("El archivo está vacío.")
+        yield headers, rows
+    finally:
+        close()
+
+
+def count_rows(path):
+    """Cuenta las filas de datos sin cargar el archivo en memoria."""
+    if os.path.splitext(path)[1].lower() == '.xlsx':
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        try:
+            return max((workbook.active.max_row or 1) - 1, 0)
+        finally:
+            workbook.close()
+    lines = 0
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b''):
+            lines += block.count(b'\n')
+    return max(lines - 1, 0)
+
+
+def _chunks(headers, rows, chunk_size):
+    fields, missing = map_headers(headers)
+    if missing:
+        raise ImportFileError(f"Faltan columnas obligatorias: {', '.join(missing)}")
+    chunk = []
+    for row_number, row in enumerate(rows, start=2):
+        if not any(cell not in (None, '') for cell in row):
+            continue
+        values = {field: value for field, value in zip(fields, row) if field}
+        chunk.append((row_number, values))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _validated_chunks(chunks, today, workers):
+    """
+    Valida los bloques en paralelo manteniendo su orden. Como mucho hay
+    `2 * workers` bloques en vuelo, así la memoria no crece con el archivo.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield validate_chunk(chunk, today)
+        return
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(validate_chunk, chunk, today))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _upsert_debtors(rows, tenant_id):
+    """
+    Crea o actualiza los deudores del bloque por identificación normalizada
+    dentro del tenant y devuelve un dict identificación normalizada -> id.
+    """
+    incoming = {}
+    for _, debtor, _ in rows:
+        incoming[normalize_identification(debtor['identification'])] = debtor
+
+    existing = {}
+    debtors = Debtor.objects.for_tenant(tenant_id).filter(identification_normalized__in=incoming.keys())
+    for debtor in debtors.only('identification_normalized', *DEBTOR_FIELDS):
+        existing[debtor.identification_normalized] = debtor
+
+    changed = []
+    for key, debtor in existing.items():
+        values = incoming[key]
+        if any(values[field] and getattr(debtor, field) != values[field] for field in DEBTOR_FIELDS[1:]):
+            for field in DEBTOR_FIELDS[1:]:
+                if values[field]:
+                    setattr(debtor, field, values[field])
+            changed.append(debtor)
+    if changed:
+        Debtor.objects.bulk_update(changed, fields=DEBTOR_FIELDS[1:], batch_size=1000)
+
+    # Otra importación del mismo tenant puede crear el deudor entre la lectura
+    # y la inserción: ON CONFLICT sobre debtor_unique_tenant_ident devuelve el
+    # id existente en lugar de fallar. La actualización no cambia nada.
+    created = Debtor.objects.bulk_create(
+        [
+            Debtor(tenant_id=tenant_id, identification_normalized=key, **values)
+            for key, values in incoming.items()
+            if key not in existing
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['tenant', 'identification_normalized'],
+        update_fields=['identification_normalized'],
+    )
+    ids = {key: debtor.pk for key, debtor in existing.items()}
+    ids.update({debtor.identification_normalized: debtor.pk for debtor in created})
+    return ids, len(created)
+
+
+def _persist(portfolio, rows):
+    with transaction.atomic():
+        debtor_ids, created_debtors = _upsert_debtors(rows, portfolio.tenant_id)
+        Obligation.objects.bulk_create(
+            [
+                Obligation(
+                    portfolio_id=portfolio.pk,
+                    tenant_id=portfolio.tenant_id,
+                    debtor_id=debtor_ids[normalize_identification(debtor['identification'])],
+                    **obligation,
+                )
+                for _, debtor, obligation in rows
+            ],
+            batch_size=1000,
+        )
+    return created_debtors
+
+
+def import_obligations(portfolio, path, errors_writer=None, progress=None, workers=None, chunk_size=None):
+    """
+    Importa obligaciones (y sus deudores) desde un CSV o XLSX en streaming.
+
+    Las filas se validan en paralelo por bloques; cada bloque válido se guarda
+    en su propia transacción con `bulk_create`. Los errores se escriben fila a
+    fila en `errors_writer` (un `csv.writer`) y `progress` recibe un dict con
+    los contadores tras cada bloque. Al terminar se reconstruye PortfolioStats.
+    """
+    workers = workers if workers is not None else getattr(settings, 'IMPORT_WORKERS', os.cpu_count() or 1)
+    chunk_size = chunk_size or getattr(settings, 'IMPORT_CHUNK_SIZE', 2000)
+    today = timezone.localdate()
+    result = {'processed_rows': 0, 'created_obligations': 0, 'created_debtors': 0, 'error_rows': 0}
+
+    with open_rows(path) as (headers, rows):
+        for valid, errors in _validated_chunks(_chunks(headers, rows, chunk_size), today, workers):
+            if valid:
+                result['created_debtors'] += _persist(portfolio, valid)
+                result['created_obligations'] += len(valid)
+                bump_generation(Debtor, Obligation, tenant_ids=[portfolio.tenant_id])
+                table_changed(Obligation, portfolio.tenant_id)
+            if errors and errors_writer is not None:
+                errors_writer.writerows(errors)
+            result['error_rows'] += len(errors)
+            result['processed_rows'] += len(valid) + len(errors)
+            if progress:
+                progress(result)
+
+    PortfolioStats.objects.rebuild([portfolio.pk])
+    return result
+
+
+def _mark_failed(import_id, message):
+    ObligationImport.objects.filter(pk=import_id).update(
+        status=ObligationImport.STATUS_FAILED,
+        message=message,
+        finished_at=timezone.now(),
+    )
+
+
+def run_import(import_id):
+    """Procesa un `ObligationImport` y deja en él el progreso y el resultado."""
+    record = ObligationImport.objects.select_related('portfolio').get(pk=import_id)
+
+    def progress(result):
+        ObligationImport.objects.filter(pk=import_id).update(**result)
+
+    with tempfile.TemporaryFile(mode='w+', newline='', encoding='utf-8') as report:
+        writer = csv.writer(report)
+        writer.writerow(['fila', 'error'])
+        try:
+            path = record.file.path
+            ObligationImport.objects.filter(pk=import_id).update(
+                status=ObligationImport.STATUS_RUNNING,
+                total_rows=count_rows(path),
+            )
+            result = import_obligations(record.portfolio, path, errors_writer=writer, progress=progress)
+        except ImportFileError as exc:
+            _mark_failed(import_id, str(exc))
+            return
+        except Exception:
+            _mark_failed(import_id, "Error inesperado durante la importación.")
+            raise
+
+        record.refresh_from_db()
+        record.status = ObligationImport.STATUS_FINISHED
+        record.finished_at = timezone.now()
+        for field, value in result.items():
+            setattr(record, field, value)
+        if result['error_rows']:
+            report.seek(0)
+            record.error_report.save(f"errores_{record.pk}.csv", File(report), save=False)
+        record.save()
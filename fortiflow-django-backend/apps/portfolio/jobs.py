@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.utils import timezone
+
+from apps.portfolio.models import Obligation, Portfolio, PortfolioStats
+from core.cache import bump_generation
+from core.events import table_changed
+
+
+def _portfolio_ranges(portfolio_ids, portfolios_per_batch):
+    for start in range(0, len(portfolio_ids), portfolios_per_batch):
+        batch = portfolio_ids[start:start + portfolios_per_batch]
+        yield batch[0], batch[-1]
+
+
+def refresh_days_delinquency(today=None, portfolios_per_batch=50, rebuild_stats=True, progress=None):
+    """
+    Recalcula `Obligation.days_delinquency` con UPDATEs por rangos de
+    portafolio, sin cargar instancias. Solo reescribe las filas cuyo valor
+    cambia. Pensado para ejecutarse cada noche (cron o planificador) después
+    del cambio de día en la zona horaria del proyecto.
+
+    `progress`, si se indica, recibe (rangos procesados, rangos totales).
+    Devuelve el número de obligaciones actualizadas.
+    """
+    today = today or timezone.localdate()
+    expression = Obligation.days_delinquency_expression(today)
+    portfolio_ids = list(Portfolio.objects.order_by('pk').values_list('pk', flat=True))
+    ranges = list(_portfolio_ranges(portfolio_ids, portfolios_per_batch))
+
+    updated = 0
+    for done, (first_id, last_id) in enumerate(ranges, start=1):
+        with transaction.atomic():
+            updated += (
+                Obligation.objects
+                .filter(portfolio_id__gte=first_id, portfolio_id__lte=last_id)
+                .exclude(days_delinquency=expression)
+                .update(days_delinquency=expression)
+            )
+        if progress:
+            progress(done, len(ranges))
+
+    if updated:
+        bump_generation(Obligation)
+        table_changed(Obligation)
+    # Los saldos de la cola de trabajo también se refrescan cada noche.
+    from apps.management.queue import refresh_balances
+    refresh_balances()
+
+    if rebuild_stats:
+        # Los montos vencidos de PortfolioStats dependen de la fecha.
+        PortfolioStats.objects.rebuild()
+    return updated
@@ -0,0 +1,52 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.portfolio.importer import ImportFileError, import_obligations
+from apps.portfolio.models import Portfolio
+
+
+class Command(BaseCommand):
+    help = "Importa obligaciones y deudores de un portafolio desde un archivo .csv o .xlsx."
+
+    def add_arguments(self, parser):
+        parser.add_argument('portfolio_id', type=int)
+        parser.add_argument('path')
+        parser.add_argument('--workers', type=int, help="Procesos de validación. Por defecto, uno por núcleo.")
+        parser.add_argument('--chunk-size', type=int)
+        parser.add_argument('--errors', help="Ruta del CSV de errores. Por defecto, la salida de errores.")
+
+    def handle(self, *args, **options):
+        try:
+            portfolio = Portfolio.objects.get(pk=options['portfolio_id'])
+        except Portfolio.DoesNotExist:
+            raise CommandError("El portafolio no existe.")
+
+        errors_file = open(options['errors'], 'w', newline='', encoding='utf-8') if options['errors'] else sys.stderr
+        writer = csv.writer(errors_file)
+        writer.writerow(['fila', 'error'])
+
+        def progress(result):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{result['processed_rows']} filas procesadas")
+
+        try:
+            result = import_obligations(
+                portfolio,
+                options['path'],
+                errors_writer=writer,
+                progress=progress,
+                workers=options['workers'],
+                chunk_size=options['chunk_size'],
+            )
+        except ImportFileError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if errors_file is not sys.stderr:
+                errors_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['created_obligations']} obligaciones y {result['created_debtors']} deudores creados; "
+            f"{result['error_rows']} filas con error."
+        ))
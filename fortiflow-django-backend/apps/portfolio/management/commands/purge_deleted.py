@@ -0,0 +1,41 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from core.managers import SoftDeleteMixin
+from core.purge import purge
+
+
+class Command(BaseCommand):
+    help = (
+        "Purga por lotes los clientes, contratos, portafolios y programas marcados como "
+        "borrados. Retoma las purgas que se interrumpieron; es seguro ejecutarlo varias veces."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', action='append', dest='models',
+            help="Modelo a purgar (app.Modelo, p. ej. portfolio.Portfolio). Se puede repetir; por defecto todos.",
+        )
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        models = [model for model in apps.get_models() if issubclass(model, SoftDeleteMixin)]
+        if options['models']:
+            try:
+                models = [apps.get_model(label) for label in options['models']]
+            except (LookupError, ValueError) as exc:
+                raise CommandError(str(exc))
+            if not all(issubclass(model, SoftDeleteMixin) for model in models):
+                raise CommandError("Solo se pueden purgar modelos con borrado diferido.")
+
+        total = 0
+        for model in models:
+            for pk in list(model.all_objects.filter(deleted_at__isnull=False).values_list('pk', flat=True)):
+                def progress(state, model=model, pk=pk):
+                    rows = sum(state['deleted'].values())
+                    self.stdout.write(f"  {model._meta.label} {pk}: {state['step']} ({rows} filas)")
+
+                state = purge(model, pk, batch_size=options['batch_size'], progress=progress)
+                total += 1
+                self.stdout.write(f"{model._meta.label} {pk}: {sum(state['deleted'].values())} filas borradas.")
+        self.stdout.write(self.style.SUCCESS(f"{total} objetos purgados."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.portfolio.models import PortfolioStats
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero la tabla de estadísticas por portafolio (PortfolioStats)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--portfolio', type=int, action='append', dest='portfolios',
+            help="ID de portafolio a reconstruir. Se puede repetir; por defecto todos.",
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        rebuilt = PortfolioStats.objects.rebuild(
+            portfolio_ids=options['portfolios'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"{rebuilt} portafolios reconstruidos."))
@@ -0,0 +1,41 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.portfolio.jobs import refresh_days_delinquency
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula los días de mora de todas las obligaciones a partir de la fecha de "
+        "vencimiento y el saldo, en la zona horaria del proyecto. "
+        "Programar a diario, p. ej. en cron: 5 0 * * * python manage.py refresh_days_delinquency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Fecha de referencia (AAAA-MM-DD). Por defecto, hoy.")
+        parser.add_argument('--portfolios-per-batch', type=int, default=50)
+        parser.add_argument(
+            '--skip-stats', action='store_true',
+            help="No reconstruir PortfolioStats al terminar.",
+        )
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError("La fecha debe tener el formato AAAA-MM-DD.")
+
+        def progress(done, total):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"Rango {done}/{total}")
+
+        updated = refresh_days_delinquency(
+            today=today,
+            portfolios_per_batch=options['portfolios_per_batch'],
+            rebuild_stats=not options['skip_stats'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f"{updated} obligaciones actualizadas."))
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+
+def build_portfolio_stats(apps, schema_editor):
+    Portfolio = apps.get_model('portfolio', 'Portfolio')
+    PortfolioStats = apps.get_model('portfolio', 'PortfolioStats')
+    today = timezone.localdate()
+    overdue = Q(obligations__expiration_date__lt=today, obligations__balance__gt=0)
+    rows = Portfolio.objects.order_by().values('pk').annotate(
+        obligations_count=Count('obligations'),
+        debtors_count=Count('obligations__debtor', distinct=True),
+        amount_total=Sum('obligations__amount', default=0),
+        balance_total=Sum('obligations__balance', default=0),
+        overdue_amount=Sum('obligations__amount', filter=overdue, default=0),
+        overdue_balance=Sum('obligations__balance', filter=overdue, default=0),
+    )
+    PortfolioStats.objects.bulk_create(
+        [PortfolioStats(portfolio_id=row.pop('pk'), **row) for row in rows.iterator()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0004_alter_debtor_identification_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioStats',
+            fields=[
+                ('portfolio', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='portfolio.portfolio')),
+                ('obligations_count', models.IntegerField(default=0)),
+                ('debtors_count', models.IntegerField(default=0)),
+                ('amount_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('balance_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('overdue_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('overdue_balance', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='obligation',
+            index=models.Index(fields=['portfolio', 'debtor'], name='obligation_portfolio_debtor'),
+        ),
+        migrations.RunPython(build_portfolio_stats, migrations.RunPython.noop),
+    ]
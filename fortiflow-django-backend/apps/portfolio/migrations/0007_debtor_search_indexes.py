@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:05
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+
+
+def backfill_identification_normalized(apps, schema_editor):
+    schema_editor.execute(
+        "UPDATE portfolio_debtor "
+        "SET identification_normalized = regexp_replace(upper(identification), '[^0-9A-Z]', '', 'g')"
+    )
+
+
+class Migration(migrations.Migration):
+
+    # Los índices se crean con CONCURRENTLY para no bloquear portfolio_debtor.
+    atomic = False
+
+    dependencies = [
+        ('portfolio', '0006_obligationimport'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='debtor',
+            name='identification_normalized',
+            field=models.CharField(blank=True, editable=False, help_text='Identificación sin separadores ni espacios, en mayúsculas. Se usa para búsquedas por prefijo.', max_length=100),
+        ),
+        migrations.RunPython(backfill_identification_normalized, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='debtor',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='debtor_name_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='debtor',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('identification'), name='gin_trgm_ops'), name='debtor_identification_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='debtor',
+            index=models.Index(fields=['identification_normalized'], name='debtor_ident_norm_prefix', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
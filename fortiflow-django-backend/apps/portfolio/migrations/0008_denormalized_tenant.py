@@ -0,0 +1,113 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:06
+
+import logging
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+logger = logging.getLogger(__name__)
+
+
+def split_shared_debtors(Debtor, Obligation):
+    """
+    Un deudor con obligaciones en varios tenants quedaría visible solo para
+    uno. Se queda con el tenant de su primera obligación y, para cada uno de
+    los demás, se copia y sus obligaciones de ese tenant pasan a la copia.
+    """
+    shared = (
+        Obligation.objects.filter(tenant_id__isnull=False)
+        .values('debtor_id')
+        .annotate(tenants=Count('tenant_id', distinct=True))
+        .filter(tenants__gt=1)
+        .values_list('debtor_id', flat=True)
+    )
+    fields = [field.attname for field in Debtor._meta.concrete_fields if field.attname not in ('id', 'tenant_id')]
+    copies = 0
+    for debtor in Debtor.objects.filter(pk__in=list(shared)).order_by('pk'):
+        tenant_ids = list(
+            Obligation.objects.filter(debtor_id=debtor.pk, tenant_id__isnull=False)
+            .order_by('pk').values_list('tenant_id', flat=True)
+        )
+        for tenant_id in list(dict.fromkeys(tenant_ids))[1:]:
+            copy = Debtor.objects.create(tenant_id=tenant_id, **{field: getattr(debtor, field) for field in fields})
+            Obligation.objects.filter(debtor_id=debtor.pk, tenant_id=tenant_id).update(debtor_id=copy.pk)
+            copies += 1
+            logger.warning(
+                "Deudor %s compartido entre tenants: copiado como %s para el tenant %s.",
+                debtor.pk, copy.pk, tenant_id,
+            )
+    return copies
+
+
+def backfill_tenant(apps, schema_editor):
+    Contract = apps.get_model('client', 'Contract')
+    Portfolio = apps.get_model('portfolio', 'Portfolio')
+    Obligation = apps.get_model('portfolio', 'Obligation')
+    Debtor = apps.get_model('portfolio', 'Debtor')
+    Portfolio.objects.update(tenant_id=Subquery(
+        Contract.objects.filter(pk=OuterRef('contract_id')).values('client__tenant_id')[:1]
+    ))
+    Obligation.objects.update(tenant_id=Subquery(
+        Portfolio.objects.filter(pk=OuterRef('portfolio_id')).values('tenant_id')[:1]
+    ))
+    split_shared_debtors(Debtor, Obligation)
+    # El deudor toma el tenant de su primera obligación (tras separar los
+    # compartidos, todas son del mismo); los que no tienen obligaciones se
+    # completan desde sus asignaciones (migración de management).
+    Debtor.objects.update(tenant_id=Subquery(
+        Obligation.objects.filter(debtor_id=OuterRef('pk'), tenant_id__isnull=False)
+        .order_by('pk').values('tenant_id')[:1]
+    ))
+    if schema_editor.connection.vendor == 'postgresql':
+        # Los UPDATE dejan comprobaciones de FK diferidas; con ellas pendientes
+        # Postgres no deja crear los índices en la misma transacción.
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_alter_customuser_table'),
+        ('client', '0004_alter_contract_start_date'),
+        ('portfolio', '0007_debtor_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='debtor',
+            name='tenant',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, help_text='Tenant que registró al deudor (formulario o importación).', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='debtors', to='account.tenant'),
+        ),
+        migrations.AddField(
+            model_name='obligation',
+            name='tenant',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, help_text='Copia de portfolio.tenant para filtrar sin joins.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='obligations', to='account.tenant'),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='tenant',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, help_text='Copia de contract.client.tenant para filtrar sin joins.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='portfolios', to='account.tenant'),
+        ),
+        migrations.RunPython(backfill_tenant, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='debtor',
+            index=models.Index(fields=['tenant', 'identification_normalized'], name='debtor_tenant_ident'),
+        ),
+        migrations.AddIndex(
+            model_name='debtor',
+            index=models.Index(fields=['tenant', 'name'], name='debtor_tenant_name'),
+        ),
+        migrations.AddIndex(
+            model_name='obligation',
+            index=models.Index(fields=['tenant', 'expiration_date'], name='obligation_tenant_expiration'),
+        ),
+        migrations.AddIndex(
+            model_name='obligation',
+            index=models.Index(fields=['tenant', 'debtor'], name='obligation_tenant_debtor'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolio',
+            index=models.Index(fields=['tenant', 'name'], name='portfolio_tenant_name'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:08
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('account', '0005_alter_customuser_table'),
+        ('portfolio', '0008_denormalized_tenant'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='obligation',
+            index=models.Index(fields=['portfolio', 'expiration_date', 'balance'], name='obligation_delinquency'),
+        ),
+        AddIndexConcurrently(
+            model_name='obligation',
+            index=models.Index(condition=models.Q(('balance__gt', 0)), fields=['portfolio', 'expiration_date'], name='obligation_open'),
+        ),
+    ]
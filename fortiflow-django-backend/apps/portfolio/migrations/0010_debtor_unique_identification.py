@@ -0,0 +1,141 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:35
+
+import logging
+
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+
+logger = logging.getLogger(__name__)
+
+MERGED_FIELDS = ('name', 'identification', 'number_phone', 'address', 'email')
+
+
+def check_blank_identifications(Debtor):
+    """
+    Una identificación normalizada vacía no identifica a nadie: esos deudores
+    no se unen entre sí. La restricción admite uno por tenant; si hay más, la
+    migración se detiene con la lista para corregirlos a mano.
+    """
+    blank = Debtor.objects.filter(tenant__isnull=False, identification_normalized='')
+    for debtor in blank.order_by('tenant_id', 'pk').values('pk', 'tenant_id', 'identification'):
+        logger.warning(
+            "Deudor %(pk)s del tenant %(tenant_id)s sin identificación válida (%(identification)r).", debtor,
+        )
+    clashes = (
+        blank.values('tenant_id')
+        .annotate(total=Count('pk'))
+        .filter(total__gt=1)
+        .values_list('tenant_id', flat=True)
+    )
+    if clashes:
+        ids = list(blank.filter(tenant_id__in=list(clashes)).order_by('pk').values_list('pk', flat=True))
+        raise RuntimeError(
+            "Hay deudores sin identificación válida repetidos en un mismo tenant; corrija su "
+            f"identificación antes de migrar. Deudores: {ids}"
+        )
+
+
+def merge_duplicate_debtors(apps, schema_editor):
+    """
+    Une los deudores con la misma identificación normalizada en un tenant:
+    conserva el más antiguo, le completa los datos vacíos con los del resto y
+    le pasa sus obligaciones y asignaciones antes de borrarlos. Cada fila
+    borrada queda en el log con sus datos.
+
+    Los deudores sin tenant (sin obligaciones ni asignaciones, ver 0008) no se
+    unen ni quedan cubiertos por la restricción: NULL no choca en un índice
+    único.
+    """
+    Debtor = apps.get_model('portfolio', 'Debtor')
+    Obligation = apps.get_model('portfolio', 'Obligation')
+    PortfolioStats = apps.get_model('portfolio', 'PortfolioStats')
+    Assignment = apps.get_model('management', 'Assignment')
+
+    check_blank_identifications(Debtor)
+    groups = (
+        Debtor.objects.filter(tenant__isnull=False)
+        .exclude(identification_normalized='')
+        .values('tenant_id', 'identification_normalized')
+        .annotate(keep=Min('pk'), total=Count('pk'))
+        .filter(total__gt=1)
+    )
+    portfolio_ids = set()
+    for group in list(groups):
+        keep = Debtor.objects.get(pk=group['keep'])
+        duplicates = Debtor.objects.filter(
+            tenant_id=group['tenant_id'], identification_normalized=group['identification_normalized'],
+        ).exclude(pk=keep.pk)
+        for duplicate in duplicates.order_by('pk'):
+            logger.warning(
+                "Deudor %s unido al %s: %s", duplicate.pk, keep.pk,
+                {field: getattr(duplicate, field) for field in MERGED_FIELDS},
+            )
+            for field in MERGED_FIELDS:
+                if not getattr(keep, field):
+                    setattr(keep, field, getattr(duplicate, field))
+        keep.save(update_fields=MERGED_FIELDS)
+        obligations = Obligation.objects.filter(debtor__in=duplicates)
+        portfolio_ids.update(obligations.values_list('portfolio_id', flat=True))
+        obligations.update(debtor_id=keep.pk)
+        Assignment.objects.filter(debtor__in=duplicates).update(debtor_id=keep.pk)
+        duplicates.delete()
+
+    if portfolio_ids:
+        PortfolioStats.objects.filter(portfolio_id__in=portfolio_ids).update(debtors_count=Subquery(
+            Obligation.objects.filter(portfolio_id=OuterRef('portfolio_id'))
+            .values('portfolio_id')
+            .annotate(total=Count('debtor_id', distinct=True))
+            .values('total')[:1]
+        ))
+    unconstrained = Debtor.objects.filter(tenant__isnull=True).count()
+    if unconstrained:
+        logger.warning("%s deudores sin tenant quedan fuera de la restricción única.", unconstrained)
+
+
+class Migration(migrations.Migration):
+
+    # Los índices se crean con CONCURRENTLY para no bloquear portfolio_debtor.
+    atomic = False
+
+    dependencies = [
+        ('account', '0005_alter_customuser_table'),
+        ('management', '0007_management_idempotency_key'),
+        ('portfolio', '0009_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_debtors, migrations.RunPython.noop, atomic=True),
+        # El índice único se construye sin bloquear escrituras y luego pasa a
+        # ser la restricción.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    "CREATE UNIQUE INDEX CONCURRENTLY debtor_unique_tenant_ident "
+                    "ON portfolio_debtor (tenant_id, identification_normalized)",
+                    "DROP INDEX CONCURRENTLY IF EXISTS debtor_unique_tenant_ident",
+                ),
+                migrations.RunSQL(
+                    "ALTER TABLE portfolio_debtor ADD CONSTRAINT debtor_unique_tenant_ident "
+                    "UNIQUE USING INDEX debtor_unique_tenant_ident",
+                    "ALTER TABLE portfolio_debtor DROP CONSTRAINT debtor_unique_tenant_ident",
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='debtor',
+                    constraint=models.UniqueConstraint(fields=('tenant', 'identification_normalized'), name='debtor_unique_tenant_ident'),
+                ),
+            ],
+        ),
+        # La restricción cubre las búsquedas por (tenant, identificación).
+        RemoveIndexConcurrently(
+            model_name='debtor',
+            name='debtor_tenant_ident',
+        ),
+        AddIndexConcurrently(
+            model_name='debtor',
+            index=models.Index(models.F('tenant'), django.db.models.functions.text.Lower('email'), name='debtor_tenant_email'),
+        ),
+    ]
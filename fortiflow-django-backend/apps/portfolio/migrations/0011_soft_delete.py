@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0010_debtor_unique_identification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfolio',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
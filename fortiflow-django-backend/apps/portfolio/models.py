@@ -1,10 +1,33 @@
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
+from apps.account.models import CustomUser, Tenant
 from apps.client.models import Contract
-from django.db.models import Sum
+from core.managers import SoftDeleteManager, SoftDeleteMixin, TenantDerivedMixin, TenantQuerySet
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models import Sum, Count, F, Case, When, Value, IntegerField, DateField
+from django.db.models.functions import ExtractDay, Lower, Upper
+from apps.portfolio.import_validation import normalize_identification
 from django.utils import timezone
 from django.db.models import Q
 
-class Portfolio(models.Model):
+
+class PortfolioQuerySet(TenantQuerySet):
+    def with_metrics(self):
+        """
+        Anota en una sola consulta las métricas que muestran los listados:
+        total de obligaciones, deudores distintos, monto total y monto vencido.
+        """
+        today = timezone.localdate()
+        overdue = Q(obligations__expiration_date__lt=today, obligations__balance__gt=0)
+        return self.annotate(
+            obligations_total=Count('obligations'),
+            debtors_total=Count('obligations__debtor', distinct=True),
+            amount_total=Sum('obligations__amount'),
+            overdue_amount_total=Sum('obligations__amount', filter=overdue),
+        )
+
+
+class Portfolio(SoftDeleteMixin, TenantDerivedMixin, models.Model):
     STATUS_CHOICES = (
         ('active', 'Activo'),
         ('inactive', 'Inactivo'),
@@ -16,27 +39,77 @@ class Portfolio(models.Model):
     date_created = models.DateField(auto_now=True)
     date_updated = models.DateField(auto_now=True)
     contract = models.ForeignKey(Contract, on_delete=models.CASCADE, related_name="portfolios")
+    tenant = models.ForeignKey(
+        Tenant, on_delete=models.CASCADE, null=True, blank=True, editable=False,
+        db_index=False, related_name="portfolios",
+        help_text="Copia de contract.client.tenant para filtrar sin joins."
+    )
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = SoftDeleteManager.from_queryset(PortfolioQuerySet)()
+    all_objects = PortfolioQuerySet.as_manager()
+
+    tenant_source = 'contract__client'
+    tenant_dependents = ('obligations',)
+    purge_plan = (
+        ('portfolio.PortfolioStats', 'portfolio'),
+        ('portfolio.Obligation', 'portfolio'),
+        ('portfolio.ObligationImport', 'portfolio'),
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'name'], name='portfolio_tenant_name'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def get_stats(self):
+        """Fila de `PortfolioStats` del portafolio, o None si aún no existe."""
+        try:
+            return self.stats
+        except ObjectDoesNotExist:
+            return None
+
+    @property
+    def obligations_count(self):
+        if hasattr(self, 'obligations_total'):
+            return self.obligations_total
+        stats = self.get_stats()
+        if stats is not None:
+            return stats.obligations_count
+        return self.obligations.count()
+
     @property
     def debtors_count(self):
+        if hasattr(self, 'debtors_total'):
+            return self.debtors_total
+        stats = self.get_stats()
+        if stats is not None:
+            return stats.debtors_count
         return self.obligations.values('debtor').distinct().count()
     
     @property
     def delinquency_percentage(self):
-        today = timezone.now().date()
+        if hasattr(self, 'amount_total'):
+            total = self.amount_total or 0
+            vencido = self.overdue_amount_total or 0
+        elif (stats := self.get_stats()) is not None:
+            total = stats.amount_total
+            vencido = stats.overdue_amount
+        else:
+            today = timezone.localdate()
 
-        total = self.obligations.aggregate(
-            total=Sum("amount")
-        )["total"] or 0
+            total = self.obligations.aggregate(
+                total=Sum("amount")
+            )["total"] or 0
 
-        vencido = self.obligations.filter(
-            Q(expiration_date__lt=today) & Q(balance__gt=0)
-        ).aggregate(
-            vencido=Sum("amount")
-        )["vencido"] or 0
+            vencido = self.obligations.filter(
+                Q(expiration_date__lt=today) & Q(balance__gt=0)
+            ).aggregate(
+                vencido=Sum("amount")
+            )["vencido"] or 0
 
         if total == 0:
             return 0
@@ -50,16 +123,57 @@ class Debtor(models.Model):
     number_phone = models.CharField(max_length=20)  
     address = models.CharField(max_length=255)
     email = models.EmailField()
+    identification_normalized = models.CharField(
+        max_length=100, blank=True, editable=False,
+        help_text="Identificación sin separadores ni espacios, en mayúsculas. Se usa para búsquedas por prefijo."
+    )
+    tenant = models.ForeignKey(
+        Tenant, on_delete=models.CASCADE, null=True, blank=True, editable=False,
+        db_index=False, related_name="debtors",
+        help_text="Tenant que registró al deudor (formulario o importación)."
+    )
+
+    objects = TenantQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'name'], name='debtor_tenant_name'),
+            models.Index(F('tenant'), Lower('email'), name='debtor_tenant_email'),
+            # Los filtros `__icontains` de Django comparan UPPER(columna), así
+            # que los índices trigram se definen sobre esa misma expresión.
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='debtor_name_trgm'),
+            GinIndex(OpClass(Upper('identification'), name='gin_trgm_ops'), name='debtor_identification_trgm'),
+            models.Index(
+                fields=['identification_normalized'],
+                opclasses=['varchar_pattern_ops'],
+                name='debtor_ident_norm_prefix',
+            ),
+        ]
+        constraints = [
+            # La identificación normalizada identifica al deudor en su tenant;
+            # la importación hace upsert sobre esta restricción. Los deudores
+            # sin tenant no quedan cubiertos (NULL no choca en un índice único).
+            models.UniqueConstraint(
+                fields=['tenant', 'identification_normalized'], name='debtor_unique_tenant_ident',
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.identification_normalized = normalize_identification(self.identification)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'identification' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'identification_normalized'}
+        super().save(*args, **kwargs)
+
 class PortfolioType(models.TextChoices):
     ADMINISTRATIVE = 'ADMINISTRATIVE', 'Administrative portfolio'
     PRELEGAL = 'PRELEGAL', 'Pre-legal portfolio'
     LEGAL = 'LEGAL', 'Legal portfolio'
     
-class Obligation(models.Model):
+class Obligation(TenantDerivedMixin, models.Model):
     portfolio = models.ForeignKey(Portfolio, on_delete=models.CASCADE, related_name="obligations")
     debtor = models.ForeignKey(Debtor, on_delete=models.CASCADE, related_name="obligations")
     portfolio_type = models.CharField(
@@ -78,5 +192,176 @@ class Obligation(models.Model):
     interest = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     fee = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
 
+    tenant = models.ForeignKey(
+        Tenant, on_delete=models.CASCADE, null=True, blank=True, editable=False,
+        db_index=False, related_name="obligations",
+        help_text="Copia de portfolio.tenant para filtrar sin joins."
+    )
+
+    objects = TenantQuerySet.as_manager()
+
+    tenant_source = 'portfolio'
+    live_parents = ('portfolio',)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'expiration_date'], name='obligation_tenant_expiration'),
+            models.Index(fields=['tenant', 'debtor'], name='obligation_tenant_debtor'),
+            models.Index(fields=['portfolio', 'expiration_date', 'balance'], name='obligation_delinquency'),
+            models.Index(
+                fields=['portfolio', 'expiration_date'],
+                condition=Q(balance__gt=0),
+                name='obligation_open',
+            ),
+            models.Index(fields=['portfolio', 'debtor'], name='obligation_portfolio_debtor'),
+        ]
+
     def __str__(self):
-        return self.portfolio.name
\ No newline at end of file
+        return self.portfolio.name
+
+    def is_overdue(self, today=None):
+        today = today or timezone.localdate()
+        return self.expiration_date < today and self.balance > 0
+
+    @staticmethod
+    def days_delinquency_expression(today):
+        """
+        Días de mora calculados en base de datos: días transcurridos desde el
+        vencimiento si queda saldo pendiente, 0 en otro caso.
+        """
+        return Case(
+            When(
+                balance__gt=0,
+                expiration_date__lt=today,
+                then=ExtractDay(Value(today, output_field=DateField()) - F('expiration_date')),
+            ),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+
+
+class PortfolioStatsManager(models.Manager):
+    COUNTERS = (
+        'obligations_count', 'debtors_count', 'amount_total',
+        'balance_total', 'overdue_amount', 'overdue_balance',
+    )
+
+    def rebuild(self, portfolio_ids=None, batch_size=500):
+        """
+        Recalcula desde cero las filas de los portafolios indicados (o de todos).
+        Es el camino a usar tras cargas masivas (`bulk_create`, `update`, SQL)
+        que no disparan las señales de `Obligation`, y la reconciliación de
+        lo que las señales no cuentan bien (escrituras concurrentes, montos
+        vencidos que cambian con el día); se ejecuta cada noche con la tarea
+        'portfolio.rebuild_stats'.
+        """
+        today = timezone.localdate()
+        overdue = Q(obligations__expiration_date__lt=today, obligations__balance__gt=0)
+        portfolios = Portfolio.objects.all()
+        if portfolio_ids is not None:
+            portfolios = portfolios.filter(pk__in=portfolio_ids)
+        rows = portfolios.order_by().values('pk').annotate(
+            obligations_count=Count('obligations'),
+            debtors_count=Count('obligations__debtor', distinct=True),
+            amount_total=Sum('obligations__amount', default=0),
+            balance_total=Sum('obligations__balance', default=0),
+            overdue_amount=Sum('obligations__amount', filter=overdue, default=0),
+            overdue_balance=Sum('obligations__balance', filter=overdue, default=0),
+        )
+
+        batch = []
+        rebuilt = 0
+        for row in rows.iterator(chunk_size=batch_size):
+            portfolio_id = row.pop('pk')
+            batch.append(self.model(portfolio_id=portfolio_id, **row))
+            if len(batch) >= batch_size:
+                rebuilt += self._upsert(batch)
+                batch = []
+        if batch:
+            rebuilt += self._upsert(batch)
+        return rebuilt
+
+    def _upsert(self, objs):
+        self.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=['portfolio'],
+            update_fields=list(self.COUNTERS) + ['updated_at'],
+        )
+        return len(objs)
+
+    def apply_delta(self, portfolio_id, create_missing=True, **deltas):
+        """
+        Suma los deltas recibidos a los contadores del portafolio con un único
+        UPDATE atómico. Si la fila no existe se reconstruye desde cero, salvo
+        que `create_missing` sea False (borrados en cascada del portafolio).
+        """
+        changes = {
+            field: F(field) + value
+            for field, value in deltas.items()
+            if value
+        }
+        if not changes:
+            return
+        changes['updated_at'] = timezone.now()
+        updated = self.filter(portfolio_id=portfolio_id).update(**changes)
+        if not updated and create_missing:
+            self.rebuild([portfolio_id])
+
+
+class PortfolioStats(models.Model):
+    portfolio = models.OneToOneField(Portfolio, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    obligations_count = models.IntegerField(default=0)
+    debtors_count = models.IntegerField(default=0)
+    amount_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    balance_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    overdue_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    overdue_balance = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PortfolioStatsManager()
+
+    def __str__(self):
+        return f"Estadísticas de {self.portfolio_id}"
+
+
+class ObligationImport(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_FINISHED = 'finished'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_RUNNING, 'En proceso'),
+        (STATUS_FINISHED, 'Finalizada'),
+        (STATUS_FAILED, 'Fallida'),
+    )
+
+    portfolio = models.ForeignKey(Portfolio, on_delete=models.CASCADE, related_name="imports")
+    file = models.FileField(upload_to="imports/")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    total_rows = models.IntegerField(default=0)
+    processed_rows = models.IntegerField(default=0)
+    created_obligations = models.IntegerField(default=0)
+    created_debtors = models.IntegerField(default=0)
+    error_rows = models.IntegerField(default=0)
+    error_report = models.FileField(upload_to="imports/errors/", null=True, blank=True)
+    message = models.TextField(blank=True)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Importación {self.pk} - {self.portfolio.name}"
+
+    @property
+    def is_done(self):
+        return self.status in (self.STATUS_FINISHED, self.STATUS_FAILED)
+
+    @property
+    def progress_percentage(self):
+        if self.status == self.STATUS_FINISHED:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(int(self.processed_rows * 100 / self.total_rows), 99)
@@ -0,0 +1,49 @@
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest, Upper
+
+from apps.portfolio.import_validation import normalize_identification
+from apps.portfolio.models import Debtor
+
+# Con menos caracteres los trigramas no discriminan y el índice no ayuda.
+MIN_TRIGRAM_LENGTH = 3
+
+
+def search_debtors(query, queryset=None, limit=10):
+    """
+    Busca deudores por nombre (similitud de trigramas, tolera errores de
+    tipeo) o por prefijo de identificación normalizada, ordenados por
+    relevancia. Cada resultado trae el atributo `score` entre 0 y 1. Con
+    `limit=None` se devuelve sin recortar, para paginar.
+
+    Todas las condiciones usan índices de `Debtor.Meta`: `debtor_name_trgm`
+    para el nombre y `debtor_ident_norm_prefix` para la identificación.
+    """
+    text = ' '.join(query.split()).upper()
+    normalized = normalize_identification(query)
+    queryset = Debtor.objects.all() if queryset is None else queryset
+    if not text:
+        return queryset.none()
+
+    queryset = queryset.alias(upper_name=Upper('name'))
+    if len(text) >= MIN_TRIGRAM_LENGTH:
+        condition = Q(upper_name__contains=text) | Q(upper_name__trigram_word_similar=text)
+    else:
+        condition = Q(upper_name__startswith=text)
+    identification_score = Value(0.0)
+    if normalized:
+        condition |= Q(identification_normalized__startswith=normalized)
+        identification_score = Case(
+            When(identification_normalized=normalized, then=Value(1.0)),
+            When(identification_normalized__startswith=normalized, then=Value(0.9)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+
+    queryset = (
+        queryset
+        .filter(condition)
+        .annotate(score=Greatest(TrigramWordSimilarity(text, 'upper_name'), identification_score))
+        .order_by('-score', 'name', 'pk')
+    )
+    return queryset if limit is None else queryset[:limit]
@@ -0,0 +1,109 @@
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.client.models import Contract
+from apps.portfolio.debtor_validation import validate_debtor_batch
+from apps.portfolio.import_validation import normalize_identification
+from apps.portfolio.models import Debtor, Obligation, Portfolio
+from core.api import BulkListSerializer, ScopedRelation, TenantModelSerializer
+
+
+def visible_contracts(user):
+    if user.is_superuser:
+        return Contract.objects.all()
+    return Contract.objects.filter(client__tenant_id=user.tenant_id)
+
+
+class PortfolioSerializer(TenantModelSerializer):
+    contract = serializers.IntegerField(source='contract_id')
+    client_name = serializers.CharField(source='contract.client.name', read_only=True)
+
+    scoped_relations = {
+        'contract_id': ScopedRelation(visible_contracts, 'client__tenant_id'),
+    }
+    tenant_relation = 'contract_id'
+
+    class Meta(TenantModelSerializer.Meta):
+        model = Portfolio
+        fields = ['id', 'name', 'description', 'status', 'contract', 'client_name', 'date_created', 'date_updated']
+        read_only_fields = ['date_created', 'date_updated']
+
+
+def check_unique_debtors(items, instances):
+    """
+    Valida la unicidad de identificación y correo de `items` (con sus
+    instancias, o None al crear) en un lote. Devuelve los errores por índice.
+    """
+    records = [
+        {
+            'id': getattr(instance, 'pk', None),
+            'tenant_id': item.get('tenant_id', getattr(instance, 'tenant_id', None)),
+            'identification': item.get('identification'),
+            'email': item.get('email'),
+        }
+        for item, instance in zip(items, instances)
+    ]
+    errors = validate_debtor_batch(records)
+    return {index: {field: [message] for field, message in fields.items()} for index, fields in errors.items()}
+
+
+class DebtorListSerializer(BulkListSerializer):
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        errors = check_unique_debtors(attrs, self.instance or [None] * len(attrs))
+        if errors:
+            raise serializers.ValidationError([{'index': index, **error} for index, error in sorted(errors.items())])
+        return attrs
+
+
+class DebtorSerializer(TenantModelSerializer):
+    class Meta(TenantModelSerializer.Meta):
+        model = Debtor
+        fields = ['id', 'name', 'identification', 'number_phone', 'address', 'email']
+        list_serializer_class = DebtorListSerializer
+
+    def validate(self, attrs):
+        # bulk_create y bulk_update no pasan por Debtor.save().
+        if 'identification' in attrs:
+            attrs['identification_normalized'] = normalize_identification(attrs['identification'])
+        attrs = super().validate(attrs)
+        if not isinstance(self.parent, serializers.ListSerializer):
+            errors = check_unique_debtors([attrs], [self.instance])
+            if errors:
+                raise serializers.ValidationError(errors[0])
+        return attrs
+
+
+class ObligationSerializer(TenantModelSerializer):
+    portfolio = serializers.IntegerField(source='portfolio_id')
+    debtor = serializers.IntegerField(source='debtor_id')
+    debtor_name = serializers.CharField(source='debtor.name', read_only=True)
+    days_delinquency = serializers.IntegerField(
+        required=False, min_value=0,
+        help_text="Si no se envía se calcula desde el vencimiento y el saldo.",
+    )
+
+    scoped_relations = {
+        'portfolio_id': ScopedRelation(lambda user: Portfolio.objects.for_user(user)),
+        'debtor_id': ScopedRelation(lambda user: Debtor.objects.for_user(user)),
+    }
+    tenant_relation = 'portfolio_id'
+
+    class Meta(TenantModelSerializer.Meta):
+        model = Obligation
+        fields = [
+            'id', 'portfolio', 'debtor', 'debtor_name', 'portfolio_type', 'credit', 'amount',
+            'date_amount', 'expiration_date', 'days_delinquency', 'status', 'balance', 'interest', 'fee',
+        ]
+
+    def validate(self, attrs):
+        instance = self.instance
+        if 'days_delinquency' not in attrs and ('expiration_date' in attrs or 'balance' in attrs):
+            expiration_date = attrs.get('expiration_date', getattr(instance, 'expiration_date', None))
+            balance = attrs.get('balance', getattr(instance, 'balance', 0))
+            today = timezone.localdate()
+            if expiration_date is not None:
+                attrs['days_delinquency'] = (
+                    (today - expiration_date).days if balance > 0 and expiration_date < today else 0
+                )
+        return super().validate(attrs)
@@ -0,0 +1,118 @@
+"""
+Mantiene `PortfolioStats` al día con deltas por cada obligación guardada o
+borrada.
+
+`debtors_count` se decide con una consulta de existencia del par (portafolio,
+deudor) que no bloquea: dos obligaciones nuevas del mismo par guardadas a la
+vez pueden contar el deudor dos veces (o ninguna al borrarse). El camino de
+reconciliación es `PortfolioStats.objects.rebuild()`, que la tarea
+'portfolio.rebuild_stats' ejecuta cada noche (JOBS_SCHEDULE).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.portfolio.models import Obligation, Portfolio, PortfolioStats
+
+TRACKED_FIELDS = ('portfolio_id', 'debtor_id', 'amount', 'balance', 'expiration_date')
+
+
+def _snapshot(obligation):
+    # Los valores asignados a mano pueden venir como texto ('2025-01-31');
+    # se convierten como lo haría la base al leerlos.
+    return {
+        field: Obligation._meta.get_field(field).to_python(getattr(obligation, field))
+        for field in TRACKED_FIELDS
+    }
+
+
+def _contribution(values, today, sign=1):
+    amount = Decimal(str(values['amount'] or 0))
+    balance = Decimal(str(values['balance'] or 0))
+    overdue = values['expiration_date'] < today and balance > 0
+    return {
+        'obligations_count': sign,
+        'amount_total': sign * amount,
+        'balance_total': sign * balance,
+        'overdue_amount': sign * amount if overdue else 0,
+        'overdue_balance': sign * balance if overdue else 0,
+    }
+
+
+def _pair_exists(portfolio_id, debtor_id, exclude_pk=None):
+    queryset = Obligation.objects.filter(portfolio_id=portfolio_id, debtor_id=debtor_id)
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return queryset.exists()
+
+
+def _add(target, deltas):
+    for field, value in deltas.items():
+        target[field] = target.get(field, 0) + value
+
+
+@receiver(post_save, sender=Portfolio)
+def create_portfolio_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        PortfolioStats.objects.get_or_create(portfolio=instance)
+
+
+@receiver(pre_save, sender=Obligation)
+def remember_obligation_state(sender, instance, raw=False, **kwargs):
+    instance._stats_previous = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._stats_previous = (
+        Obligation.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=Obligation)
+def update_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    today = timezone.localdate()
+    previous = getattr(instance, '_stats_previous', None)
+    instance._stats_previous = None
+    current = _snapshot(instance)
+    deltas = defaultdict(dict)
+
+    if previous is not None:
+        _add(deltas[previous['portfolio_id']], _contribution(previous, today, sign=-1))
+    _add(deltas[current['portfolio_id']], _contribution(current, today))
+
+    pair_changed = previous is None or (
+        (previous['portfolio_id'], previous['debtor_id'])
+        != (current['portfolio_id'], current['debtor_id'])
+    )
+    if pair_changed:
+        if not _pair_exists(current['portfolio_id'], current['debtor_id'], exclude_pk=instance.pk):
+            _add(deltas[current['portfolio_id']], {'debtors_count': 1})
+        if previous is not None and not _pair_exists(previous['portfolio_id'], previous['debtor_id']):
+            _add(deltas[previous['portfolio_id']], {'debtors_count': -1})
+
+    for portfolio_id, portfolio_deltas in deltas.items():
+        PortfolioStats.objects.apply_delta(portfolio_id, **portfolio_deltas)
+
+
+@receiver(post_delete, sender=Obligation)
+def update_stats_on_delete(sender, instance, origin=None, **kwargs):
+    # Los borrados en cascada eliminan todo el lote antes de emitir las señales,
+    # así que se recuerda en el origen qué pares (portafolio, deudor) ya se
+    # descontaron para no restar el mismo deudor varias veces.
+    released = getattr(origin, '_stats_released_pairs', None)
+    if released is None:
+        released = set()
+        if origin is not None:
+            origin._stats_released_pairs = released
+
+    values = _snapshot(instance)
+    deltas = _contribution(values, timezone.localdate(), sign=-1)
+    pair = (values['portfolio_id'], values['debtor_id'])
+    if pair not in released and not _pair_exists(*pair):
+        released.add(pair)
+        deltas['debtors_count'] = -1
+    PortfolioStats.objects.apply_delta(values['portfolio_id'], create_missing=False, **deltas)
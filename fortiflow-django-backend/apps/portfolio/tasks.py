@@ -0,0 +1,23 @@
+from datetime import date
+
+from apps.jobs.registry import report_progress, task
+from apps.portfolio.importer import run_import
+from apps.portfolio.jobs import refresh_days_delinquency
+from apps.portfolio.models import PortfolioStats
+
+
+# run_import deja su propio avance en ObligationImport. Un reintento volvería
+# a crear las obligaciones ya insertadas, así que se ejecuta una sola vez.
+task('portfolio.run_import', max_attempts=1)(run_import)
+
+
+@task('portfolio.refresh_days_delinquency')
+def refresh_days_delinquency_task(today=None, rebuild_stats=True):
+    today = date.fromisoformat(today) if today else None
+    return refresh_days_delinquency(today=today, rebuild_stats=rebuild_stats, progress=report_progress)
+
+
+@task('portfolio.rebuild_stats')
+def rebuild_stats(portfolio_ids=None):
+    """Reconciliación de `PortfolioStats` (ver apps/portfolio/signals.py)."""
+    return PortfolioStats.objects.rebuild(portfolio_ids)
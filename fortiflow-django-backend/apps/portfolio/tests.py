@@ -1,3 +1,511 @@
+import base64
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.account.models import CustomUser, Tenant
+from apps.client.models import Client, Contract
+from apps.portfolio.api import PortfolioViewSet
+from apps.portfolio.debtor_validation import validate_debtor_batch
+from apps.portfolio.models import Debtor, Obligation, ObligationImport, Portfolio, PortfolioStats
+from apps.portfolio.search import search_debtors
+from core.cache import bump_generation
+from core.exports import export_queryset
+from core.fragments import cached_rows, fragment_cache
+from core.pagination import InvalidCursor, KeysetPaginator
+from core.purge import purge
+from core.testing import APIQueryCountMixin, QueryPlanAssertionsMixin
+
+
+def seed_portfolios(portfolios=4, debtors=300, obligations_per_debtor=3):
+    """Crea dos tenants con portafolios, deudores y obligaciones para probar planes."""
+    today = date(2025, 6, 1)
+    tenants = [Tenant.objects.create(name=f"Tenant {i}") for i in range(2)]
+    created = []
+    for i in range(portfolios):
+        tenant = tenants[i % 2]
+        client = Client.objects.create(name=f"Cliente {i}", tenant=tenant)
+        contract = Contract.objects.create(client=client, start_date=today)
+        created.append(Portfolio.objects.create(
+            name=f"Portafolio {i}", description="", status='active', contract=contract,
+        ))
+
+    debtor_objs = Debtor.objects.bulk_create([
+        Debtor(
+            name=f"Deudor {i} Pérez", identification=f"10{i:06d}", identification_normalized=f"10{i:06d}",
+            number_phone="3000000", address="Calle 1", email=f"d{i}@example.com",
+            tenant_id=tenants[i % 2].pk,
+        )
+        for i in range(debtors)
+    ])
+    Obligation.objects.bulk_create([
+        Obligation(
+            portfolio=created[index % portfolios], tenant_id=created[index % portfolios].tenant_id,
+            debtor=debtor, amount=Decimal('100.00'), balance=Decimal(n % 2 * 50),
+            date_amount=today - timedelta(days=365), expiration_date=today - timedelta(days=n * 7),
+            days_delinquency=0, status="vigente",
+        )
+        for index, debtor in enumerate(debtor_objs)
+        for n in range(obligations_per_debtor)
+    ])
+    PortfolioStats.objects.rebuild()
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return tenants, created, debtor_objs
+
+
+@skipUnless(connection.vendor == 'postgresql', "Los planes de consulta requieren Postgres")
+class ObligationQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, cls.portfolios, cls.debtors = seed_portfolios()
+        cls.portfolio = cls.portfolios[0]
+
+    def test_obligation_list(self):
+        queryset = Obligation.objects.filter(portfolio_id=self.portfolio.pk).order_by('-id')[:11]
+        self.assertNoSeqScan(queryset, ['portfolio_obligation'])
+
+    def test_open_obligations_report(self):
+        queryset = Obligation.objects.filter(
+            portfolio_id=self.portfolio.pk, balance__gt=0, expiration_date__lt=date(2025, 6, 1),
+        )
+        self.assertNoSeqScan(queryset, ['portfolio_obligation'])
+
+    def test_tenant_overdue(self):
+        queryset = Obligation.objects.for_tenant(self.tenants[0].pk).filter(expiration_date__lt=date(2025, 6, 1))
+        self.assertNoSeqScan(queryset, ['portfolio_obligation'])
+
+    def test_days_delinquency_refresh(self):
+        expression = Obligation.days_delinquency_expression(date(2025, 6, 1))
+        queryset = Obligation.objects.filter(
+            portfolio_id__gte=self.portfolio.pk, portfolio_id__lte=self.portfolio.pk,
+        ).exclude(days_delinquency=expression)
+        self.assertNoSeqScan(queryset, ['portfolio_obligation'])
+
+    def test_portfolio_metrics(self):
+        queryset = Portfolio.objects.for_tenant(self.tenants[0].pk).with_metrics().order_by('-id')
+        self.assertNoSeqScan(queryset, ['portfolio_obligation', 'portfolio_portfolio'])
+
+
+@skipUnless(connection.vendor == 'postgresql', "Los planes de consulta requieren Postgres")
+class DebtorQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, cls.portfolios, cls.debtors = seed_portfolios()
+
+    def test_name_filter(self):
+        queryset = Debtor.objects.filter(name__icontains='12 pérez')
+        self.assertUsesIndex(queryset, 'debtor_name_trgm')
+
+    def test_identification_filter(self):
+        queryset = Debtor.objects.filter(identification__icontains='000123')
+        self.assertUsesIndex(queryset, 'debtor_identification_trgm')
+
+    def test_ranked_search(self):
+        self.assertNoSeqScan(search_debtors('deudor 12'), ['portfolio_debtor'])
+        self.assertNoSeqScan(search_debtors('10000'), ['portfolio_debtor'])
+
+    def test_tenant_identification_prefix(self):
+        queryset = Debtor.objects.for_tenant(self.tenants[0].pk).filter(identification_normalized__startswith='1000')
+        self.assertNoSeqScan(queryset, ['portfolio_debtor'])
+
+
+class PortfolioAPIQueryCountTests(APIQueryCountMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, cls.portfolios, cls.debtors = seed_portfolios()
+        cls.user = CustomUser.objects.create_user('api', tenant=cls.tenants[0])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_obligation_list(self):
+        self.assertQueriesPerPage(self.client, '/api/obligations/', 1)
+
+    def test_obligation_list_filtered(self):
+        self.assertQueriesPerPage(self.client, f'/api/obligations/?portfolio={self.portfolios[0].pk}', 1)
+
+    def test_debtor_list(self):
+        self.assertQueriesPerPage(self.client, '/api/debtors/', 1)
+
+    def test_portfolio_list(self):
+        # COUNT y página: el total aproximado (EXPLAIN) es opcional por vista.
+        self.assertQueriesPerPage(self.client, '/api/portfolios/', 2, page_sizes=(1, 2))
+        self.assertFalse(self.client.get('/api/portfolios/').json()['count_is_approximate'])
+
+    @skipUnless(connection.vendor == 'postgresql', "La estimación requiere Postgres")
+    def test_portfolio_list_approximate_count(self):
+        with patch.object(PortfolioViewSet, 'approximate_count_threshold', 1, create=True):
+            self.assertTrue(self.client.get('/api/portfolios/').json()['count_is_approximate'])
+
+    def test_obligation_bulk_create(self):
+        """Las consultas de un alta por lotes no dependen de cuántos objetos trae."""
+        portfolio = self.portfolios[0]
+        debtors = [debtor for debtor in self.debtors if debtor.tenant_id == portfolio.tenant_id]
+        counts = []
+        for size in (5, 50):
+            payload = [
+                {
+                    'portfolio': portfolio.pk, 'debtor': debtor.pk, 'amount': '100.00', 'balance': '10.00',
+                    'date_amount': '2025-01-01', 'expiration_date': '2025-03-01', 'status': 'vigente',
+                }
+                for debtor in debtors[:size]
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/api/obligations/bulk/', payload, format='json')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.json()['ids']), size)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_other_tenant_is_rejected(self):
+        portfolio = next(p for p in self.portfolios if p.tenant_id != self.user.tenant_id)
+        response = self.client.post('/api/obligations/bulk/', [{
+            'portfolio': portfolio.pk, 'debtor': self.debtors[0].pk, 'amount': '1.00',
+            'date_amount': '2025-01-01', 'expiration_date': '2025-03-01', 'status': 'vigente',
+        }], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Obligation.objects.filter(portfolio=portfolio, amount=1).exists())
+
+    def test_bulk_move_rebuilds_both_portfolios(self):
+        source, target = [p for p in self.portfolios if p.tenant_id == self.user.tenant_id][:2]
+        moved = list(Obligation.objects.filter(portfolio=source).values_list('pk', flat=True)[:3])
+        before = dict(PortfolioStats.objects.values_list('portfolio_id', 'obligations_count'))
+        response = self.client.patch(
+            '/api/obligations/bulk/', [{'id': pk, 'portfolio': target.pk} for pk in moved], format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        after = dict(PortfolioStats.objects.values_list('portfolio_id', 'obligations_count'))
+        self.assertEqual(after[source.pk], before[source.pk] - 3)
+        self.assertEqual(after[target.pk], before[target.pk] + 3)
+
+
+class ObligationConditionalListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, cls.portfolios, cls.debtors = seed_portfolios(portfolios=2, debtors=20, obligations_per_debtor=1)
+        cls.user = CustomUser.objects.create_user('etag', tenant=cls.tenants[0])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('obligation-list', args=[self.portfolios[0].pk])
+
+    def get(self, etag=None):
+        headers = {'HX-Request': 'true'}
+        if etag:
+            headers['If-None-Match'] = etag
+        return self.client.get(self.url, headers=headers)
+
+    def test_write_changes_etag(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(etag).status_code, 304)
+
+        # Las generaciones no dependen de la caché del proceso.
+        cache.clear()
+        self.assertEqual(self.get(etag).status_code, 304)
+
+        obligation = Obligation.objects.filter(portfolio=self.portfolios[0]).first()
+        obligation.balance = Decimal('1.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            obligation.save()
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class RowFragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, cls.portfolios, _ = seed_portfolios(portfolios=2, debtors=6, obligations_per_debtor=1)
+        cls.user, cls.other = [
+            CustomUser.objects.create_user(f'usuario{i}', tenant=tenant) for i, tenant in enumerate(cls.tenants)
+        ]
+
+    def setUp(self):
+        fragment_cache().clear()
+        self.rendered = []
+
+    def rows(self):
+        obligations = Obligation.objects.filter(portfolio=self.portfolios[0]).select_related('debtor').order_by('pk')
+        return [(obligation, [obligation.debtor]) for obligation in obligations]
+
+    def render(self, obligation):
+        self.rendered.append(obligation.pk)
+        return f'<tr>{obligation.pk} {obligation.debtor.name}</tr>'
+
+    def cached(self, user=None):
+        self.rendered = []
+        return cached_rows(self.rows(), self.render, 'obligations', user or self.user)
+
+    def test_unchanged_rows_are_reused(self):
+        first = self.cached()
+        self.assertEqual(len(self.rendered), 3)
+        rows = self.rows()
+        self.rendered = []
+        with self.assertNumQueries(1):  # Versiones y generaciones en una lectura.
+            html = cached_rows(rows, self.render, 'obligations', self.user)
+        self.assertEqual(self.rendered, [])
+        self.assertEqual(html, first)
+
+    def test_saved_row_is_rendered_again(self):
+        self.cached()
+        obligation = Obligation.objects.filter(portfolio=self.portfolios[0]).order_by('pk').first()
+        obligation.balance = Decimal('1.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            obligation.save()
+        self.cached()
+        self.assertEqual(self.rendered, [obligation.pk])
+
+    def test_saved_dependency_is_rendered_again(self):
+        self.cached()
+        obligation = Obligation.objects.filter(portfolio=self.portfolios[0]).order_by('pk').last()
+        debtor = obligation.debtor
+        debtor.name = "Deudor renombrado"
+        with self.captureOnCommitCallbacks(execute=True):
+            debtor.save()
+        html = self.cached()
+        self.assertEqual(self.rendered, [obligation.pk])
+        self.assertIn("Deudor renombrado", html)
+
+    def test_fragments_are_scoped_by_tenant(self):
+        self.cached()
+        self.cached(self.other)
+        self.assertEqual(len(self.rendered), 3)
+        # Una escritura masiva en el otro tenant no invalida las filas de este.
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_generation(Obligation, tenant_ids=[self.tenants[1].pk])
+        self.cached()
+        self.assertEqual(self.rendered, [])
+        self.cached(self.other)
+        self.assertEqual(len(self.rendered), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_generation(Obligation, tenant_ids=[self.tenants[0].pk])
+        self.cached()
+        self.assertEqual(len(self.rendered), 3)
+
+
+class SoftDeletedPortfolioTests(TestCase):
+    """Las obligaciones de un portafolio borrado dejan de verse antes de la purga."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, cls.portfolios, cls.debtors = seed_portfolios(portfolios=2, debtors=20, obligations_per_debtor=1)
+        cls.user = CustomUser.objects.create_user('borrado', tenant=cls.tenants[0])
+
+    def setUp(self):
+        cache.clear()
+        self.portfolio = self.portfolios[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.portfolio.soft_delete()
+        self.client.force_login(self.user)
+
+    def test_obligations_are_hidden(self):
+        self.assertTrue(Obligation.objects.filter(portfolio=self.portfolio).exists())
+        self.assertFalse(Obligation.objects.for_user(self.user).filter(portfolio=self.portfolio).exists())
+
+        response = self.client.get(reverse('obligation-list', args=[self.portfolio.pk]), headers={'HX-Request': 'true'})
+        self.assertEqual(list(response.context['obligations']), [])
+
+        response = self.client.get(reverse('obligation-export', args=[self.portfolio.pk]))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+
+        response = self.client.get(reverse('debtor-list-portfolio', args=[self.portfolio.pk]))
+        self.assertEqual(list(response.context['debtors']), [])
+
+    def test_api_hides_obligations(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/obligations/', {'portfolio': self.portfolio.pk})
+        self.assertEqual(response.json()['results'], [])
+
+    def test_for_user_filters_without_joins(self):
+        sql = str(Obligation.objects.for_user(self.user).query)
+        self.assertNotIn('JOIN', sql)
+        self.assertIn('"portfolio_id" IN', sql)
+        with self.assertNumQueries(0):
+            Obligation.objects.for_user(self.user)
+
+        # Tras la purga no queda nada pendiente y `live()` no agrega condiciones.
+        with self.captureOnCommitCallbacks(execute=True):
+            purge(Portfolio, self.portfolio.pk)
+        sql = str(Obligation.objects.for_user(self.user).query)
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('"portfolio_id" IN', sql)
+        self.assertFalse(Obligation.objects.filter(portfolio_id=self.portfolio.pk).exists())
+
+
+class ObligationImportViewTests(TestCase):
+    """Las importaciones solo se crean y consultan en portafolios del tenant del usuario."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, cls.portfolios, _ = seed_portfolios(portfolios=2, debtors=2, obligations_per_debtor=1)
+        cls.user = CustomUser.objects.create_user('importa', tenant=cls.tenants[0])
+        cls.own, cls.foreign = [
+            ObligationImport.objects.create(portfolio=portfolio, file='imports/obligaciones.csv')
+            for portfolio in cls.portfolios
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_create_rejects_foreign_portfolio(self):
+        upload = SimpleUploadedFile('obligaciones.csv', b'identificacion\n', content_type='text/csv')
+        response = self.client.post(reverse('obligation-import', args=[self.portfolios[1].pk]), {'file': upload})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(ObligationImport.objects.count(), 2)
+
+    def test_create_form_requires_visible_portfolio(self):
+        response = self.client.get(reverse('obligation-import', args=[self.portfolios[0].pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['portfolio_id'], self.portfolios[0].pk)
+        for pk in (self.portfolios[1].pk, 0):
+            response = self.client.get(reverse('obligation-import', args=[pk]))
+            self.assertEqual(response.status_code, 404)
+
+    def test_status_is_scoped_to_tenant(self):
+        response = self.client.get(reverse('obligation-import-status', args=[self.own.pk]))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('obligation-import-status', args=[self.foreign.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class ObligationExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, cls.portfolios, cls.debtors = seed_portfolios(portfolios=1, debtors=30, obligations_per_debtor=1)
+        cls.user = CustomUser.objects.create_user('exporta', tenant=cls.tenants[0])
+        cls.columns = (('ID', 'id'), ('Deudor', 'debtor__name'), ('Vencimiento', 'expiration_date'), ('Saldo', 'balance'))
+
+    def queryset(self):
+        return Obligation.objects.for_user(self.user).order_by('id')
+
+    def test_xlsx_is_streamed(self):
+        from openpyxl import load_workbook
+
+        with patch('core.exports.XLSX_BLOCK_SIZE', 1024):
+            response = export_queryset(self.queryset(), self.columns, 'obligaciones', 'xlsx')
+            chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 2)
+        sheet = load_workbook(BytesIO(b''.join(chunks)), read_only=True).active
+        rows = list(sheet.values)
+        obligation = self.queryset().select_related('debtor').first()
+        self.assertEqual(rows[0], ('ID', 'Deudor', 'Vencimiento', 'Saldo'))
+        self.assertEqual(len(rows), 31)
+        self.assertEqual(rows[1][:2], (obligation.pk, obligation.debtor.name))
+        self.assertEqual(rows[1][2].date(), obligation.expiration_date)
+        self.assertEqual(rows[1][3], obligation.balance)
+
+    def test_xlsx_drops_control_characters(self):
+        from openpyxl import load_workbook
+
+        obligation = self.queryset().select_related('debtor').first()
+        Debtor.objects.filter(pk=obligation.debtor_id).update(name="Deudor\x01 Pérez")
+        response = export_queryset(self.queryset(), self.columns, 'obligaciones', 'xlsx')
+        sheet = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True).active
+        self.assertEqual(list(sheet.values)[1][1], "Deudor Pérez")
+
+    def test_csv_uses_async_iterator(self):
+        response = export_queryset(self.queryset(), self.columns, 'obligaciones', asynchronous=True)
+        self.assertTrue(response.is_async)
+
+        async def read():
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        lines = async_to_sync(read)().decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0], 'ID,Deudor,Vencimiento,Saldo')
+        self.assertEqual(len(lines), 31)
+
+
+class KeysetCursorTests(TestCase):
+    """Un cursor manipulado es un 404, no un error al filtrar."""
+
+    @staticmethod
+    def cursor(payload):
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+    def test_cursor_values_are_validated(self):
+        paginator = KeysetPaginator(Obligation.objects.all(), 10, '-expiration_date')
+        for payload in ([None, 'abc'], ['2025-01-01', 'abc'], ['no es fecha', 1], [None, 1], ['2025-01-01', None]):
+            with self.subTest(payload=payload), self.assertRaises(InvalidCursor):
+                paginator.page(after=self.cursor(payload))
+        self.assertEqual(paginator.decode_cursor(self.cursor(['2025-01-01', '7'])), (date(2025, 1, 1), 7))
+
+    def test_views_answer_404(self):
+        tenant = Tenant.objects.create(name="Tenant")
+        user = CustomUser.objects.create_user('cursor', tenant=tenant)
+        self.client.force_login(user)
+        response = self.client.get(reverse('obligation-list', args=[1]), {'after': self.cursor([None, 'abc'])})
+        self.assertEqual(response.status_code, 404)
+
+        client = APIClient()
+        client.force_authenticate(user)
+        cursor = base64.b64encode(b'o=0&p=abc').decode()
+        self.assertEqual(client.get('/api/obligations/', {'cursor': cursor}).status_code, 404)
+
+
+class PortfolioStatsSignalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, cls.portfolios, cls.debtors = seed_portfolios(portfolios=1, debtors=4, obligations_per_debtor=1)
+
+    def test_values_assigned_as_text(self):
+        portfolio = self.portfolios[0]
+        Obligation.objects.create(
+            portfolio=portfolio, debtor=self.debtors[0], amount='100.00', balance='40.00',
+            date_amount='2020-01-01', expiration_date='2020-02-01', days_delinquency=0, status="vigente",
+        )
+        stats = PortfolioStats.objects.get(portfolio=portfolio)
+        self.assertEqual(stats.overdue_balance, Decimal('40.00'))
+        self.assertEqual(stats.debtors_count, 4)
+
+        PortfolioStats.objects.rebuild([portfolio.pk])
+        rebuilt = PortfolioStats.objects.get(portfolio=portfolio)
+        for field in PortfolioStats.objects.COUNTERS:
+            self.assertEqual(getattr(rebuilt, field), getattr(stats, field), field)
+
+
+class DebtorBatchValidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants, cls.portfolios, cls.debtors = seed_portfolios(portfolios=2, debtors=20, obligations_per_debtor=1)
+
+    def record(self, identification, email, tenant=0, **extra):
+        return {'tenant_id': self.tenants[tenant].pk, 'identification': identification, 'email': email, **extra}
+
+    def test_one_query_per_chunk(self):
+        records = [self.record(f"99-{i}", f"n{i}@example.com") for i in range(30)]
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(validate_debtor_batch(records, chunk_size=10), {})
+        self.assertEqual(len(queries), 3)
+
+    def test_existing_and_repeated_values(self):
+        errors = validate_debtor_batch([
+            self.record("10.000.000", "nuevo@example.com"),
+            self.record("55", "D2@EXAMPLE.COM"),
+            self.record("5-5", "otro@example.com"),
+            self.record("77", "otro@example.com", tenant=1),
+        ])
+        self.assertEqual(set(errors), {0, 1, 2})
+        self.assertIn('identification', errors[0])
+        self.assertIn('email', errors[1])
+        self.assertIn('identification', errors[2])
 
-# Create your tests here.
+    def test_edit_does_not_clash_with_itself(self):
+        debtor = self.debtors[0]
+        record = self.record(debtor.identification, debtor.email, id=debtor.pk)
+        self.assertEqual(validate_debtor_batch([record]), {})
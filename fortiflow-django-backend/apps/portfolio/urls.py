@@ -1,5 +1,5 @@
 from django.urls import path
-from apps.portfolio.views import PortfolioListView, PortfolioCreateView, PortfolioEditView, PortfolioDeleteView, DebtorListView, DebtorCreateView, DebtorEditView, DebtorDeleteView, ContractListByClientView, ObligationListView, ObligationCreateView, ObligationEditView, ObligationDeleteView
+from apps.portfolio.views import PortfolioListView, PortfolioCreateView, PortfolioEditView, PortfolioDeleteView, DebtorListView, DebtorCreateView, DebtorEditView, DebtorDeleteView, DebtorSearchView, DebtorAutocompleteView, ContractListByClientView, ObligationListView, ObligationCreateView, ObligationEditView, ObligationDeleteView, ObligationImportCreateView, ObligationImportStatusView, ObligationExportView
 
 urlpatterns = [
     # Rutas de portafolios
@@ -13,12 +13,17 @@ urlpatterns = [
     # Rutas de obligaciones
     path("<int:portfolio_id>/obligations/", ObligationListView.as_view(), name="obligation-list"),
     path("<int:portfolio_id>/obligations/create/", ObligationCreateView.as_view(), name="obligation-create"),
+    path("<int:portfolio_id>/obligations/export/", ObligationExportView.as_view(), name="obligation-export"),
     path("obligations/edit/<int:pk>/", ObligationEditView.as_view(), name="obligation-edit"),
     path("obligations/delete/<int:pk>/", ObligationDeleteView.as_view(), name="obligation-delete"),
+    path("<int:portfolio_id>/obligations/import/", ObligationImportCreateView.as_view(), name="obligation-import"),
+    path("obligations/import/<int:pk>/", ObligationImportStatusView.as_view(), name="obligation-import-status"),
     
     # Rutas de deudores
     path("debtors/", DebtorListView.as_view(), name="debtor-list"),
     path("debtors/<int:portfolio_id>/", DebtorListView.as_view(), name="debtor-list-portfolio"),
+    path("debtors/search/", DebtorSearchView.as_view(), name="debtor-search"),
+    path("debtors/autocomplete/", DebtorAutocompleteView.as_view(), name="debtor-autocomplete"),
     path("debtors/create/", DebtorCreateView.as_view(), name="debtor-create"),
     path("debtors/edit/<int:pk>/", DebtorEditView.as_view(), name="debtor-edit"),
     path("debtors/delete/<int:pk>/", DebtorDeleteView.as_view(), name="debtor-delete"),
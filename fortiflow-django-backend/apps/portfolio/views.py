@@ -1,6 +1,7 @@
-from apps.portfolio.models import Obligation
-from apps.portfolio.forms import ObligationForm
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView
+from apps.portfolio.models import Obligation, ObligationImport
+from apps.portfolio.forms import ObligationForm, ObligationImportForm
+from apps.jobs.queue import enqueue
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -8,7 +9,7 @@ from django.views.generic import ListView, CreateView, UpdateView
 from django.views import View
 from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse
 from django.urls import reverse_lazy
-from core.mixins import SmartPaginationMixin
+from core.mixins import ConditionalListMixin, SmartPaginationMixin, ExportMixin
 import os
 from apps.client.models import Contract
 from apps.client.models import Client
@@ -18,15 +19,21 @@ from apps.portfolio.models import Portfolio
 from django.views.decorators.http import require_GET
 from django.utils.decorators import method_decorator
 from django.template.loader import render_to_string
+from django.shortcuts import get_object_or_404, render
+from core.views import AutocompleteView
+from core.purge import pending_purge_ids
 
 
-class ObligationListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
+class ObligationListView(LoginRequiredMixin, ConditionalListMixin, SmartPaginationMixin, ListView):
     model = Obligation
     context_object_name = "obligations"
     paginate_by = 10
+    etag_models = (Debtor, Portfolio)
+    pagination_mode = 'keyset'
+    keyset_ordering = '-id'
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().for_user(self.request.user)
         portfolio_id = self.kwargs.get('portfolio_id', None)
         if portfolio_id:
             queryset = queryset.filter(portfolio_id=portfolio_id)
@@ -54,9 +61,36 @@ class ObligationListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
                 context['portfolio'] = None
         return context
 
+class ObligationExportView(ExportMixin, ObligationListView):
+    export_columns = (
+        ('ID', 'id'),
+        ('Identificación', 'debtor__identification'),
+        ('Deudor', 'debtor__name'),
+        ('Tipo', 'portfolio_type'),
+        ('Crédito', 'credit'),
+        ('Monto', 'amount'),
+        ('Fecha desembolso', 'date_amount'),
+        ('Fecha vencimiento', 'expiration_date'),
+        ('Días mora', 'days_delinquency'),
+        ('Estado', 'status'),
+        ('Saldo', 'balance'),
+        ('Interés', 'interest'),
+        ('Cuota', 'fee'),
+    )
+
+    def get_export_filename(self):
+        return f"obligaciones_portafolio_{self.kwargs.get('portfolio_id')}"
+
+
 class ObligationCreateView(LoginRequiredMixin, CreateView):
     model = Obligation
     form_class = ObligationForm
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['request'] = self.request
+        return kwargs
+
     def get_template_names(self):
         if self.request.headers.get('HX-Request'):
             return ["obligations/partials/obligation_create.html"]
@@ -82,6 +116,12 @@ class ObligationCreateView(LoginRequiredMixin, CreateView):
 class ObligationEditView(LoginRequiredMixin, UpdateView):
     model = Obligation
     form_class = ObligationForm
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['request'] = self.request
+        return kwargs
+
     def get_template_names(self):
         if self.request.headers.get('HX-Request'):
             return ["obligations/partials/obligation_edit.html"]
@@ -114,10 +154,55 @@ class ObligationDeleteView(LoginRequiredMixin, DeleteView):
     def get_success_url(self):
         return reverse('obligation-list', kwargs={'portfolio_id': self.object.portfolio_id})
 
+class ObligationImportCreateView(LoginRequiredMixin, CreateView):
+    model = ObligationImport
+    form_class = ObligationImportForm
+    template_name = "obligations/partials/obligation_import.html"
+
+    def get_portfolio(self):
+        """Portafolio de la URL, solo si el usuario lo ve (404 si no)."""
+        if not hasattr(self, 'portfolio'):
+            self.portfolio = get_object_or_404(
+                Portfolio.objects.for_user(self.request.user), pk=self.kwargs.get('portfolio_id'),
+            )
+        return self.portfolio
+
+    def form_valid(self, form):
+        form.instance.portfolio = self.get_portfolio()
+        form.instance.created_by = self.request.user
+        self.object = form.save()
+        enqueue('portfolio.run_import', [self.object.pk], label=f"Importación #{self.object.pk}", user=self.request.user)
+        return render(self.request, "obligations/partials/import_status.html", {'import': self.object})
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['portfolio_id'] = self.get_portfolio().pk
+        return context
+
+
+class ObligationImportStatusView(LoginRequiredMixin, DetailView):
+    model = ObligationImport
+    context_object_name = "import"
+    template_name = "obligations/partials/import_status.html"
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.user.is_superuser:
+            return queryset
+        return queryset.filter(portfolio__tenant_id=self.request.tenant_id)
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        if self.object.status == ObligationImport.STATUS_FINISHED:
+            response['HX-Trigger'] = 'reload-table'
+        return response
+
+
 class PortfolioListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
     model = Portfolio
     context_object_name = "portfolios"
     paginate_by = 10
+    count_cache_models = (Contract,)
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -126,8 +211,7 @@ class PortfolioListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
         client_id = self.request.GET.get('cliente_id', None)
         contract_id = self.request.GET.get('contrato_id', None)
 
-        if not self.request.user.is_superuser:
-            queryset = queryset.filter(contract__client__tenant=self.request.user.tenant)
+        queryset = queryset.for_user(self.request.user)
 
         if pk:
             queryset = queryset.filter(contract=pk)
@@ -138,7 +222,7 @@ class PortfolioListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
         if contract_id:
             queryset = queryset.filter(contract_id=contract_id)
 
-        return queryset.order_by('-date_created')
+        return queryset.select_related('contract__client', 'stats').order_by('-date_created')
 
     def get_template_names(self):
         pk = self.kwargs.get('pk', None)
@@ -159,8 +243,8 @@ class PortfolioListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
         if pk:
             context['contract'] = Contract.objects.get(pk=pk)
         else:
-            context['clients'] = Client.objects.filter(tenant=self.request.user.tenant)
-            context['contracts'] = Contract.objects.filter(client__tenant=self.request.user.tenant)
+            context['clients'] = Client.objects.filter(tenant_id=self.request.tenant_id)
+            context['contracts'] = Contract.objects.filter(client__tenant_id=self.request.tenant_id)
             context['selected_client_id'] = selected_client_id
             context['selected_contract_id'] = selected_contract_id
         return context
@@ -208,7 +292,7 @@ class PortfolioCreateView(LoginRequiredMixin, CreateView):
             context['contract'] = Contract.objects.get(pk=contract_id)
         else:
             # Para el formulario general, pasar clientes
-            context['clients'] = Client.objects.filter(tenant=self.request.user.tenant)
+            context['clients'] = Client.objects.filter(tenant_id=self.request.tenant_id)
             context['contracts'] = []
         return context
 
@@ -259,7 +343,7 @@ class PortfolioDeleteView(LoginRequiredMixin, View):
                 os.remove(portfolio.logo.path)
             except:
                 pass
-            portfolio.delete()
+            portfolio.soft_delete(user=request.user)
             return HttpResponse(status=204, headers={'HX-Trigger': 'portfolioDeleted'})
         except Portfolio.DoesNotExist:
             return HttpResponse(status=404)
@@ -269,16 +353,19 @@ class PortfolioDeleteView(LoginRequiredMixin, View):
             return HttpResponseNotAllowed(['DELETE'])
         return super().dispatch(request, *args, **kwargs)
 
-class DebtorListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
+class DebtorListView(LoginRequiredMixin, ConditionalListMixin, SmartPaginationMixin, ListView):
     model = Debtor
     context_object_name = "debtors"
     paginate_by = 10
+    count_cache_models = (Obligation,)
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().for_user(self.request.user)
         portfolio_id = self.kwargs.get('portfolio_id', None)
 
         if portfolio_id:
+            if portfolio_id in pending_purge_ids(Portfolio):
+                return queryset.none()
             queryset = queryset.filter(obligations__portfolio_id=portfolio_id).distinct()
 
         nombre = self.request.GET.get('nombre', '').strip()
@@ -299,7 +386,36 @@ class DebtorListView(LoginRequiredMixin, SmartPaginationMixin, ListView):
         context = super().get_context_data(**kwargs)
         context['request'] = self.request
         return context
-    
+
+@method_decorator(require_GET, name='dispatch')
+class DebtorSearchView(LoginRequiredMixin, View):
+    """Typeahead de deudores: `?q=texto&limit=10`, responde JSON ordenado por relevancia."""
+    max_limit = 50
+
+    def get(self, request, *args, **kwargs):
+        from apps.portfolio.search import search_debtors
+        query = request.GET.get('q', '')
+        try:
+            limit = min(max(int(request.GET.get('limit', 10)), 1), self.max_limit)
+        except ValueError:
+            limit = 10
+        debtors = search_debtors(query, Debtor.objects.for_user(request.user), limit=limit)
+        debtors = debtors.values('id', 'name', 'identification', 'score')
+        results = [
+            {**debtor, 'score': round(debtor['score'], 3)}
+            for debtor in debtors
+        ]
+        return JsonResponse({'query': query, 'results': results})
+
+class DebtorAutocompleteView(AutocompleteView):
+    def get_queryset(self, query):
+        from apps.portfolio.search import search_debtors
+        debtors = Debtor.objects.for_user(self.request.user).only('name', 'identification')
+        return search_debtors(query, debtors, limit=None)
+
+    def label_from_instance(self, obj):
+        return f"{obj.name} ({obj.identification})"
+
 class DebtorCreateView(LoginRequiredMixin, CreateView):
     model = Debtor
     form_class = DebtorForm
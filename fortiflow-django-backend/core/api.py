@@ -0,0 +1,222 @@
+"""
+Piezas comunes de la API REST. Los viewsets viven en `apps/*/api.py` y las
+rutas en `core/api_urls.py`.
+
+- Las consultas se acotan al tenant del usuario (`for_user`).
+- Los filtros por query string solo se permiten sobre columnas indexadas
+  (`filter_fields`).
+- Los endpoints `bulk/` crean (POST) o actualizan (PATCH) listas de objetos
+  con `bulk_create` / `bulk_update`, validando las claves foráneas con una
+  consulta por campo en lugar de una por fila.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core.cache import bump_generation
+from core.events import table_changed
+
+NOT_VISIBLE = "No existe o no pertenece a su tenant."
+
+
+class ScopedRelation:
+    """
+    Clave foránea que solo acepta ids visibles para el usuario.
+    `queryset_for_user(user)` devuelve los registros permitidos y
+    `tenant_lookup` la ruta hasta su tenant.
+    """
+
+    def __init__(self, queryset_for_user, tenant_lookup='tenant_id'):
+        self.queryset_for_user = queryset_for_user
+        self.tenant_lookup = tenant_lookup
+
+    def resolve(self, user, ids):
+        """{id: tenant_id} de los ids visibles."""
+        queryset = self.queryset_for_user(user).filter(pk__in=ids)
+        return dict(queryset.values_list('pk', self.tenant_lookup))
+
+
+def resolve_relations(serializer, items):
+    """
+    Comprueba las `scoped_relations` de `serializer` para todos los `items`
+    (dicts validados) y les asigna `tenant_id` desde `tenant_relation`.
+    """
+    user = serializer.context['request'].user
+    errors = [{} for _ in items]
+    tenants = {}
+    for field, relation in serializer.scoped_relations.items():
+        ids = {item[field] for item in items if item.get(field) is not None}
+        found = relation.resolve(user, ids) if ids else {}
+        tenants[field] = found
+        for index, item in enumerate(items):
+            if item.get(field) is not None and item[field] not in found:
+                errors[index][field.removesuffix('_id')] = [NOT_VISIBLE]
+    if any(errors):
+        if len(items) == 1 and not isinstance(serializer.parent, serializers.ListSerializer):
+            raise ValidationError(errors[0])
+        raise ValidationError([{'index': index, **error} for index, error in enumerate(errors) if error])
+
+    for item in items:
+        if serializer.tenant_relation is None:
+            continue
+        if item.get(serializer.tenant_relation) is not None:
+            item['tenant_id'] = tenants[serializer.tenant_relation][item[serializer.tenant_relation]]
+    return items
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    def run_child_validation(self, data):
+        # En las actualizaciones cada elemento se valida contra su instancia.
+        if self.instance is not None:
+            if not hasattr(self, '_instances'):
+                self._instances = {obj.pk: obj for obj in self.instance}
+            self.child.instance = self._instances.get(data.get('id'))
+        return super().run_child_validation(data)
+
+    def validate(self, attrs):
+        return resolve_relations(self.child, attrs)
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        batch_size = getattr(settings, 'API_BULK_BATCH_SIZE', 500)
+        return model.objects.bulk_create([model(**item) for item in validated_data], batch_size=batch_size)
+
+    def update(self, instances, validated_data):
+        model = self.child.Meta.model
+        fields = set()
+        moved = []
+        for instance, item in zip(instances, validated_data):
+            # Los valores anteriores quedan en la instancia para after_bulk_write
+            # (p. ej. el portafolio del que sale una obligación).
+            instance._bulk_previous = {attr: getattr(instance, attr, None) for attr in item}
+            for attr, value in item.items():
+                setattr(instance, attr, value)
+                fields.add(attr)
+            if 'tenant_id' in item and item['tenant_id'] != instance._bulk_previous['tenant_id']:
+                moved.append(instance)
+        if fields:
+            batch_size = getattr(settings, 'API_BULK_BATCH_SIZE', 500)
+            model.objects.bulk_update(instances, fields, batch_size=batch_size)
+        for instance in moved:
+            instance.propagate_tenant()
+        return instances
+
+
+class TenantModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer cuyas FKs (declaradas como `<campo>_id`) se validan con
+    `scoped_relations` y cuyo `tenant` se copia de `tenant_relation` o, si no
+    hay, del usuario que crea el registro.
+    """
+    scoped_relations = {}
+    tenant_relation = None
+
+    class Meta:
+        list_serializer_class = BulkListSerializer
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if not isinstance(self.parent, serializers.ListSerializer):
+            resolve_relations(self, [attrs])
+        return attrs
+
+    def to_internal_value(self, data):
+        attrs = super().to_internal_value(data)
+        if self.tenant_relation is None and self.instance is None:
+            attrs['tenant_id'] = self.context['request'].user.tenant_id
+        return attrs
+
+
+class IndexedFilterMixin:
+    """
+    Filtros por query string declarados en `filter_fields`:
+    {parámetro: lookup} o {parámetro: (lookup, función que normaliza el valor)}.
+    Solo deben declararse lookups que un índice resuelve.
+    """
+    filter_fields = {}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        filters = {}
+        for param, lookup in self.filter_fields.items():
+            value = self.request.query_params.get(param, '').strip()
+            if not value:
+                continue
+            normalize = None
+            if isinstance(lookup, tuple):
+                lookup, normalize = lookup
+            field = queryset.model._meta.get_field(lookup.split('__')[0])
+            try:
+                filters[lookup] = normalize(value) if normalize else field.to_python(value)
+            except (DjangoValidationError, ValueError):
+                raise ValidationError({param: ["Valor inválido."]})
+        return queryset.filter(**filters)
+
+
+def previous_values(objects, attr):
+    """Valores de `attr` antes de una actualización por lotes (los que cambió)."""
+    return {
+        obj._bulk_previous[attr] for obj in objects
+        if attr in getattr(obj, '_bulk_previous', {})
+    }
+
+
+class TenantScopedViewSetMixin:
+    def get_queryset(self):
+        return super().get_queryset().for_user(self.request.user)
+
+    def after_bulk_write(self, objects, created):
+        """
+        Lo que hacen las señales post_save, que bulk_create y bulk_update no
+        disparan. Las escrituras de un objeto pasan por save() y no lo usan.
+        En una actualización, `previous_values(objects, campo)` da los valores
+        que los objetos tenían antes.
+        """
+        model = self.get_queryset().model
+        tenant_ids = {getattr(obj, 'tenant_id', None) for obj in objects}
+        tenant_ids |= previous_values(objects, 'tenant_id')
+        bump_generation(model, tenant_ids=tenant_ids)
+        table_changed(model, *tenant_ids)
+
+
+class BulkWriteMixin:
+    """
+    `POST <recurso>/bulk/` con una lista de objetos los crea; `PATCH` con
+    una lista de objetos con `id` los actualiza parcialmente. Responde los
+    ids afectados.
+    """
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        items = request.data
+        limit = getattr(settings, 'API_BULK_MAX_ITEMS', 1000)
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'non_field_errors': ["Envíe una lista de objetos."]})
+        if len(items) > limit:
+            raise ValidationError({'non_field_errors': [f"Máximo {limit} objetos por petición."]})
+
+        if request.method == 'POST':
+            serializer = self.get_serializer(data=items, many=True)
+            serializer.is_valid(raise_exception=True)
+            with transaction.atomic():
+                objects = serializer.save()
+                self.after_bulk_write(objects, created=True)
+            return Response({'ids': [obj.pk for obj in objects]}, status=status.HTTP_201_CREATED)
+
+        ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+        if not all(isinstance(pk, int) for pk in ids) or len(set(ids)) != len(ids):
+            raise ValidationError({'id': ["Cada objeto necesita un id entero y único."]})
+        with transaction.atomic():
+            found = self.get_queryset().select_for_update(of=('self',)).in_bulk(ids)
+            missing = [pk for pk in ids if pk not in found]
+            if missing:
+                raise ValidationError({'id': [f"No encontrados: {', '.join(map(str, missing))}."]})
+            serializer = self.get_serializer([found[pk] for pk in ids], data=items, many=True, partial=True)
+            serializer.is_valid(raise_exception=True)
+            objects = serializer.save()
+            self.after_bulk_write(objects, created=False)
+        return Response({'ids': ids})
@@ -0,0 +1,23 @@
+"""
+Rutas de la API REST (`/api/`). Autenticación con JWT: `token/` entrega el
+par de tokens y `token/refresh/` renueva el de acceso.
+"""
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+
+from apps.management.api import AssignmentViewSet, ManagementViewSet
+from apps.portfolio.api import DebtorViewSet, ObligationViewSet, PortfolioViewSet
+
+router = DefaultRouter()
+router.register('portfolios', PortfolioViewSet, basename='api-portfolio')
+router.register('debtors', DebtorViewSet, basename='api-debtor')
+router.register('obligations', ObligationViewSet, basename='api-obligation')
+router.register('assignments', AssignmentViewSet, basename='api-assignment')
+router.register('managements', ManagementViewSet, basename='api-management')
+
+urlpatterns = [
+    path('token/', TokenObtainPairView.as_view(), name='token-obtain-pair'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
+    path('', include(router.urls)),
+]
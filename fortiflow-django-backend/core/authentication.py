@@ -0,0 +1,102 @@
+"""
+Autenticación JWT sin leer el usuario de la base en cada petición.
+
+- `CachedJWTAuthentication` (la de la API y `JWTTemplateAuthMixin`) resuelve
+  el usuario del token con `core.identity.get_identity`: un `CustomUser`
+  completo, con `tenant` y `roles`, que se lee de la base una vez por
+  `IDENTITY_CACHE_TIMEOUT`.
+- `StatelessJWTAuthentication` no consulta nada: devuelve un
+  `TenantTokenUser` armado con los claims del token (id, tenant, roles,
+  superusuario). Sirve para endpoints de solo lectura muy consultados que
+  solo filtran por tenant; no puede usarse donde el usuario se guarda como
+  clave foránea ni donde se leen otros campos del modelo.
+
+Los claims de tenant y roles se agregan al emitir el token y se recalculan al
+refrescarlo, así que en modo sin estado un cambio tarda como máximo
+`ACCESS_TOKEN_LIFETIME` en verse.
+"""
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.identity import attach_identity, get_identity
+
+
+def active_identity(user_id):
+    user = get_identity(user_id)
+    if user is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    if not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    return user
+
+
+def add_identity_claims(token, user):
+    token['username'] = user.get_username()
+    token['tenant_id'] = user.tenant_id
+    token['roles'] = sorted(user.roles)
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    return token
+
+
+class IdentityAuthenticationMixin:
+    """Expone `request.roles` y `request.tenant_id` del usuario autenticado."""
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            attach_identity(request, result[0])
+        return result
+
+
+class CachedJWTAuthentication(IdentityAuthenticationMixin, JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        return active_identity(user_id)
+
+
+class StatelessJWTAuthentication(IdentityAuthenticationMixin, JWTStatelessUserAuthentication):
+    def get_user(self, validated_token):
+        if 'tenant_id' not in validated_token:
+            # Token emitido antes de que existieran los claims de identidad.
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        return TenantTokenUser(validated_token)
+
+
+class TenantTokenUser(TokenUser):
+    """Usuario respaldado solo por el token, con el tenant y los roles de sus claims."""
+
+    @cached_property
+    def tenant_id(self):
+        return self.token.get('tenant_id')
+
+    @cached_property
+    def roles(self):
+        return frozenset(self.token.get('roles', ()))
+
+
+class TenantTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        return add_identity_claims(token, get_identity(user.pk))
+
+
+class TenantTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # El access hereda los claims del refresh; se recalculan para que un
+        # cambio de tenant o de grupos no dure lo que dura el refresh.
+        access = AccessToken(data['access'])
+        add_identity_claims(access, active_identity(access[api_settings.USER_ID_CLAIM]))
+        data['access'] = str(access)
+        return data
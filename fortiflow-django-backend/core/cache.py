@@ -0,0 +1,139 @@
+"""
+Generaciones por modelo para invalidar entradas de caché derivadas de una
+tabla (conteos de paginación, ETags, etc.).
+
+Cada modelo tiene un token que cambia con cada escritura; las claves que
+dependen del modelo incluyen ese token, de modo que una escritura deja
+obsoletas todas las entradas sin tener que buscarlas.
+
+Los tokens se guardan en la tabla de `CacheVersion`, no en la caché: con
+varios procesos web y `runworker` una caché locmem no ve las escrituras de
+los demás, y un ETag armado con ella daría 304 para siempre. Leer los tokens
+de una vista es una consulta por clave primaria; cambiarlos, un
+`INSERT ... ON CONFLICT` al confirmarse la transacción. Un token que falta
+se crea con un valor nuevo, nunca se reutiliza uno anterior.
+
+Además del token global, cada escritura cambia el de su tenant (o el
+compartido si no se sabe a qué tenant afecta). Un usuario de un tenant solo
+depende de esos dos (`get_scoped_generations`): lo que se escribe en otros
+tenants no le invalida nada.
+"""
+import time
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+
+SHARED_SCOPE = 'shared'
+
+
+def generation_key(model, scope=None):
+    key = f"generation:{model._meta.label_lower}"
+    return key if scope is None else f"{key}:{scope}"
+
+
+def read_versions(keys):
+    """Tokens de `keys`, en el mismo orden. Crea los que falten."""
+    model = apps.get_model('account', 'CacheVersion')
+    found = dict(model.objects.filter(key__in=keys).values_list('key', 'value'))
+    missing = sorted(set(keys) - set(found))
+    if missing:
+        token = time.time_ns()
+        model.objects.bulk_create([model(key=key, value=token) for key in missing], ignore_conflicts=True)
+        found.update(model.objects.filter(key__in=missing).values_list('key', 'value'))
+    return [found[key] for key in keys]
+
+
+def write_versions(keys):
+    """
+    Da un token nuevo a `keys` al confirmarse la transacción en curso (o ya,
+    fuera de una). Es una sola sentencia con las claves en orden: no retiene
+    bloqueos mientras dura la transacción ni se cruza con otra escritura.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return
+
+    def write():
+        model = apps.get_model('account', 'CacheVersion')
+        token = time.time_ns()
+        model.objects.bulk_create(
+            [model(key=key, value=token) for key in keys],
+            update_conflicts=True, unique_fields=['key'], update_fields=['value'],
+        )
+
+    transaction.on_commit(write)
+
+
+def get_generations(*models):
+    """Devuelve los tokens de generación de `models`, en el mismo orden."""
+    return read_versions([generation_key(model) for model in models])
+
+
+def _scopes(user):
+    if user is None or user.is_superuser:
+        return (None,)
+    return (SHARED_SCOPE, f"tenant:{user.tenant_id}")
+
+
+def get_scoped_generations(user, *models):
+    """
+    Tokens de `models` de los que dependen los datos que ve `user`: los
+    globales para superusuarios; el compartido y el de su tenant si no.
+    """
+    return read_versions([generation_key(model, scope) for model in models for scope in _scopes(user)])
+
+
+def row_generation_keys(user, *models):
+    return [
+        generation_key(model, 'rows' if scope is None else f"rows:{scope}")
+        for model in models for scope in _scopes(user)
+    ]
+
+
+def get_row_generations(user, *models):
+    """
+    Como `get_scoped_generations`, pero solo cambian con escrituras masivas:
+    las de una fila cambian la versión de esa fila (ver core.fragments).
+    """
+    return read_versions(row_generation_keys(user, *models))
+
+
+def bump_generation(*models, tenant_ids=None, rows=True):
+    """
+    Invalida las entradas que dependen de `models`. Las escrituras masivas
+    (`update`, `bulk_create`, SQL directo) no emiten señales y deben llamarla.
+    Con `tenant_ids` solo se invalidan esos tenants (y las vistas globales);
+    sin ellos, todos. `rows=False` conserva los fragmentos de fila cacheados,
+    para escrituras que ya cambiaron la versión de sus filas.
+    """
+    if tenant_ids is None:
+        scopes = [None, SHARED_SCOPE]
+    else:
+        scopes = [None, *(f"tenant:{tenant_id}" for tenant_id in set(tenant_ids))]
+    if rows:
+        scopes += ['rows' if scope is None else f"rows:{scope}" for scope in scopes]
+    write_versions([generation_key(model, scope) for model in models for scope in scopes])
+
+
+def track_model_writes(*models, deletes=True, dependents=()):
+    """
+    Conecta `post_save` (y `post_delete` si `deletes`) de `models` para que
+    cada escritura cambie su generación y la de `dependents`.
+
+    Un receptor de `post_delete` obliga a Django a cargar las filas borradas
+    en cascada; para tablas grandes que solo se borran en cascada conviene
+    `deletes=False` y declararlas como `dependents` del modelo padre.
+    """
+    for model in models:
+        affected = (model, *dependents)
+
+        def receiver(sender, instance, affected=affected, **kwargs):
+            tenant_id = getattr(instance, 'tenant_id', None)
+            bump_generation(*affected, tenant_ids=None if tenant_id is None else [tenant_id], rows=False)
+
+        uid = f"track_model_writes:{model._meta.label_lower}"
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
+        if deletes:
+            post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
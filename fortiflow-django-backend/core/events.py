@@ -0,0 +1,238 @@
+"""
+Eventos en vivo para el navegador (Server-Sent Events, ver `core.views.EventStreamView`).
+
+Los eventos se publican desde código síncrono (señales, servicios) y se
+entregan a las conexiones SSE abiertas en el event loop del proceso ASGI.
+Cada conexión es solo una cola de asyncio suscrita a sus canales:
+
+- `user:<id>`: eventos de un usuario (notificaciones);
+- `tenant:<id>`: cambios en tablas del tenant;
+- `superusers`: cambios de todos los tenants, para superusuarios;
+- `all`: eventos para todos (notificaciones globales).
+
+`InProcessBroker` reparte dentro del proceso (desarrollo y tests).
+`PostgresBroker` publica con `pg_notify` y cada proceso mantiene una sola
+conexión con LISTEN que reparte a sus suscriptores locales, así que los
+eventos llegan aunque se publiquen desde otro proceso (WSGI, comandos).
+"""
+import asyncio
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+PG_CHANNEL = 'fortiflow_events'
+
+
+def channels_for(user):
+    channels = [f'user:{user.pk}', 'all']
+    if user.is_superuser:
+        channels.append('superusers')
+    elif user.tenant_id:
+        channels.append(f'tenant:{user.tenant_id}')
+    return channels
+
+
+class Subscription:
+    """Cola de una conexión SSE. Si el cliente no consume, los eventos nuevos se descartan."""
+
+    def __init__(self, channels, maxsize):
+        self.channels = tuple(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, message):
+        """Entrega desde cualquier hilo."""
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    @asynccontextmanager
+    async def subscribe(self, channels):
+        subscription = Subscription(channels, getattr(settings, 'EVENTS_QUEUE_SIZE', 100))
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+        try:
+            await self.started(subscription.loop)
+            yield subscription
+        finally:
+            with self._lock:
+                for channel in subscription.channels:
+                    subscribers = self._subscriptions.get(channel)
+                    if subscribers is not None:
+                        subscribers.discard(subscription)
+                        if not subscribers:
+                            del self._subscriptions[channel]
+
+    async def started(self, loop):
+        """Punto de extensión: prepara la recepción de eventos externos en `loop`."""
+
+    def dispatch(self, message):
+        with self._lock:
+            subscribers = list(self._subscriptions.get(message['channel'], ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+    def publish(self, message):
+        self.dispatch(message)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(set().union(*self._subscriptions.values())) if self._subscriptions else 0
+
+
+class PostgresBroker(InProcessBroker):
+    """Reparte vía LISTEN/NOTIFY. Los mensajes deben ocupar menos de 8000 bytes."""
+
+    def __init__(self):
+        super().__init__()
+        self._listeners = {}
+
+    def publish(self, message):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [PG_CHANNEL, json.dumps(message)])
+
+    async def started(self, loop):
+        if loop not in self._listeners:
+            self._listeners[loop] = None
+            self._listen(loop)
+
+    def _listen(self, loop):
+        import psycopg2
+        try:
+            params = connection.get_connection_params()
+            listener = psycopg2.connect(**params)
+            listener.autocommit = True
+            with listener.cursor() as cursor:
+                cursor.execute(f'LISTEN "{PG_CHANNEL}"')
+        except psycopg2.Error:
+            logger.exception("No se pudo abrir la conexión LISTEN; reintentando")
+            loop.call_later(5, self._listen, loop)
+            return
+        self._listeners[loop] = listener
+        loop.add_reader(listener.fileno(), self._receive, loop, listener)
+
+    def _receive(self, loop, listener):
+        import psycopg2
+        try:
+            listener.poll()
+        except psycopg2.Error:
+            logger.exception("Conexión LISTEN perdida; reintentando")
+            loop.remove_reader(listener.fileno())
+            listener.close()
+            loop.call_later(1, self._listen, loop)
+            return
+        while listener.notifies:
+            notify = listener.notifies.pop(0)
+            try:
+                message = json.loads(notify.payload)
+            except ValueError:
+                continue
+            self.dispatch(message)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, 'EVENTS_BROKER', 'core.events.InProcessBroker'))()
+    return _broker
+
+
+@receiver(setting_changed)
+def _reset_broker(setting, **kwargs):
+    global _broker
+    if setting == 'EVENTS_BROKER':
+        _broker = None
+
+
+def publish(channel, event, data=None):
+    """Publica `event` en `channel` cuando se confirme la transacción actual."""
+    message = {'channel': channel, 'event': event, 'data': data}
+    transaction.on_commit(lambda: _publish(message))
+
+
+def _publish(message):
+    try:
+        get_broker().publish(message)
+    except Exception:
+        # Los eventos en vivo son un aviso; no deben romper la escritura.
+        logger.exception("No se pudo publicar el evento %s", message['event'])
+
+
+def publish_to_users(user_ids, event, data=None):
+    for user_id in user_ids:
+        publish(f'user:{user_id}', event, data)
+
+
+class _TableChanges(set):
+    """Cambios pendientes de una transacción; se registra como callback de on_commit."""
+
+    def __call__(self):
+        events = {event for event, tenant_id in self if tenant_id is not None}
+        for event, tenant_id in self:
+            channel = 'all' if tenant_id is None else f'tenant:{tenant_id}'
+            _publish({'channel': channel, 'event': event, 'data': None})
+        for event in events:
+            _publish({'channel': 'superusers', 'event': event, 'data': None})
+
+
+_pending = threading.local()
+
+
+def table_changed(model, *tenant_ids):
+    """
+    Avisa que cambiaron filas de `model` en los tenants indicados (sin
+    tenants: en todos). Dentro de una transacción se agrupan y se envía un
+    evento por tabla y tenant al confirmar.
+    """
+    event = f'{model._meta.model_name}-changed'
+    changes = {(event, tenant_id) for tenant_id in tenant_ids or (None,)}
+    if not connection.in_atomic_block:
+        _TableChanges(changes)()
+        return
+    pending = getattr(_pending, 'changes', None)
+    # Un rollback descarta los callbacks de on_commit: si el conjunto ya no
+    # está registrado pertenece a una transacción anterior.
+    if pending is None or not any(entry[1] is pending for entry in connection.run_on_commit):
+        pending = _pending.changes = _TableChanges()
+        transaction.on_commit(pending)
+    pending.update(changes)
+
+
+def track_table_events(*models, deletes=True):
+    """Publica `<modelo>-changed` en el tenant de cada fila guardada (o borrada)."""
+    for model in models:
+        def handler(sender, instance, raw=False, **kwargs):
+            if not raw:
+                table_changed(sender, instance.tenant_id)
+
+        uid = f"track_table_events:{model._meta.label_lower}"
+        post_save.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+        if deletes:
+            post_delete.connect(handler, sender=model, weak=False, dispatch_uid=uid)
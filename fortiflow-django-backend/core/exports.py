@@ -0,0 +1,110 @@
+import csv
+import tempfile
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+EXPORT_CHUNK_SIZE = 2000
+# Un libro XLSX se arma en memoria hasta este tamaño y en disco a partir de él.
+XLSX_SPOOL_SIZE = 8 * 1024 * 1024
+XLSX_BLOCK_SIZE = 64 * 1024
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class Echo:
+    """Pseudo-búfer para `csv.writer`: devuelve la línea en vez de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(rows, headers):
+    """Bloques de texto del CSV, de a `EXPORT_CHUNK_SIZE` filas."""
+    writer = csv.writer(Echo())
+    lines = ['\ufeff', writer.writerow(headers)]
+    for row in rows:
+        lines.append(writer.writerow(row))
+        if len(lines) >= EXPORT_CHUNK_SIZE:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines)
+
+
+def xlsx_value(value):
+    """Valor que openpyxl acepta: sin zona horaria ni caracteres de control."""
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        # Excel no conoce zonas horarias: se exporta la hora local.
+        return timezone.make_naive(value)
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub('', value)
+    return value
+
+
+def xlsx_chunks(rows, headers):
+    """
+    Bloques de bytes de un libro XLSX. El libro `write_only` de openpyxl
+    vuelca las filas a disco a medida que se recorren; al guardarlo, el
+    archivo se arma en un SpooledTemporaryFile (en memoria hasta
+    `XLSX_SPOOL_SIZE`, en disco después) y se envía de a `XLSX_BLOCK_SIZE`
+    bytes, sin cargarlo entero en memoria.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(headers)
+    for row in rows:
+        sheet.append([xlsx_value(value) for value in row])
+    with tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_SIZE) as output:
+        workbook.save(output)
+        output.seek(0)
+        while chunk := output.read(XLSX_BLOCK_SIZE):
+            yield chunk
+
+
+def iterate_async(chunks):
+    """
+    Recorre el iterador síncrono `chunks` desde un iterador asíncrono. Con
+    ASGI, Django lee entero un iterador síncrono antes de enviar la primera
+    parte; así cada bloque se produce en el hilo de la petición (el que abrió
+    el cursor) y se envía en cuanto está listo.
+    """
+    iterator = iter(chunks)
+    next_chunk = sync_to_async(next)
+
+    async def generate():
+        try:
+            while (chunk := await next_chunk(iterator, None)) is not None:
+                yield chunk
+        finally:
+            # Si el cliente corta, el cursor se cierra en su propio hilo.
+            if hasattr(iterator, 'close'):
+                await sync_to_async(iterator.close)()
+
+    return generate()
+
+
+def streaming_response(chunks, content_type, filename, asynchronous=False):
+    response = StreamingHttpResponse(iterate_async(chunks) if asynchronous else chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_queryset(queryset, columns, filename, export_format='csv', asynchronous=False):
+    """
+    Exporta `queryset` a CSV o XLSX. `columns` es una secuencia de pares
+    (encabezado, lookup); los lookups se resuelven con `values_list` en una
+    sola consulta y se recorren con un cursor del lado del servidor. El CSV
+    se envía a medida que se genera y el XLSX por bloques una vez guardado;
+    con `asynchronous` (ASGI) la respuesta usa un iterador asíncrono.
+    """
+    headers = [header for header, _ in columns]
+    rows = queryset.values_list(*[lookup for _, lookup in columns]).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    if export_format == 'xlsx':
+        return streaming_response(xlsx_chunks(rows, headers), XLSX_CONTENT_TYPE, f"{filename}.xlsx", asynchronous)
+    return streaming_response(
+        csv_chunks(rows, headers), 'text/csv; charset=utf-8', f"{filename}.csv", asynchronous,
+    )
@@ -0,0 +1,130 @@
+"""
+Caché de fragmentos HTML por fila de tabla (tag `{% rowcache %}` de
+`fragment_tags`).
+
+Cada fila se guarda con una clave que incluye:
+
+- la versión de su objeto y de los objetos de los que depende (p. ej. el
+  deudor de una obligación). La versión cambia con cada save/delete del
+  objeto (`track_row_versions`);
+- las generaciones de filas de sus modelos en el tenant del usuario
+  (`core.cache.get_row_generations`), que cambian con las escrituras
+  masivas, que no tocan versiones fila a fila;
+- la plantilla, la posición del tag, el tenant del usuario y el idioma.
+
+Una página reutiliza las filas que no cambiaron y solo renderiza las demás:
+dos lecturas en lote (versiones y fragmentos) en lugar de una por fila.
+
+Las versiones viven, como las generaciones, en la tabla de `CacheVersion`
+(`core.cache.read_versions`), así que una fila que cambia en otro proceso
+(otro worker web, `runworker`) también se vuelve a renderizar aquí. La tarea
+'core.prune_row_versions' borra las que no cambian desde hace más de
+`FRAGMENT_CACHE_TIMEOUT`: sus fragmentos ya expiraron. Los fragmentos usan
+el alias `FRAGMENT_CACHE_ALIAS` (locmem por defecto; cualquier backend de
+Django sirve) y pueden perderse sin que se muestre nada obsoleto.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+from django.utils import translation
+from django.utils.safestring import mark_safe
+
+from core.cache import read_versions, row_generation_keys, write_versions
+
+_tracked = set()
+
+
+def fragment_cache():
+    return caches[getattr(settings, 'FRAGMENT_CACHE_ALIAS', 'fragments')]
+
+
+def fragment_timeout():
+    return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 3600)
+
+
+ROW_VERSION_PREFIX = 'row-version:'
+
+
+def row_version_key(model, pk):
+    return f"{ROW_VERSION_PREFIX}{model._meta.label_lower}:{pk}"
+
+
+def bump_row_version(model, pk):
+    # Tras el commit (write_versions): antes, otra petición podría cachear
+    # los datos viejos con la versión nueva.
+    write_versions([row_version_key(model, pk)])
+
+
+def track_row_versions(*models, deletes=True):
+    """Cambia la versión de la fila en cada save (y delete) de `models`."""
+    for model in models:
+        _tracked.add(model)
+
+        def handler(sender, instance, raw=False, **kwargs):
+            if not raw:
+                bump_row_version(sender, instance.pk)
+
+        uid = f"track_row_versions:{model._meta.label_lower}"
+        post_save.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+        if deletes:
+            post_delete.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+
+
+def _model(obj):
+    model = obj._meta.concrete_model
+    if model not in _tracked:
+        raise ImproperlyConfigured(
+            f"{model._meta.label} no registra versiones de fila; llame a track_row_versions en su AppConfig.ready()."
+        )
+    return model
+
+
+def get_row_versions(objects, extra_keys=()):
+    """
+    {(modelo, pk): versión} de `objects`, creando las que falten, y los
+    tokens de `extra_keys` en la misma consulta.
+    """
+    keys = {row_version_key(_model(obj), obj.pk): (_model(obj), obj.pk) for obj in objects}
+    values = read_versions([*keys, *extra_keys])
+    return dict(zip(keys.values(), values)), values[len(keys):]
+
+
+def cached_rows(rows, render, scope, user=None):
+    """
+    Devuelve el HTML de `rows`, una lista de (objeto, dependencias), en orden.
+    Las dependencias pueden ser instancias de modelos con versión o valores
+    simples. `render(objeto)` se llama solo para las filas sin fragmento.
+    `scope` distingue el punto de la plantilla que cachea.
+    """
+    if not rows:
+        return ''
+    instances = [obj for item, dependencies in rows for obj in (item, *dependencies) if isinstance(obj, Model)]
+    models = sorted({_model(obj) for obj in instances}, key=lambda model: model._meta.label_lower)
+    versions, generations = get_row_versions(instances, row_generation_keys(user, *models))
+    tenant = None if user is None else 'su' if user.is_superuser else user.tenant_id
+
+    def token(value):
+        if isinstance(value, Model):
+            model = _model(value)
+            return (model._meta.label_lower, value.pk, versions[(model, value.pk)])
+        return repr(value)
+
+    keys = []
+    for obj, dependencies in rows:
+        raw = repr((scope, tenant, translation.get_language(), generations, token(obj), [token(d) for d in dependencies]))
+        keys.append(f"fragment:{hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()}")
+
+    store = fragment_cache()
+    found = store.get_many(keys)
+    rendered = {}
+    for key, (obj, _) in zip(keys, rows):
+        if key not in found and key not in rendered:
+            rendered[key] = str(render(obj))
+    if rendered:
+        store.set_many(rendered, fragment_timeout())
+    found.update(rendered)
+    return mark_safe(''.join(found[key] for key in keys))
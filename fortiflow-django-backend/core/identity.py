@@ -0,0 +1,112 @@
+"""
+Identidad cacheada de los usuarios autenticados por token.
+
+Con JWT cada petición llega sin sesión y habría que leer `account_user` (y
+sus grupos) en cada una. `get_identity` guarda el usuario con su tenant y sus
+roles (nombres de grupo) en la caché `default`, compartida por todos los
+procesos, durante `IDENTITY_CACHE_TIMEOUT` segundos. Las escrituras sobre el
+usuario, su tenant, sus grupos o los propios grupos borran la entrada al
+confirmar la transacción (`track_identity_changes`); como la caché es
+compartida, el borrado vale para todos los procesos y el plazo solo acota lo
+que dura un cambio hecho fuera del ORM.
+
+`attach_identity` expone el resultado en cada petición como `request.roles`
+y `request.tenant_id` (lo llaman `core.middleware.IdentityMiddleware` para la
+sesión y las autenticaciones JWT de `core.authentication`).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+
+def identity_timeout():
+    return getattr(settings, 'IDENTITY_CACHE_TIMEOUT', 60)
+
+
+def identity_key(user_id):
+    return f"identity:{user_id}"
+
+
+def load_identity(user_id):
+    """Lee de la base el usuario con `tenant` y `roles`, o None si no existe."""
+    user = get_user_model().objects.select_related('tenant').filter(pk=user_id).first()
+    if user is not None:
+        user.roles = frozenset(user.groups.values_list('name', flat=True))
+    return user
+
+
+def get_identity(user_id):
+    """Usuario `user_id` con `tenant` y `roles` cargados, desde la caché si está."""
+    key = identity_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = load_identity(user_id)
+        if user is not None:
+            cache.set(key, user, identity_timeout())
+    return user
+
+
+def attach_identity(request, user):
+    """
+    Asigna `request.roles` y `request.tenant_id` de `user`. A un usuario
+    leído de la base le agrega `roles` y le precarga `tenant` desde la
+    identidad cacheada, para que leerlo no consulte la base.
+    """
+    request = getattr(request, '_request', request)
+    if not user.is_authenticated:
+        request.roles, request.tenant_id = frozenset(), None
+        return
+    if not hasattr(user, 'roles'):
+        identity = get_identity(user.pk)
+        user.roles = identity.roles if identity is not None else frozenset()
+        tenant_field = user._meta.get_field('tenant')
+        if identity is not None and identity.tenant_id == user.tenant_id and not tenant_field.is_cached(user):
+            tenant_field.set_cached_value(user, identity.tenant)
+    request.roles = user.roles
+    request.tenant_id = user.tenant_id
+
+
+def forget_identities(user_ids):
+    user_ids = list(user_ids)
+    if user_ids:
+        # Tras el commit: antes, otra petición podría volver a cachear los
+        # datos viejos.
+        transaction.on_commit(lambda: cache.delete_many([identity_key(pk) for pk in user_ids]))
+
+
+def _user_changed(sender, instance, **kwargs):
+    forget_identities([instance.pk])
+
+
+def _tenant_changed(sender, instance, **kwargs):
+    forget_identities(get_user_model().objects.filter(tenant_id=instance.pk).values_list('pk', flat=True))
+
+
+def _group_changed(sender, instance, **kwargs):
+    forget_identities(instance.user_set.values_list('pk', flat=True))
+
+
+def _membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        forget_identities([instance.pk])
+    elif action == 'pre_clear':
+        forget_identities(instance.user_set.values_list('pk', flat=True))
+    else:
+        forget_identities(pk_set)
+
+
+def track_identity_changes():
+    User = get_user_model()
+    tenant_model = User._meta.get_field('tenant').related_model
+    post_save.connect(_user_changed, sender=User, dispatch_uid='identity:user:save')
+    post_delete.connect(_user_changed, sender=User, dispatch_uid='identity:user:delete')
+    post_save.connect(_tenant_changed, sender=tenant_model, dispatch_uid='identity:tenant:save')
+    post_save.connect(_group_changed, sender=Group, dispatch_uid='identity:group:save')
+    # Al borrar un grupo sus membresías desaparecen antes de post_delete.
+    pre_delete.connect(_group_changed, sender=Group, dispatch_uid='identity:group:delete')
+    m2m_changed.connect(_membership_changed, sender=User.groups.through, dispatch_uid='identity:membership')
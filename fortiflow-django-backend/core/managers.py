@@ -0,0 +1,166 @@
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.cache import bump_generation
+from core.purge import forget_pending_purges, pending_purge_ids
+
+
+def pending_parent_filter(model, path):
+    """
+    Q con las filas de `model` cuyo padre en `path` (estilo lookup) espera
+    la purga, o None si no hay ninguno. Filtra por la columna de la FK, sin
+    join; un tramo intermedio (p. ej. 'assignment__program') se resuelve con
+    una subconsulta sobre la tabla intermedia solo si hay pendientes.
+    """
+    first, _, rest = path.partition('__')
+    field = model._meta.get_field(first)
+    if rest:
+        inner = pending_parent_filter(field.related_model, rest)
+        if inner is None:
+            return None
+        ids = field.related_model._base_manager.filter(inner).values('pk')
+    else:
+        ids = pending_purge_ids(field.related_model)
+        if not ids:
+            return None
+    return Q(**{f'{field.attname}__in': ids})
+
+
+class TenantQuerySet(models.QuerySet):
+    """
+    QuerySet para modelos con la columna `tenant` desnormalizada.
+
+    `live_parents` del modelo son las rutas (estilo lookup) hasta sus padres
+    con `SoftDeleteMixin`, p. ej. 'portfolio' o 'assignment__program'. Sus
+    filas siguen en la tabla hasta que 'core.purge' las borra, pero `live()`,
+    y con él `for_tenant` y `for_user`, las oculta desde que el padre se
+    marca como borrado. Los ids pendientes salen de la caché
+    (`core.purge.pending_purge_ids`): sin purgas pendientes `live()` no
+    agrega ninguna condición.
+    """
+
+    def live(self):
+        """Sin las filas de padres marcados como borrados (ver `live_parents`)."""
+        queryset = self
+        for parent in getattr(self.model, 'live_parents', ()):
+            pending = pending_parent_filter(self.model, parent)
+            if pending is not None:
+                queryset = queryset.exclude(pending)
+        return queryset
+
+    def for_tenant(self, tenant_id):
+        return self.live().filter(tenant_id=tenant_id)
+
+    def for_user(self, user):
+        """Filas visibles para `user`: todas si es superusuario, las de su tenant si no."""
+        queryset = self.live()
+        if user.is_superuser:
+            return queryset
+        return queryset.filter(tenant_id=user.tenant_id)
+
+
+class TenantDerivedMixin:
+    """
+    Mantiene `tenant_id` sincronizado con el del registro padre al guardar.
+
+    `tenant_source` es la ruta (estilo lookup) desde el modelo hasta un
+    registro que ya tiene `tenant_id`, p. ej. 'portfolio' o
+    'program__supervisor'. Si el primer tramo ya está cargado en memoria no
+    se hace ninguna consulta.
+
+    `tenant_dependents` son los related_name de los hijos que copian el
+    tenant de este modelo; si el tenant cambia se actualizan con un UPDATE.
+    """
+    tenant_source = None
+    tenant_dependents = ()
+
+    def resolve_tenant_id(self):
+        first, _, rest = self.tenant_source.partition('__')
+        field = self._meta.get_field(first)
+        source_id = getattr(self, field.attname)
+        if source_id is None:
+            return None
+        if field.is_cached(self):
+            obj = getattr(self, first)
+            for part in filter(None, rest.split('__')):
+                obj = getattr(obj, part)
+            return obj.tenant_id
+        lookup = f'{rest}__tenant_id' if rest else 'tenant_id'
+        return field.related_model._base_manager.filter(pk=source_id).values_list(lookup, flat=True).first()
+
+    def save(self, *args, **kwargs):
+        previous = self.tenant_id
+        adding = self._state.adding
+        if self.tenant_source:
+            self.tenant_id = self.resolve_tenant_id()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'tenant'}
+        super().save(*args, **kwargs)
+        if not adding and self.tenant_id != previous:
+            self.propagate_tenant()
+
+    def propagate_tenant(self):
+        # El tenant anterior también ve el cambio: se invalidan todos.
+        affected = [type(self)]
+        for related_name in self.tenant_dependents:
+            related = getattr(self, related_name).all()
+            for child in related.model.tenant_dependents:
+                field = related.model._meta.get_field(child)
+                field.related_model._base_manager.filter(
+                    **{f'{field.field.name}__in': related.values('pk')}
+                ).update(tenant_id=self.tenant_id)
+                affected.append(field.related_model)
+            related.update(tenant_id=self.tenant_id)
+            affected.append(related.model)
+        bump_generation(*affected)
+
+
+class SoftDeleteManager(models.Manager):
+    """Manager por defecto de los modelos con `SoftDeleteMixin`: oculta las filas borradas."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class SoftDeleteMixin:
+    """
+    Borrado diferido para modelos con muchos dependientes en cascada.
+
+    `soft_delete()` marca `deleted_at` en la fila y en las de
+    `soft_delete_dependents` ((modelo 'app.Modelo', lookup hasta esta fila)),
+    que desaparecen de inmediato de `objects`, y encola el job 'core.purge'
+    (`core.purge.purge`), que borra por lotes los modelos de `purge_plan`
+    (mismo formato, de las hojas hacia arriba) y al final la fila. Las filas
+    de `purge_plan` no se marcan (serían millones de UPDATE): sus modelos
+    declaran `live_parents` y `TenantQuerySet.live()` las oculta mientras
+    tanto por los ids de los padres pendientes. `all_objects` incluye las filas borradas.
+    """
+    soft_delete_dependents = ()
+    purge_plan = ()
+
+    def soft_delete(self, user=None):
+        from apps.jobs.queue import enqueue
+
+        now = timezone.now()
+        model = type(self)
+        affected = [model]
+        with transaction.atomic():
+            model.all_objects.filter(pk=self.pk, deleted_at__isnull=True).update(deleted_at=now)
+            for label, lookup in self.soft_delete_dependents:
+                related = apps.get_model(label)
+                related.all_objects.filter(**{lookup: self.pk}, deleted_at__isnull=True).update(deleted_at=now)
+                affected.append(related)
+            # Los dependientes de purge_plan dejan de verse ya (live_parents).
+            forget_pending_purges(*affected)
+            affected.extend(apps.get_model(label) for label, _ in self.purge_plan)
+            bump_generation(*dict.fromkeys(affected))
+            enqueue(
+                'core.purge', [model._meta.label, self.pk],
+                label=f"Borrado de {self}",
+                user=user,
+                tenant_id=getattr(self, 'tenant_id', None),
+            )
+        self.deleted_at = now
@@ -0,0 +1,30 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from core.identity import attach_identity
+
+
+class IdentityMiddleware:
+    """
+    Expone `request.roles` (nombres de grupo) y `request.tenant_id` del
+    usuario de la sesión, resueltos una vez por petición desde la caché de
+    `core.identity`. Las vistas y formularios los usan en lugar de consultar
+    `user.groups` o `user.tenant`. Va después de AuthenticationMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        attach_identity(request, request.user)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        user = await request.auser()
+        await sync_to_async(attach_identity)(request, user)
+        return await self.get_response(request)
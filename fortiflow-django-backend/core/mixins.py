@@ -1,4 +1,90 @@
+import hashlib
+
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import InvalidPage, Page
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers, quote_etag
+from core.cache import get_scoped_generations
+from core.exports import export_queryset
+from core.pagination import CachedApproximateCountPaginator, CachedCountPaginator, KeysetPaginator
+
+
 class SmartPaginationMixin:
+    """
+    Paginación para ListView con tres modos:
+
+    - por defecto, páginas numeradas (`?page=N`);
+    - con `approximate_count_threshold`, el total usa la estimación del
+      planificador cuando supera ese número de filas;
+    - con `keyset_ordering` (p. ej. '-id'), la vista acepta `?after=` /
+      `?before=` y pagina por clave sin OFFSET ni COUNT. Con
+      `pagination_mode = 'keyset'` es el modo por defecto de la vista.
+
+    El total de las páginas numeradas se guarda en caché por vista, tenant y
+    filtros. La entrada deja de valer cuando se escribe en `self.model` o en
+    alguno de `count_cache_models` (los modelos por los que filtra la vista).
+    """
+    pagination_mode = 'offset'
+    keyset_ordering = None
+    approximate_count_threshold = None
+    count_cache_models = ()
+    count_cache_per_user = False
+    count_cache_ignored_params = ('page', 'after', 'before', 'page_size')
+
+    def uses_keyset_pagination(self):
+        if not self.keyset_ordering:
+            return False
+        if self.pagination_mode == 'keyset':
+            return True
+        return 'after' in self.request.GET or 'before' in self.request.GET
+
+    def get_count_cache_scope(self):
+        user = self.request.user
+        scope = [str(getattr(user, 'tenant_id', None)), 'su' if user.is_superuser else '']
+        if self.count_cache_per_user:
+            scope.append(str(user.pk))
+        return ':'.join(scope)
+
+    def get_count_cache_key(self):
+        params = sorted(
+            (key, value.strip())
+            for key, values in self.request.GET.lists()
+            if key not in self.count_cache_ignored_params
+            for value in values
+            if value.strip()
+        )
+        generations = get_scoped_generations(self.request.user, self.model, *self.count_cache_models)
+        raw = repr((sorted(self.kwargs.items()), params, generations))
+        digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+        view = f"{type(self).__module__}.{type(self).__qualname__}"
+        return f"paginator-count:{view}:{self.get_count_cache_scope()}:{digest}"
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        kwargs.setdefault('cache_key', self.get_count_cache_key())
+        if self.approximate_count_threshold is not None:
+            return CachedApproximateCountPaginator(
+                queryset, per_page, orphans=orphans,
+                allow_empty_first_page=allow_empty_first_page,
+                threshold=self.approximate_count_threshold, **kwargs
+            )
+        return CachedCountPaginator(
+            queryset, per_page, orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page, **kwargs
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.uses_keyset_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, page_size, self.keyset_ordering)
+        try:
+            page = paginator.page(
+                after=self.request.GET.get('after'),
+                before=self.request.GET.get('before'),
+            )
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
     def get_pagination_context(self, page_obj, pages_around=2):
         """
         Genera el contexto para paginación inteligente
@@ -31,9 +117,72 @@ class SmartPaginationMixin:
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        if context.get('is_paginated'):
+        if context.get('is_paginated') and isinstance(context['page_obj'], Page):
             page_obj = context['page_obj']
             pagination_context = self.get_pagination_context(page_obj)
             context.update(pagination_context)
         
-        return context
\ No newline at end of file
+        return context
+
+class ConditionalListMixin:
+    """
+    GET condicional para los parciales HTMX de un ListView.
+
+    El ETag se calcula con una sola consulta por clave primaria: URL, usuario
+    y generaciones (del tenant del usuario) de `self.model`,
+    `count_cache_models` y `etag_models` (los modelos que además se muestran
+    en el parcial). Las generaciones están en la base (core/cache.py), así
+    que una escritura hecha en otro proceso también cambia el ETag. Si
+    coincide con `If-None-Match` la vista responde 304 sin ejecutar el
+    listado; el navegador reutiliza el HTML que ya tenía.
+
+    Las páginas completas no llevan ETag: incluyen mensajes y contadores que
+    no dependen de estos modelos.
+    """
+    etag_models = ()
+
+    def get_etag(self):
+        user = self.request.user
+        models = dict.fromkeys((self.model, *getattr(self, 'count_cache_models', ()), *self.etag_models))
+        raw = repr((
+            f"{type(self).__module__}.{type(self).__qualname__}",
+            self.request.get_full_path(),
+            user.pk,
+            get_scoped_generations(user, *models),
+        ))
+        return quote_etag(hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        if not request.headers.get('HX-Request'):
+            return super().get(request, *args, **kwargs)
+        etag = self.get_etag()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response.headers['ETag'] = etag
+        # Cada petición revalida: nunca se usa una copia sin preguntar.
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['HX-Request'])
+        return response
+
+
+class ExportMixin:
+    """
+    Convierte un ListView en un endpoint de exportación que respeta los mismos
+    filtros de `get_queryset`. Formato con `?formato=csv|xlsx`.
+    """
+    export_columns = ()
+    export_filename = 'export'
+
+    def get_export_filename(self):
+        return self.export_filename
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('formato', 'csv')
+        return export_queryset(
+            self.get_queryset(),
+            self.export_columns,
+            self.get_export_filename(),
+            export_format,
+            asynchronous=isinstance(request, ASGIRequest),
+        )
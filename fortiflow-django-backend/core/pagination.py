@@ -1,11 +1,222 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+import base64
+import json
 import math
+from functools import partial
+
+
+def estimate_count(queryset):
+    """
+    Estimación de filas del planificador de Postgres para `queryset`, sin
+    ejecutarlo. Devuelve None si la base de datos no es Postgres.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator que usa la estimación del planificador en lugar de `COUNT(*)`
+    cuando el resultado supera `threshold` filas. Por debajo del umbral el
+    conteo es exacto.
+    """
+    count_is_approximate = False
+
+    def __init__(self, *args, threshold=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if threshold is None:
+            threshold = getattr(settings, 'PAGINATION_APPROXIMATE_COUNT_THRESHOLD', 50000)
+        self.threshold = threshold
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'explain'):
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate >= self.threshold:
+                self.count_is_approximate = True
+                return estimate
+        return super().count
+
+
+class CachedCountMixin:
+    """
+    Guarda el total del paginator en caché bajo `cache_key` durante
+    `cache_timeout` segundos. Sin `cache_key` se comporta como el original.
+    """
+
+    def __init__(self, *args, cache_key=None, cache_timeout=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_key = cache_key
+        if cache_timeout is None:
+            cache_timeout = getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', 60)
+        self.cache_timeout = cache_timeout
+
+    @cached_property
+    def count(self):
+        if self.cache_key is None:
+            return super().count
+        cached = cache.get(self.cache_key)
+        if cached is not None:
+            count, self.count_is_approximate = cached
+            return count
+        count = super().count
+        cache.set(self.cache_key, (count, self.count_is_approximate), self.cache_timeout)
+        return count
+
+
+class CachedCountPaginator(CachedCountMixin, Paginator):
+    count_is_approximate = False
+
+
+class CachedApproximateCountPaginator(CachedCountMixin, ApproximateCountPaginator):
+    pass
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class KeysetPage:
+    """Página de `KeysetPaginator`: sin número de página ni total."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[0])
+        return None
+
+
+class KeysetPaginator:
+    """
+    Paginación por clave (keyset): cada página filtra a partir del último
+    registro visto en vez de usar `OFFSET`, y no ejecuta `COUNT(*)`.
+
+    `ordering` es un campo (con `-` para descendente); la clave primaria se
+    usa como desempate en el mismo sentido. El campo no debe admitir nulos.
+    """
+
+    def __init__(self, queryset, per_page, ordering='-id'):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+        if self.field == 'id':
+            self.field = 'pk'
+
+    def _order_by(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        if self.field == 'pk':
+            return (f'{prefix}pk',)
+        return (f'{prefix}{self.field}', f'{prefix}pk')
+
+    def _seek(self, value, pk, forward=True):
+        descending = self.descending == forward
+        operator = 'lt' if descending else 'gt'
+        if self.field == 'pk':
+            return Q(**{f'pk__{operator}': pk})
+        return Q(**{f'{self.field}__{operator}': value}) | Q(**{self.field: value, f'pk__{operator}': pk})
+
+    def encode_cursor(self, obj):
+        value = getattr(obj, self.field) if self.field != 'pk' else None
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        elif value is not None and not isinstance(value, (int, float, str)):
+            value = str(value)
+        payload = json.dumps([value, obj.pk]).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """
+        (valor, pk) del cursor, convertidos al tipo de sus campos. Un cursor
+        manipulado (nulos, tipos que no corresponden) es `InvalidCursor`, no
+        un error de la consulta.
+        """
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            opts = self.queryset.model._meta
+            pk = opts.pk.to_python(pk)
+            if self.field != 'pk':
+                value = opts.get_field(self.field).to_python(value)
+        except (TypeError, ValueError, ValidationError):
+            raise InvalidCursor("Cursor inválido.")
+        if pk is None or (self.field != 'pk' and value is None):
+            raise InvalidCursor("Cursor inválido.")
+        return value, pk
+
+    def page(self, after=None, before=None):
+        queryset = self.queryset
+        if before:
+            value, pk = self.decode_cursor(before)
+            queryset = queryset.filter(self._seek(value, pk, forward=False)).order_by(*self._order_by(reverse=True))
+            rows = list(queryset[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return KeysetPage(rows, self, has_next=True, has_previous=has_previous)
+
+        if after:
+            value, pk = self.decode_cursor(after)
+            queryset = queryset.filter(self._seek(value, pk))
+        rows = list(queryset.order_by(*self._order_by())[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return KeysetPage(rows[:self.per_page], self, has_next=has_next, has_previous=bool(after))
+
 
 class ElidedPageNumberPagination(PageNumberPagination):
+    """
+    Páginas numeradas con `COUNT(*)` exacto. Una vista con
+    `approximate_count_threshold` (como en `SmartPaginationMixin`) usa la
+    estimación del planificador por encima de ese número de filas; el resto
+    no paga el EXPLAIN.
+    """
     page_size = 10
     page_size_query_param = 'page_size'
-    max_page_size = 100     
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        threshold = getattr(view, 'approximate_count_threshold', None)
+        if threshold is not None:
+            self.django_paginator_class = partial(ApproximateCountPaginator, threshold=threshold)
+        return super().paginate_queryset(queryset, request, view)
 
     def get_displayed_page_numbers(self, current_page, total_pages):
         pages = set()
@@ -34,6 +245,7 @@ class ElidedPageNumberPagination(PageNumberPagination):
 
         return Response({
             'count': total,
+            'count_is_approximate': getattr(self.page.paginator, 'count_is_approximate', False),
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'page': current_page,
@@ -41,3 +253,27 @@ class ElidedPageNumberPagination(PageNumberPagination):
             'visible_pages': visible_pages,
             'results': data
         })
+
+
+class KeysetPagination(CursorPagination):
+    """Paginación keyset para colecciones grandes de la API, por `-id`."""
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = self.get_ordering(request, queryset, view)[0].lstrip('-')
+        self.position_field = queryset.model._meta.get_field(ordering)
+        return super().paginate_queryset(queryset, request, view)
+
+    def decode_cursor(self, request):
+        # DRF filtra con la posición tal como llega en el cursor; una que no
+        # es del tipo del campo haría fallar la consulta.
+        cursor = super().decode_cursor(request)
+        if cursor is not None and cursor.position is not None:
+            try:
+                self.position_field.to_python(cursor.position)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        return cursor
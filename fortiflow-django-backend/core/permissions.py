@@ -1,5 +1,8 @@
 from rest_framework.permissions import BasePermission
 
+# Grupos que ven todos los registros de su tenant (ver `request.roles`).
+TENANT_ADMIN_ROLES = frozenset({'Admin', 'Supervisor'})
+
 
 class IsSuperUserOrStaff(BasePermission):
     def has_permission(self, request, view):
@@ -0,0 +1,109 @@
+"""
+Purga por lotes de los objetos con borrado diferido (`SoftDeleteMixin`).
+
+El `delete()` de Django carga en memoria cada fila dependiente para resolver
+las cascadas; con un portafolio grande eso agota el tiempo de la petición y
+retiene bloqueos durante minutos. Aquí cada modelo de `purge_plan` se borra
+con DELETEs de a `PURGE_BATCH_SIZE` filas, cada uno en su propia
+transacción, de las hojas hacia arriba, y solo la fila raíz (ya sin
+dependientes grandes) pasa por el `delete()` del ORM.
+
+Los DELETE por lotes no emiten señales: al terminar cada lote se invalidan
+las generaciones del modelo y se informa el avance a `progress` (el job
+'core.purge' lo guarda en su Job). La purga es idempotente: si se
+interrumpe, `manage.py purge_deleted` la retoma.
+
+Mientras tanto las filas de `purge_plan` siguen en sus tablas.
+`pending_purge_ids` da los ids de los padres que esperan la purga, desde la
+caché compartida, para que `TenantQuerySet.live()` las oculte sin joins.
+"""
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+
+from core.cache import bump_generation
+
+logger = logging.getLogger(__name__)
+
+# Segundos que se reutiliza la lista de pendientes. `soft_delete()` y el fin
+# de la purga la borran antes; el plazo acota lo que dura una lectura que se
+# cruzó con ellos.
+PENDING_TIMEOUT = 60
+
+
+def pending_key(model):
+    return f"purge:pending:{model._meta.label_lower}"
+
+
+def pending_purge_ids(model):
+    """Ids de `model` marcados con `soft_delete()` que aún no se han purgado."""
+    key = pending_key(model)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(model.all_objects.filter(deleted_at__isnull=False).values_list('pk', flat=True))
+        cache.set(key, ids, PENDING_TIMEOUT)
+    return ids
+
+
+def forget_pending_purges(*models):
+    """Borra, al confirmar la transacción, la lista de pendientes de `models`."""
+    keys = [pending_key(model) for model in models]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def delete_batch(queryset, batch_size):
+    """Borra hasta `batch_size` filas de `queryset` con un solo DELETE. Devuelve cuántas."""
+    model = queryset.model
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    sql, params = queryset.values('pk')[:batch_size].query.sql_with_params()
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({sql})",
+            params,
+        )
+        return cursor.rowcount
+
+
+def purge(model, pk, batch_size=None, progress=None):
+    """
+    Borra el objeto `pk` de `model` y sus dependientes de `model.purge_plan`.
+    Devuelve el avance final: {'status', 'step', 'deleted': {modelo: filas}}.
+    """
+    batch_size = batch_size or getattr(settings, 'PURGE_BATCH_SIZE', 5000)
+    state = {'status': 'running', 'step': None, 'deleted': {}}
+
+    def report():
+        if progress:
+            progress(state)
+
+    try:
+        for label, lookup in model.purge_plan:
+            related = apps.get_model(label)
+            queryset = related._base_manager.filter(**{lookup: pk})
+            state['step'] = label
+            state['deleted'].setdefault(label, 0)
+            while True:
+                deleted = delete_batch(queryset, batch_size)
+                if deleted:
+                    state['deleted'][label] += deleted
+                    bump_generation(related)
+                    report()
+                if deleted < batch_size:
+                    break
+        state['step'] = model._meta.label
+        deleted, _ = model.all_objects.filter(pk=pk).delete()
+        state['deleted'][model._meta.label] = deleted
+        state['status'] = 'finished'
+        forget_pending_purges(model, *(apps.get_model(label) for label, _ in model.soft_delete_dependents))
+    except Exception:
+        state['status'] = 'failed'
+        report()
+        raise
+    report()
+    logger.info("Purga de %s %s terminada: %s", model._meta.label, pk, state['deleted'])
+    return state
@@ -39,6 +39,7 @@ MY_APPS = [
     "apps.notification",
     "apps.portfolio",
     "apps.frontend",
+    "apps.jobs",
 ]
 
 THIRD_PARTY_APPS = [
@@ -56,6 +57,7 @@ DJANGO_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + MY_APPS + THIRD_PARTY_APPS
@@ -68,6 +70,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.IdentityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -114,6 +117,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'apps.notification.context_processors.notifications',
             ],
         },
     },
@@ -197,7 +201,9 @@ MEDIA_URL = "/media/"
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # core.authentication.StatelessJWTAuthentication evita también la
+        # consulta inicial; ver las restricciones en ese módulo.
+        'core.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -209,6 +215,76 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10
 }
 
+# A partir de este número de filas los listados muestran un total estimado
+# por el planificador en lugar de ejecutar COUNT(*).
+PAGINATION_APPROXIMATE_COUNT_THRESHOLD = 50000
+
+# `default` es compartida por todos los procesos, web y runworker: ahí van las
+# entradas que se invalidan borrándolas (identidad, totales de no leídas), así
+# que el borrado se ve en todos. Las generaciones (core/cache.py) y las
+# versiones de fila (core/fragments.py) van en la tabla de CacheVersion; las
+# entradas que dependen de ellas (fragmentos HTML de filas) pueden vivir en una
+# caché por proceso. Los fragmentos van en `fragments`: si se pierden solo se
+# vuelven a renderizar.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://cache:6379/0',
+    },
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fragments',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+FRAGMENT_CACHE_ALIAS = 'fragments'
+FRAGMENT_CACHE_TIMEOUT = 3600
+
+# Segundos que se reutiliza la identidad (usuario, tenant, roles) de un token
+# JWT; las escrituras del ORM la invalidan antes (core/identity.py).
+IDENTITY_CACHE_TIMEOUT = 60
+
+# Segundos que se reutiliza el total de un listado con los mismos filtros.
+PAGINATION_COUNT_CACHE_TIMEOUT = 60
+
+# Segundos que un agente retiene la asignación que le entrega la cola de trabajo.
+WORK_QUEUE_LEASE_SECONDS = 600
+
+# Segundos que se reutiliza el total de notificaciones no leídas de un usuario
+# (las escrituras lo invalidan antes).
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = 300
+
+# Eventos en vivo (SSE). PostgresBroker reparte entre procesos con
+# LISTEN/NOTIFY; core.events.InProcessBroker sirve para un solo proceso y tests.
+EVENTS_BROKER = 'core.events.PostgresBroker'
+EVENTS_KEEPALIVE_SECONDS = 20
+
+# Jobs en segundo plano (apps/jobs), ejecutados por `manage.py runworker`.
+JOBS_WORKER_CONCURRENCY = 4
+# Segundos sin latido tras los que un job en curso vuelve a la cola.
+JOBS_STALE_SECONDS = 300
+# Cada cuántos segundos un worker encola las tareas periódicas y revisa los latidos.
+JOBS_SCHEDULER_INTERVAL = 30
+# Días que se conservan los jobs terminados (tarea jobs.prune).
+JOBS_RETENTION_DAYS = 30
+# Tareas periódicas: 'at' es una hora local diaria, 'every' un intervalo en
+# segundos (ver apps/jobs/scheduler.py).
+JOBS_SCHEDULE = [
+    {
+        'task': 'portfolio.refresh_days_delinquency', 'at': '00:05', 'label': "Días de mora",
+        'kwargs': {'rebuild_stats': False},
+    },
+    # Después del cambio de día: recalcula lo vencido y corrige los contadores
+    # que las señales pudieran haber desviado.
+    {'task': 'portfolio.rebuild_stats', 'at': '00:10', 'label': "Estadísticas de portafolios"},
+    {'task': 'management.ensure_partitions', 'at': '00:15', 'label': "Particiones de gestiones"},
+    {'task': 'jobs.prune', 'at': '03:00', 'label': "Limpieza de tareas"},
+    {'task': 'core.prune_row_versions', 'at': '03:30', 'label': "Limpieza de versiones de filas"},
+]
+
+# Registros aceptados por petición en la API de gestiones por lotes.
+MANAGEMENT_BATCH_MAX_RECORDS = 5000
+
 # Cookie settings
 SESSION_COOKIE_HTTPONLY = True
 CSRF_COOKIE_HTTPONLY = False  # Allow JavaScript to read CSRF token
@@ -250,7 +326,7 @@ SIMPLE_JWT = {
 
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
     "TOKEN_TYPE_CLAIM": "token_type",
-    "TOKEN_USER_CLASS": "rest_framework_simplejwt.models.TokenUser",
+    "TOKEN_USER_CLASS": "core.authentication.TenantTokenUser",
 
     "JTI_CLAIM": "jti",
 
@@ -258,8 +334,8 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=5),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
 
-    "TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainPairSerializer",
-    "TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
+    "TOKEN_OBTAIN_SERIALIZER": "core.authentication.TenantTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "core.authentication.TenantTokenRefreshSerializer",
     "TOKEN_VERIFY_SERIALIZER": "rest_framework_simplejwt.serializers.TokenVerifySerializer",
     "TOKEN_BLACKLIST_SERIALIZER": "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
     "SLIDING_TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainSlidingSerializer",
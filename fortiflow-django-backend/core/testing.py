@@ -0,0 +1,80 @@
+import json
+
+from django.db import connection
+
+
+def plan_nodes(plan):
+    """Recorre en profundidad los nodos de un plan de `EXPLAIN (FORMAT JSON)`."""
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from plan_nodes(child)
+
+
+class QueryPlanAssertionsMixin:
+    """
+    Aserciones sobre el plan de Postgres de un queryset. El plan se obtiene
+    con `enable_seqscan = off`: si aun así aparece un `Seq Scan`, es que no
+    hay ningún índice que sirva a la consulta.
+
+    Las tablas e índices se nombran como en el modelo: el plan de una tabla
+    particionada recorre sus particiones (`management_management_p202506`) y
+    los índices de estas, y cada una se compara por la tabla o el índice
+    padre de los que forma parte.
+    """
+
+    def partition_roots(self, names):
+        """{nombre: nombre de la raíz de su árbol de particiones} de `names`."""
+        names = sorted({name for name in names if name})
+        if not names:
+            return {}
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT c.relname, root.relname
+                FROM pg_class c
+                JOIN pg_class root ON root.oid = COALESCE(pg_partition_root(c.oid), c.oid)
+                WHERE c.relname = ANY(%s)
+                """,
+                [names],
+            )
+            roots = dict(cursor.fetchall())
+        return {name: roots.get(name, name) for name in names}
+
+    def get_plan(self, queryset):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            try:
+                return json.loads(queryset.explain(format='json'))[0]['Plan']
+            finally:
+                cursor.execute("SET LOCAL enable_seqscan = on")
+
+    def assertNoSeqScan(self, queryset, tables=None):
+        """Falla si el plan recorre secuencialmente `tables` (o cualquier tabla)."""
+        plan = self.get_plan(queryset)
+        relations = [node['Relation Name'] for node in plan_nodes(plan) if node['Node Type'] == 'Seq Scan']
+        roots = self.partition_roots(relations)
+        scanned = [relation for relation in relations if tables is None or roots[relation] in tables]
+        self.assertFalse(scanned, f"Seq Scan sobre {', '.join(scanned)}:\n{json.dumps(plan, indent=2)}")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = self.get_plan(queryset)
+        used = set(self.partition_roots(node.get('Index Name') for node in plan_nodes(plan)).values())
+        self.assertIn(index_name, used, f"No se usa {index_name}:\n{json.dumps(plan, indent=2)}")
+
+
+class APIQueryCountMixin:
+    """Aserciones sobre el número de consultas de los listados de la API."""
+
+    def assertQueriesPerPage(self, client, url, expected, page_sizes=(10, 100)):
+        """
+        Falla si listar `url` no hace exactamente `expected` consultas con
+        cada uno de `page_sizes`: el costo de una página no debe crecer con
+        su tamaño (sin N+1 por relación). Una primera petición calienta las
+        entradas de la caché compartida que no dependen de la página.
+        """
+        client.get(url, {'page_size': 1})
+        for page_size in page_sizes:
+            with self.subTest(page_size=page_size), self.assertNumQueries(expected):
+                response = client.get(url, {'page_size': page_size})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()['results']), page_size)
@@ -19,6 +19,7 @@ from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 from django.views.generic import RedirectView
+from core.views import EventStreamView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -27,5 +28,9 @@ urlpatterns = [
     path("clients/", include('apps.client.urls')),
     path("portfolio/", include('apps.portfolio.urls')),
     path("management/", include('apps.management.urls')),
+    path("notifications/", include('apps.notification.urls')),
+    path("jobs/", include('apps.jobs.urls')),
+    path("api/", include('core.api_urls')),
+    path("events/", EventStreamView.as_view(), name="event-stream"),
     path("", RedirectView.as_view(url='/dashboard/')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,11 +1,14 @@
-from rest_framework_simplejwt.tokens import UntypedToken
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.http import HttpResponseRedirect
 
+from core.authentication import CachedJWTAuthentication
+
+# Las clases de autenticación no guardan estado por petición: una sola basta.
+jwt_authenticator = CachedJWTAuthentication()
+
+
 class JWTTemplateAuthMixin:
     def dispatch(self, request, *args, **kwargs):
-        jwt_authenticator = JWTAuthentication()
         try:
             user_auth_tuple = jwt_authenticator.authenticate(request)
             if user_auth_tuple is not None:
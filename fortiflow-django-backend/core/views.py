@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.views import View
+
+from core.events import channels_for, get_broker
+
+
+def format_event(message):
+    return f"event: {message['event']}\ndata: {json.dumps(message.get('data'))}\n\n"
+
+
+class EventStreamView(View):
+    """
+    Canal SSE del usuario: notificaciones y cambios en tablas de su tenant.
+    Requiere servir la aplicación por ASGI (core.asgi); cada conexión abierta
+    es una corrutina en espera, no un hilo.
+    """
+    http_method_names = ['get']
+
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponse(status=401)
+        response = StreamingHttpResponse(
+            self.stream(channels_for(user)), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, channels):
+        keepalive = getattr(settings, 'EVENTS_KEEPALIVE_SECONDS', 20)
+        yield f"retry: {getattr(settings, 'EVENTS_RETRY_MS', 5000)}\n\n"
+        async with get_broker().subscribe(channels) as subscription:
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    # Mantiene viva la conexión a través de proxies.
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(message)
+
+
+class AutocompleteView(LoginRequiredMixin, View):
+    """
+    Opciones de un `core.widgets.AutocompleteSelect`: `?q=texto&page=N`, de a
+    `page_size`, como <li> para HTMX. Las subclases definen
+    `get_queryset(query)`, acotado al tenant del usuario y resuelto con
+    índices, y opcionalmente `label_from_instance`.
+    """
+    http_method_names = ['get']
+    page_size = 10
+    template_name = 'partials/autocomplete_options.html'
+
+    def get_queryset(self, query):
+        raise NotImplementedError
+
+    def label_from_instance(self, obj):
+        return str(obj)
+
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        start = (page - 1) * self.page_size
+        objects = list(self.get_queryset(query)[start:start + self.page_size + 1])
+        next_url = None
+        if len(objects) > self.page_size:
+            objects = objects[:self.page_size]
+            next_url = f"{request.path}?{urlencode({'q': query, 'page': page + 1})}"
+        return render(request, self.template_name, {
+            'options': [(obj.pk, self.label_from_instance(obj)) for obj in objects],
+            'next_url': next_url,
+            'query': query,
+            'page': page,
+        })
@@ -0,0 +1,56 @@
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from django.utils.html import format_html
+
+
+class AutocompleteSelect(forms.Widget):
+    """
+    Reemplazo de `<select>` para ModelChoiceField con muchas filas: un campo
+    oculto con el id y un buscador que pide las opciones paginadas a `url`
+    (una `core.views.AutocompleteView`) mientras se escribe.
+
+    Al renderizar solo se consulta la opción seleccionada, para mostrar su
+    texto; la validación es la del campo (un `get` sobre su queryset, que debe
+    estar acotado al tenant del usuario).
+    """
+
+    def __init__(self, url, attrs=None, placeholder="Escriba para buscar..."):
+        super().__init__(attrs)
+        self.url = url
+        self.placeholder = placeholder
+
+    def selected_label(self, value):
+        if value in (None, '') or not hasattr(self, 'choices'):
+            return ''
+        try:
+            obj = self.choices.queryset.filter(pk=value).first()
+        except (ValueError, TypeError, ValidationError):
+            return ''
+        return self.choices.field.label_from_instance(obj) if obj is not None else ''
+
+    def render(self, name, value, attrs=None, renderer=None):
+        attrs = self.build_attrs(self.attrs, attrs)
+        widget_id = attrs.pop('id', None) or f'id_{name}'
+        attrs.pop('required', None)
+        css_class = attrs.pop('class', 'input input-bordered w-full')
+        return format_html(
+            '<div class="relative" data-autocomplete>'
+            '<input type="hidden" name="{name}" id="{id}" value="{value}" data-autocomplete-value>'
+            '<input type="search" name="q" class="{css_class}" value="{label}" placeholder="{placeholder}"'
+            ' autocomplete="off" data-autocomplete-search hx-get="{url}"'
+            ' hx-trigger="input changed delay:300ms, focus once" hx-target="#{id}-options" hx-swap="innerHTML">'
+            '<ul id="{id}-options" class="menu bg-base-100 rounded-box shadow absolute z-50 w-full max-h-60'
+            ' overflow-y-auto empty:hidden"></ul>'
+            '</div>',
+            name=name,
+            id=widget_id,
+            value='' if value is None else value,
+            css_class=css_class,
+            label=self.selected_label(value),
+            placeholder=self.placeholder,
+            url=reverse(self.url),
+        )
+
+    def value_from_datadict(self, data, files, name):
+        return data.get(name) or None